@@ -0,0 +1,104 @@
+# app/archive.py
+"""Холодное хранилище решений закрытых ДЗ.
+
+Решения архивированного ДЗ лежат в ARCHIVE_DIR/<homework_id>/part-NNNNN.jsonl.gz:
+по JSON-строке на решение, частями по ARCHIVE_CHUNK_SIZE в порядке
+(created_at, id) - том же, что у keyset-пагинации списков, так что курсор
+списка решений подходит и для архива.
+
+Часть пишется во временный файл и переименовывается (с fsync) до commit
+транзакции, которая удаляет её строки из solutions и сдвигает
+homework_archives.parts. Действительны только первые parts частей: если
+процесс упал между переименованием и commit, строки ещё в solutions, и
+следующий запуск перезапишет ту же часть заново. В памяти - не больше одной
+части: и при записи, и при чтении строки идут потоком через gzip.
+
+Функции здесь блокирующие: из async-кода они вызываются через asyncio.to_thread.
+"""
+
+import gzip
+import os
+from pathlib import Path
+from typing import Iterator
+from uuid import UUID
+
+from app.models.pagination import Cursor
+from app.models.solution import Solution
+from app.settings import settings
+
+LEVEL = 6
+
+
+def homework_dir(homework_id: UUID) -> Path:
+    return Path(settings.archive_dir) / str(homework_id)
+
+
+def part_path(homework_id: UUID, part: int) -> Path:
+    return homework_dir(homework_id) / f"part-{part:05d}.jsonl.gz"
+
+
+def write_part(homework_id: UUID, part: int, solutions: list[Solution]) -> None:
+    """Записать часть целиком или не записать вовсе: tmp + fsync + rename"""
+    path = part_path(homework_id, part)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=LEVEL, mtime=0) as f:
+            for s in solutions:
+                f.write(s.model_dump_json().encode())
+                f.write(b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+    # переименование тоже должно пережить сбой, иначе commit удалит строки без файла
+    fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_part(homework_id: UUID, part: int) -> Iterator[Solution]:
+    with gzip.open(part_path(homework_id, part), "rb") as f:
+        for line in f:
+            yield Solution.model_validate_json(line)
+
+
+def _key(s: Solution) -> tuple:
+    return s.created_at, s.id
+
+
+def _first_part(homework_id: UUID, parts: int, after: Cursor) -> int:
+    """Последняя часть, которая начинается не позже after: бинарный поиск по первым строкам"""
+    lo, hi = 0, parts - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        first = next(read_part(homework_id, mid))
+        if _key(first) <= tuple(after):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def iter_solutions(homework_id: UUID, parts: int, after: Cursor | None = None) -> Iterator[Solution]:
+    """Решения из первых parts частей по порядку, строго после after"""
+    start = 0 if after is None or parts == 0 else _first_part(homework_id, parts, after)
+    for part in range(start, parts):
+        for s in read_part(homework_id, part):
+            if after is None or _key(s) > tuple(after):
+                yield s
+
+
+def read_page(homework_id: UUID, parts: int, after: Cursor | None, limit: int) -> list[Solution]:
+    page = []
+    for s in iter_solutions(homework_id, parts, after):
+        page.append(s)
+        if len(page) == limit:
+            break
+    return page
+
+
+def load_part(homework_id: UUID, part: int) -> list[Solution]:
+    """Часть целиком - для потоковой выдачи по одной части за раз"""
+    return list(read_part(homework_id, part))
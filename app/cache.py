@@ -0,0 +1,157 @@
+# app/cache.py
+"""Кэш чтений ДЗ (read-through) с инвалидацией по записи.
+
+Бэкенд выбирается настройкой CACHE_BACKEND:
+  memory - LRU + TTL в памяти процесса
+  redis  - общий кэш для нескольких реплик (нужен пакет redis)
+  off    - без кэша
+
+Списки ДЗ курса кэшируются под поколением курса: запись не ищет и не удаляет
+все страницы курса, а увеличивает счётчик, и старые ключи перестают читаться.
+"""
+
+import logging
+import pickle
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Protocol
+
+from app.settings import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Any | None: ...
+
+    async def set(self, key: str, value: Any) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def generation(self, key: str) -> int: ...
+
+    async def bump(self, *keys: str) -> None: ...
+
+
+class MemoryCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # поколения хранятся отдельно от LRU: вытеснение счётчика
+        # вернуло бы его к нулю и оживило старые записи.
+        # ключ -> (момент bump, поколение), от давних bump к недавним
+        self._generations: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        # поколения сквозные по всем ключам и не повторяются
+        self._bumps = 0
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def generation(self, key: str) -> int:
+        return self._generations.get(key, (0, 0))[1]
+
+    async def bump(self, *keys: str) -> None:
+        now = time.monotonic()
+        for key in keys:
+            self._bumps += 1
+            self._generations[key] = (now, self._bumps)
+            self._generations.move_to_end(key)
+        # через ttl после bump все записи под прежними поколениями истекли:
+        # счётчик можно забыть, ключ вернётся к нулю, а новые поколения с нулём не совпадут
+        while self._generations:
+            bumped, _ = next(iter(self._generations.values()))
+            if bumped + self.ttl >= now:
+                break
+            self._generations.popitem(last=False)
+
+
+class RedisCache:
+    def __init__(self, url: str, ttl: int) -> None:
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self.ttl = ttl
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.client.get(key)
+        return None if raw is None else pickle.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(key, pickle.dumps(value), ex=self.ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def generation(self, key: str) -> int:
+        raw = await self.client.get(key)
+        return int(raw or 0)
+
+    async def bump(self, *keys: str) -> None:
+        if not keys:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+
+
+class CacheStats:
+    """Попадания и промахи по видам ключей (homework, course)"""
+
+    def __init__(self) -> None:
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.invalidations = 0
+
+    def hit_ratio(self, kind: str) -> float:
+        total = self.hits[kind] + self.misses[kind]
+        return self.hits[kind] / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            kind: {
+                "hits": self.hits[kind],
+                "misses": self.misses[kind],
+                "hit_ratio": self.hit_ratio(kind),
+            }
+            for kind in self.hits.keys() | self.misses.keys()
+        } | {"invalidations": self.invalidations}
+
+
+def make_cache() -> CacheBackend | None:
+    if settings.cache_backend == "off":
+        return None
+    if settings.cache_backend == "redis":
+        return RedisCache(settings.cache_url, settings.cache_ttl)
+    if settings.cache_backend != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND={settings.cache_backend!r}, using memory")
+    return MemoryCache(settings.cache_max_size, settings.cache_ttl)
+
+
+cache = make_cache()
+stats = CacheStats()
@@ -29,20 +29,32 @@
 #     finally:
 #         db.close()
 # app/database.py
-from sqlalchemy import create_engine, text
+import logging
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.logging_config import log_slow_queries
+from app.metrics import TimedAsyncQueuePool, instrument_engine
+from app.replica import RoutingSession
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
 # Используем URL из настроек без дополнительной обработки
 DATABASE_URL = settings.postgres_url
 
-print(f"Final database URL: {DATABASE_URL}")
+logger.info(f"Database URL: {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
 
-# Создаем engine с минимальными настройками
+# Создаем engine с минимальными настройками; SQL в лог - через SQL_ECHO (app.logging_config)
 engine = create_engine(
     DATABASE_URL,
-    echo=True,
     future=True,
     pool_pre_ping=True,
     pool_recycle=300,
@@ -55,47 +67,92 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Асинхронный engine для HTTP-слоя и consumer'а: тот же Postgres, но через asyncpg,
+# чтобы запросы к БД не занимали потоки threadpool'а Starlette
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    # с метриками пул ещё и меряет ожидание свободного соединения
+    poolclass=TimedAsyncQueuePool if settings.metrics_enabled else AsyncAdaptedQueuePool,
+)
+
+# Реплика для чтения: сессии сами отправляют на неё подходящие SELECT'ы (app.replica)
+replica_engine = None
+if settings.postgres_replica_url:
+    logger.info(f"Replica URL: {make_url(settings.postgres_replica_url).render_as_string(hide_password=True)}")
+    replica_engine = create_async_engine(
+        make_url(settings.postgres_replica_url).set(drivername="postgresql+asyncpg"),
+        pool_pre_ping=True,
+        pool_recycle=300,
+    )
+
+if settings.metrics_enabled:
+    instrument_engine(async_engine, replica_engine)
+
+log_slow_queries(async_engine)
+
+if replica_engine is None:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+else:
+    log_slow_queries(replica_engine)
+
+    class _RoutingSession(RoutingSession):
+        primary = async_engine.sync_engine
+        replica = replica_engine.sync_engine
+
+    AsyncSessionLocal = async_sessionmaker(
+        sync_session_class=_RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
 # Простая функция тестирования подключения
 def test_connection():
     try:
         with engine.connect() as conn:
             result = conn.execute(text("SELECT version()"))
             db_version = result.fetchone()[0]
-            print(f"✅ Connected to PostgreSQL: {db_version}")
+            logger.info(f"Connected to PostgreSQL: {db_version}")
             return True
     except Exception as e:
-        print(f"❌ Connection failed: {e}")
+        logger.error(f"Connection failed: {e}")
         return False
 
 def init_db():
-    """Создаем таблицы если их нет"""
-    from app.schemas.base_schema import Base
-    
-    # Импортируем все модели чтобы они зарегистрировались
-    import app.schemas.homework
-    import app.schemas.solution
-    import app.schemas.proggress
-    
+    """Приводим схему к последней миграции (alembic upgrade head)"""
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config(str(BASE_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BASE_DIR / "migrations"))
+    cfg.attributes["configure_logger"] = False
+
     try:
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created/verified")
-        
-        # Проверим, какие таблицы существуют
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """))
-            tables = result.fetchall()
-            print(f"Tables in database: {[t[0] for t in tables]}")
-            
+            tables = inspect(conn).get_table_names()
+            conn.commit()
+
+            cfg.attributes["connection"] = conn
+            # База создана ещё через create_all: схема 0001 уже на месте
+            if "homeworks" in tables and "alembic_version" not in tables:
+                command.stamp(cfg, "0001")
+            command.upgrade(cfg, "head")
+            conn.commit()
+        logger.info("Database migrated to head")
+
     except Exception as e:
-        print(f"❌ Error creating tables: {e}")
+        logger.exception(f"Error migrating database: {e}")
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
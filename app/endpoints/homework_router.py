@@ -1,10 +1,24 @@
+from typing import AsyncIterator
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from app.query_counter import query_budget
 from app.services.homework_service import HomeworkService
-from app.models.homework import Homework, HomeworkProgress
-from app.models.solution import Solution
+from app.settings import settings
+from app.similarity import MIN_THRESHOLD
+from app.models.homework import Homework, HomeworkProgress, HomeworkStats, LeaderboardEntry
+from app.models.solution import GradeResult, SimilarSolutions, Solution
+from app.models.pagination import Cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, STREAM_BATCH_SIZE, SearchCursor
 from app.models.requests import (
+    MAX_BULK_SIZE,
+    CloseHomeworkRequest,
     CreateHomeworkRequest,
     PublishHomeworkRequest,
     SubmitSolutionRequest,
@@ -14,105 +28,335 @@ from app.models.requests import (
 
 router = APIRouter(prefix="/homeworks", tags=["Homework"])
 
+PageLimit = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+SearchText = Query(..., min_length=1, max_length=256)
+
+HomeworkList = TypeAdapter(list[Homework])
+SolutionList = TypeAdapter(list[Solution])
+
+def _cursor(after: str | None) -> Cursor | None:
+    if after is None:
+        return None
+    try:
+        return Cursor.parse(after)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+def _search_cursor(after: str | None) -> SearchCursor | None:
+    if after is None:
+        return None
+    try:
+        return SearchCursor.parse(after)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+def _fields(obj):
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    if isinstance(obj, UUID):
+        # asyncpg отдаёт свой подкласс UUID, orjson знает только uuid.UUID
+        return str(obj)
+    raise TypeError
+
+def _dump_json(items: list, adapter: TypeAdapter) -> bytes:
+    if orjson is not None:
+        # модели ответов плоские, без алиасов и своих сериализаторов: __dict__ и есть
+        # их JSON; UUID, datetime и enum orjson кодирует сам и заметно быстрее
+        return orjson.dumps(items, default=_fields)
+    return adapter.dump_json(items)
+
+def _page(
+    items: list, limit: int, response: Response, adapter: TypeAdapter, cursor: str | None = None
+) -> list | Response:
+    """Полная страница - значит, дальше могут быть ещё строки"""
+    headers = {}
+    if len(items) == limit:
+        last = items[-1]
+        headers["X-Next-Cursor"] = cursor or str(Cursor(last.created_at, last.id))
+    if settings.fast_json:
+        # модели уже собраны в репозитории: сериализуем один раз, без второго
+        # прохода response_model; схема в OpenAPI остаётся прежней
+        return Response(_dump_json(items, adapter), media_type="application/json", headers=headers)
+    response.headers.update(headers)
+    return items
+
+def _hits_page(hits: list[tuple], limit: int, response: Response, adapter: TypeAdapter) -> list | Response:
+    """Выдача поиска: (модель, rank) по убыванию rank; курсор - по последней паре"""
+    cursor = str(SearchCursor(hits[-1][1], hits[-1][0].id)) if hits else None
+    return _page([item for item, _ in hits], limit, response, adapter, cursor)
+
+def _ndjson(items: AsyncIterator[BaseModel]) -> StreamingResponse:
+    async def lines():
+        batch = []
+        async for item in items:
+            batch.append(item.model_dump_json())
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield "\n".join(batch) + "\n"
+                batch.clear()
+        if batch:
+            yield "\n".join(batch) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.get("/", response_model=list[Homework])
-def get_homeworks(svc: HomeworkService = Depends()):
-    return svc.get_homeworks()
+@query_budget(1)
+async def get_homeworks(
+    response: Response,
+    after: str | None = None,
+    limit: int = PageLimit,
+    stream: bool = False,
+    svc: HomeworkService = Depends(),
+):
+    if stream:
+        return _ndjson(svc.stream_homeworks())
+    return _page(await svc.get_homeworks(_cursor(after), limit), limit, response, HomeworkList)
 
 @router.get("/course/{course_id}", response_model=list[Homework])
-def get_homeworks_by_course(
+@query_budget(1)
+async def get_homeworks_by_course(
     course_id: UUID,
+    response: Response,
+    after: str | None = None,
+    limit: int = PageLimit,
+    stream: bool = False,
+    svc: HomeworkService = Depends(),
+):
+    if stream:
+        return _ndjson(svc.stream_homeworks_by_course(course_id))
+    items = await svc.get_homeworks_by_course(course_id, _cursor(after), limit)
+    return _page(items, limit, response, HomeworkList)
+
+@router.get("/search", response_model=list[Homework])
+@query_budget(1)
+async def search_homeworks(
+    response: Response,
+    q: str = SearchText,
+    after: str | None = None,
+    limit: int = PageLimit,
     svc: HomeworkService = Depends(),
 ):
-    return svc.get_homeworks_by_course(course_id)
+    # q - в синтаксисе websearch_to_tsquery: слова, "фраза", -исключение, or
+    hits = await svc.search_homeworks(q, _search_cursor(after), limit)
+    return _hits_page(hits, limit, response, HomeworkList)
 
 @router.post("/", response_model=Homework)
-def create_homework(
+@query_budget(1)
+async def create_homework(
     dto: CreateHomeworkRequest,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.create_homework(dto)
+        return await svc.create_homework(dto)
+    except Exception as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/bulk", response_model=list[Homework])
+@query_budget(1)
+async def create_homeworks(
+    dtos: list[CreateHomeworkRequest] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+    svc: HomeworkService = Depends(),
+):
+    try:
+        return await svc.create_homeworks(dtos)
     except Exception as e:
         raise HTTPException(400, str(e))
 
 @router.post("/publish", response_model=Homework)
-def publish_homework(
+@query_budget(3)
+async def publish_homework(
     dto: PublishHomeworkRequest,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.publish_homework(dto)
+        return await svc.publish_homework(dto)
+    except KeyError:
+        raise HTTPException(404, "Homework not found")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/close", response_model=Homework)
+@query_budget(3)
+async def close_homework(
+    dto: CloseHomeworkRequest,
+    svc: HomeworkService = Depends(),
+):
+    try:
+        return await svc.close_homework(dto)
     except KeyError:
         raise HTTPException(404, "Homework not found")
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 @router.post("/solutions/submit", response_model=Solution)
-def submit_solution(
+@query_budget(3)
+async def submit_solution(
     dto: SubmitSolutionRequest,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.submit_solution(dto)
+        return await svc.submit_solution(dto)
     except KeyError:
         raise HTTPException(404, "Homework not found")
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 @router.post("/solutions/return", response_model=Solution)
-def return_solution(
+@query_budget(4)
+async def return_solution(
     dto: ReturnSolutionRequest,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.return_solution(dto)
+        return await svc.return_solution(dto)
     except KeyError:
         raise HTTPException(404, "Solution not found")
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 @router.post("/solutions/grade", response_model=Solution)
-def grade_solution(
+@query_budget(4)
+async def grade_solution(
     dto: GradeSolutionRequest,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.grade_solution(dto)
+        return await svc.grade_solution(dto)
     except KeyError:
         raise HTTPException(404, "Solution not found")
     except ValueError as e:
         raise HTTPException(400, str(e))
 
+@router.post("/solutions/grade/bulk", response_model=list[GradeResult])
+@query_budget(5)
+async def grade_solutions(
+    dtos: list[GradeSolutionRequest] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+    svc: HomeworkService = Depends(),
+):
+    return await svc.grade_solutions(dtos)
+
+@router.get("/{homework_id}/stats", response_model=HomeworkStats)
+@query_budget(1)
+async def get_homework_stats(
+    homework_id: UUID,
+    svc: HomeworkService = Depends(),
+):
+    try:
+        return await svc.get_homework_stats(homework_id)
+    except KeyError:
+        raise HTTPException(404, "Homework not found")
+
+@router.get("/{homework_id}/similar-solutions", response_model=list[SimilarSolutions])
+@query_budget(1)
+async def get_similar_solutions(
+    homework_id: UUID,
+    threshold: float = Query(0.8, ge=MIN_THRESHOLD, le=1.0),
+    limit: int = PageLimit,
+    svc: HomeworkService = Depends(),
+):
+    # запрос к БД - только при первой загрузке ДЗ или по истечении SIMILARITY_TTL
+    return await svc.get_similar_solutions(homework_id, threshold, limit)
+
+@router.get("/leaderboard/course/{course_id}", response_model=list[LeaderboardEntry])
+@query_budget(1)
+async def get_leaderboard(
+    course_id: UUID,
+    limit: int = PageLimit,
+    svc: HomeworkService = Depends(),
+):
+    # запрос к БД - только при первой загрузке курса или по истечении LEADERBOARD_TTL
+    return await svc.get_leaderboard(course_id, limit)
+
+@router.get("/leaderboard/course/{course_id}/student/{student_id}", response_model=LeaderboardEntry)
+@query_budget(1)
+async def get_student_rank(
+    course_id: UUID,
+    student_id: UUID,
+    svc: HomeworkService = Depends(),
+):
+    try:
+        return await svc.get_student_rank(course_id, student_id)
+    except KeyError:
+        raise HTTPException(404, "Student has no graded solutions in this course")
+
 @router.get("/solutions/student/{student_id}", response_model=list[Solution])
-def get_solutions_by_student(
+@query_budget(1)
+async def get_solutions_by_student(
     student_id: UUID,
+    response: Response,
+    after: str | None = None,
+    limit: int = PageLimit,
+    stream: bool = False,
+    svc: HomeworkService = Depends(),
+):
+    if stream:
+        return _ndjson(svc.stream_solutions_by_student(student_id))
+    items = await svc.get_solutions_by_student(student_id, _cursor(after), limit)
+    return _page(items, limit, response, SolutionList)
+
+@router.get("/solutions/search", response_model=list[Solution])
+@query_budget(1)
+async def search_solutions(
+    homework_id: UUID,
+    response: Response,
+    q: str = SearchText,
+    after: str | None = None,
+    limit: int = PageLimit,
     svc: HomeworkService = Depends(),
 ):
-    return svc.get_solutions_by_student(student_id)
+    hits = await svc.search_solutions(homework_id, q, _search_cursor(after), limit)
+    return _hits_page(hits, limit, response, SolutionList)
 
 @router.get("/solutions/homework/{homework_id}", response_model=list[Solution])
-def get_solutions_by_homework(
+@query_budget(1)
+async def get_solutions_by_homework(
+    homework_id: UUID,
+    response: Response,
+    after: str | None = None,
+    limit: int = PageLimit,
+    stream: bool = False,
+    svc: HomeworkService = Depends(),
+):
+    if stream:
+        return _ndjson(svc.stream_solutions_by_homework(homework_id))
+    items = await svc.get_solutions_by_homework(homework_id, _cursor(after), limit)
+    return _page(items, limit, response, SolutionList)
+
+@router.get("/{homework_id}/archive/solutions", response_model=list[Solution])
+@query_budget(1)
+async def get_archived_solutions(
     homework_id: UUID,
+    response: Response,
+    after: str | None = None,
+    limit: int = PageLimit,
+    stream: bool = False,
     svc: HomeworkService = Depends(),
 ):
-    return svc.get_solutions_by_homework(homework_id)
+    # решения из файлов архива; пока архивация идёт, остальные ещё в /solutions/homework
+    try:
+        if stream:
+            return _ndjson(await svc.stream_archived_solutions(homework_id))
+        items = await svc.get_archived_solutions(homework_id, _cursor(after), limit)
+    except KeyError:
+        raise HTTPException(404, "Homework is not archived")
+    return _page(items, limit, response, SolutionList)
 
 @router.get("/progress/student/{student_id}", response_model=HomeworkProgress)
-def get_student_progress(
+@query_budget(1)
+async def get_student_progress(
     student_id: UUID,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.get_student_progress(student_id)
+        return await svc.get_student_progress(student_id)
     except ValueError as e:
         raise HTTPException(404, str(e))
 
 @router.post("/progress/update/{student_id}", response_model=HomeworkProgress)
-def update_progress(
+@query_budget(1)
+async def update_progress(
     student_id: UUID,
     svc: HomeworkService = Depends(),
 ):
     try:
-        return svc.update_progress(student_id)
+        return await svc.update_progress(student_id)
     except KeyError:
         raise HTTPException(404, "Progress not found")
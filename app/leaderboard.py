@@ -0,0 +1,84 @@
+# app/leaderboard.py
+"""Рейтинг студентов курса по средней оценке.
+
+Для каждого запрошенного курса в памяти процесса держится упорядоченный
+список (SortedList) пар (-average_grade, student_id): top-k - срез за O(log n + k),
+место студента - бинарный поиск за O(log n). Курс загружается одним запросом
+по индексу (course_id, average_grade) при первом обращении и перечитывается
+через LEADERBOARD_TTL секунд (app.reloading). Записи этого процесса
+применяются сразу после commit (HomeworkService передаёт строки, которые
+вернул UPDATE прогресса).
+
+Места - «спортивные»: у равных средних одно место, следующее пропускается.
+"""
+
+from typing import Awaitable, Callable, Iterable
+from uuid import UUID
+
+from sortedcontainers import SortedList
+
+from app.models.homework import LeaderboardEntry
+from app.reloading import ReloadingStore
+from app.settings import settings
+
+# (student_id, course_id, average_grade); None - у студента нет оценённых решений
+ProgressRow = tuple[UUID, UUID, float | None]
+
+
+class CourseBoard:
+    def __init__(self, averages: Iterable[tuple[UUID, float]]) -> None:
+        self.averages: dict[UUID, float] = dict(averages)
+        self.order = SortedList((-average, student_id) for student_id, average in self.averages.items())
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def set(self, student_id: UUID, average: float | None) -> None:
+        old = self.averages.pop(student_id, None)
+        if old is not None:
+            self.order.remove((-old, student_id))
+        if average is not None:
+            self.averages[student_id] = average
+            self.order.add((-average, student_id))
+
+    def _rank(self, average: float) -> int:
+        # (-average,) меньше любой пары (-average, id): слева только строго лучшие
+        return self.order.bisect_left((-average,)) + 1
+
+    def top(self, k: int) -> list[LeaderboardEntry]:
+        return [
+            LeaderboardEntry(student_id=student_id, average_grade=-neg, rank=self._rank(-neg))
+            for neg, student_id in self.order.islice(0, k)
+        ]
+
+    def rank(self, student_id: UUID) -> LeaderboardEntry | None:
+        average = self.averages.get(student_id)
+        if average is None:
+            return None
+        return LeaderboardEntry(student_id=student_id, average_grade=average, rank=self._rank(average))
+
+
+class Leaderboard(ReloadingStore[UUID, CourseBoard]):
+    def __init__(self, ttl: float, max_courses: int) -> None:
+        super().__init__(ttl, max_courses)
+
+    def _build(self, rows: list[tuple[UUID, float]]) -> CourseBoard:
+        return CourseBoard(rows)
+
+    def _apply(self, board: CourseBoard, change: tuple[UUID, float | None]) -> None:
+        board.set(*change)
+
+    async def board(
+        self,
+        course_id: UUID,
+        load: Callable[[], Awaitable[list[tuple[UUID, float]]]],
+    ) -> CourseBoard:
+        return await self.get(course_id, load)
+
+    def update(self, rows: Iterable[ProgressRow]) -> None:
+        """Новые средние после commit"""
+        for student_id, course_id, average in rows:
+            self.apply(course_id, (student_id, average))
+
+
+leaderboard = Leaderboard(settings.leaderboard_ttl, settings.leaderboard_max_courses)
@@ -0,0 +1,106 @@
+# app/logging_config.py
+"""Логирование приложения и медленных SQL-запросов.
+
+Записи в обработчики уходят через QueueHandler: поток запроса только кладёт
+запись в очередь, форматирование и запись в stderr делает поток
+QueueListener'а. Через ту же очередь пропускаются и обработчики uvicorn.
+SQL целиком (SQL_ECHO) по умолчанию выключен; вместо него логируются
+запросы дольше SLOW_QUERY_MS, с выборкой SLOW_QUERY_SAMPLE_RATE.
+"""
+
+import copy
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from sqlalchemy import event
+
+from app.settings import settings
+
+FORMAT = "%(asctime)s %(levelname)-7s [%(name)s] %(message)s"
+# сколько символов запроса и параметров попадает в лог медленного запроса
+MAX_LOGGED = 1000
+
+slow_logger = logging.getLogger("app.slow_query")
+
+_queued: list[tuple[logging.Logger, QueueHandler, QueueListener]] = []
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler без форматирования в потоке запроса.
+
+    Штатный prepare склеивает msg с args и обнуляет args, а AccessFormatter
+    uvicorn собирает строку доступа из record.args. Очередь не покидает
+    процесс, так что запись уходит копией как есть, форматирует её listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+def _to_queue(logger: logging.Logger) -> None:
+    """Перевесить обработчики логгера за очередь"""
+    handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    queue_handler = _QueueHandler(records)
+    logger.addHandler(queue_handler)
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _queued.append((logger, queue_handler, listener))
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(FORMAT))
+        root.addHandler(handler)
+    root.setLevel(settings.log_level)
+    # без echo=True у engine'а SQLAlchemy не вешает свой синхронный обработчик,
+    # записи идут в корневой логгер и дальше через очередь
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if settings.sql_echo else logging.WARNING)
+
+    for name in ("", "uvicorn", "uvicorn.error", "uvicorn.access"):
+        _to_queue(logging.getLogger(name))
+
+
+def stop_logging() -> None:
+    """Дописать очередь и вернуть обработчики на место: uvicorn логирует и после shutdown"""
+    while _queued:
+        logger, queue_handler, listener = _queued.pop()
+        logger.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+        listener.stop()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._slow_query_started) * 1000
+    if elapsed_ms < settings.slow_query_ms or random.random() >= settings.slow_query_sample_rate:
+        return
+    # у executemany в лог идёт только первый набор параметров
+    slow_logger.warning(
+        "slow query %.1fms%s: %s params=%.*s",
+        elapsed_ms,
+        f" (executemany x{len(parameters)})" if executemany else "",
+        " ".join(statement.split())[:MAX_LOGGED],
+        MAX_LOGGED,
+        repr(parameters[0] if executemany and parameters else parameters),
+    )
+
+
+def log_slow_queries(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "after_cursor_execute", _after_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_execute)
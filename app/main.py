@@ -1,15 +1,46 @@
 import asyncio
 from fastapi import FastAPI
 from app.endpoints.homework_router import router as homework_router
-from app import rabbitmq
-from app.database import init_db
+from app import outbox, rabbitmq, replica
+from app.database import init_db, async_engine, replica_engine
+from app.metrics import MetricsMiddleware, metrics
+from app import query_counter
+from app.logging_config import setup_logging, stop_logging
+from app.settings import settings
 
 app = FastAPI(title="Homework Service")
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics, include_in_schema=False)
+
+if settings.query_budgets:
+    query_counter.install(async_engine)
+    if replica_engine is not None:
+        query_counter.install(replica_engine)
+    app.add_middleware(query_counter.QueryBudgetMiddleware)
+
+if replica_engine is not None:
+    app.add_middleware(replica.ReadRoutingMiddleware)
+
 @app.on_event("startup")
 async def startup():
+    setup_logging()
     init_db()
     
-    asyncio.create_task(rabbitmq.consume())
+    app.state.consumer = asyncio.create_task(rabbitmq.consume())
+    app.state.outbox_relay = asyncio.create_task(outbox.run_relay())
+    if replica_engine is not None:
+        app.state.replica_monitor = asyncio.create_task(replica.monitor.run(replica_engine))
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.consumer.cancel()
+    app.state.outbox_relay.cancel()
+    if replica_engine is not None:
+        app.state.replica_monitor.cancel()
+        await replica_engine.dispose()
+    await async_engine.dispose()
+    stop_logging()
 
 app.include_router(homework_router, prefix="/api")
\ No newline at end of file
@@ -0,0 +1,220 @@
+# app/metrics.py
+"""Метрики сервиса в формате Prometheus (GET /metrics).
+
+На горячем пути только то, что дёшево: ASGI-middleware меряет латентность
+запроса, события engine - время и число SQL-запросов, пул - ожидание
+соединения. Размеры пула, счётчики consumer'а и кэша читаются из уже
+существующих объектов в момент scrape.
+"""
+
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 20, 50, 100)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request",
+    "Число SQL-запросов за один HTTP-запрос",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "db_time_per_request_seconds",
+    "Суммарное время SQL-запросов за один HTTP-запрос",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения одного SQL-запроса",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Ожидание соединения из пула",
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# labels() на каждый запрос заметно дороже самого observe: дочерние серии кэшируются
+_series: dict[tuple[str, str, int], tuple] = {}
+
+
+def _request_series(method: str, path: str, status: int) -> tuple:
+    key = (method, path, status)
+    series = _series.get(key)
+    if series is None:
+        series = _series[key] = (
+            HTTP_LATENCY.labels(method, path, status),
+            REQUEST_QUERIES.labels(path),
+            REQUEST_DB_TIME.labels(path),
+        )
+    return series
+
+
+# Счётчики текущего запроса; события engine видят их через контекст задачи
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class MetricsMiddleware:
+    """Чистое ASGI-middleware: без BaseHTTPMiddleware и лишней задачи на запрос"""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            # шаблон пути, а не сам путь: иначе каждый id стал бы отдельной серией
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            latency, queries, db_time = _request_series(scope["method"], path, status)
+            latency.observe(elapsed)
+            queries.observe(stats.queries)
+            db_time.observe(stats.db_seconds)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который меряет, сколько запрос ждал свободное соединение"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+
+class _StatsCollector:
+    """Значения, которые и так считаются в других модулях: пул, consumer, кэш"""
+
+    def __init__(self, engine) -> None:
+        # engine, а не сам пул: dispose() заменяет пул новым
+        self.engine = engine
+
+    def describe(self):
+        # иначе registry вызовет collect() прямо при регистрации, когда модули ещё не загружены
+        return []
+
+    def collect(self):
+        # импорт здесь: rabbitmq через unit_of_work зависит от database, а database - от этого модуля
+        from app import cache, outbox, rabbitmq, replica
+
+        pool = self.engine.pool
+        for name, doc, value in (
+            ("db_pool_size", "Размер пула соединений", pool.size()),
+            ("db_pool_checked_out", "Соединения, выданные из пула", pool.checkedout()),
+            ("db_pool_overflow", "Соединения сверх pool_size", max(0, pool.overflow())),
+        ):
+            yield GaugeMetricFamily(name, doc, value=value)
+
+        consumer = rabbitmq.stats.snapshot()
+        messages = CounterMetricFamily(
+            "payment_messages", "Сообщения payment_success по исходу", labels=["outcome"]
+        )
+        for outcome in ("received", "acked", "requeued", "retried", "dead_lettered", "duplicates"):
+            messages.add_metric([outcome], consumer[outcome])
+        yield messages
+        yield CounterMetricFamily(
+            "payment_dedup_memory_hits", "Дубли, отсечённые кэшем в памяти без запроса к БД",
+            value=consumer["dedup_memory_hits"],
+        )
+        yield CounterMetricFamily(
+            "payment_dedup_batch_hits", "Дубли внутри одной пачки сообщений",
+            value=consumer["dedup_batch_hits"],
+        )
+        yield CounterMetricFamily("payment_batches", "Обработанные пачки платежей", value=consumer["batches"])
+        yield GaugeMetricFamily("payment_lag_seconds", "Задержка последнего сообщения", value=consumer["last_lag"])
+        yield GaugeMetricFamily("payment_queue_backlog", "Сообщений в очереди при последнем замере", value=consumer["backlog"])
+        yield GaugeMetricFamily("payment_workers_utilization", "Доля времени, занятого обработчиками", value=consumer["utilization"])
+
+        relay = outbox.stats.snapshot()
+        yield CounterMetricFamily("outbox_published", "События, опубликованные из outbox", value=relay["published"])
+        yield CounterMetricFamily("outbox_batches", "Опубликованные пачки outbox", value=relay["batches"])
+        yield CounterMetricFamily("outbox_failed_batches", "Пачки outbox, не подтверждённые брокером", value=relay["failed_batches"])
+        yield GaugeMetricFamily("outbox_lag_seconds", "Возраст самого старого события последней пачки", value=relay["last_lag"])
+
+        hits = CounterMetricFamily("cache_hits", "Попадания в кэш", labels=["kind"])
+        misses = CounterMetricFamily("cache_misses", "Промахи кэша", labels=["kind"])
+        for kind in cache.stats.hits.keys() | cache.stats.misses.keys():
+            hits.add_metric([kind], cache.stats.hits[kind])
+            misses.add_metric([kind], cache.stats.misses[kind])
+        yield hits
+        yield misses
+
+        routing = replica.stats.snapshot()
+        reads = CounterMetricFamily(
+            "db_reads", "SELECT'ы по тому, куда их направил роутинг реплики, и почему", labels=["target", "reason"]
+        )
+        for (target, reason), n in routing["reads"].items():
+            reads.add_metric([target, reason], n)
+        yield reads
+        if routing["lag"] is not None:
+            yield GaugeMetricFamily("db_replica_lag_seconds", "Отставание реплики при последнем замере", value=routing["lag"])
+        yield CounterMetricFamily("db_replica_lag_check_failures", "Неудачные замеры отставания реплики", value=routing["failures"])
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    QUERY_LATENCY.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine, replica=None) -> None:
+    """Время и число SQL-запросов (в целом и на текущий HTTP-запрос), метрики пула primary"""
+    for e in (engine, replica):
+        if e is not None:
+            event.listen(e.sync_engine, "before_cursor_execute", _before_execute)
+            event.listen(e.sync_engine, "after_cursor_execute", _after_execute)
+    REGISTRY.register(_StatsCollector(engine.sync_engine))
+
+
+async def metrics(request: Request) -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
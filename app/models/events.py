@@ -0,0 +1,10 @@
+# app/models/events.py
+import enum
+
+class EventType(str, enum.Enum):
+    """Доменные события, которые уходят в RabbitMQ через outbox; значение - routing key"""
+    HOMEWORK_PUBLISHED = "homework.published"
+    HOMEWORKS_ACTIVATED = "course.homeworks_activated"
+    HOMEWORK_CLOSED = "homework.closed"
+    SOLUTION_GRADED = "solution.graded"
+    SOLUTION_RETURNED = "solution.returned"
@@ -30,3 +30,20 @@ class HomeworkProgress(BaseModel):
     total_homeworks: int
     completed_homeworks: int
     average_grade: float | None = None
+
+class HomeworkStats(BaseModel):
+    """Статистика решений по ДЗ; histogram - число GRADED-решений по оценкам"""
+    model_config = ConfigDict(from_attributes=True)
+
+    homework_id: UUID
+    submitted_count: int = 0
+    graded_count: int = 0
+    returned_count: int = 0
+    average_grade: float | None = None
+    histogram: dict[int, int] = {}
+
+class LeaderboardEntry(BaseModel):
+    """Место студента в рейтинге курса по средней оценке"""
+    student_id: UUID
+    average_grade: float
+    rank: int
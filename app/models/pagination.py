@@ -0,0 +1,44 @@
+# hw_service/app/models/pagination.py
+from typing import NamedTuple
+from uuid import UUID
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Сколько строк за раз тянуть из серверного курсора в потоковом режиме
+STREAM_BATCH_SIZE = 500
+
+class Cursor(NamedTuple):
+    """Позиция keyset-пагинации: последняя отданная пара (created_at, id)"""
+    created_at: datetime
+    id: UUID
+
+    @classmethod
+    def parse(cls, raw: str) -> "Cursor":
+        created_at, sep, id = raw.rpartition(",")
+        if not sep:
+            raise ValueError("Cursor must look like '<created_at>,<id>'")
+        created_at = datetime.fromisoformat(created_at)
+        # created_at в БД - наивное UTC; курсор с поясом asyncpg отверг бы уже в запросе
+        if created_at.tzinfo is not None:
+            raise ValueError("Cursor created_at must not have a timezone")
+        return cls(created_at, UUID(id))
+
+    def __str__(self) -> str:
+        return f"{self.created_at.isoformat()},{self.id}"
+
+class SearchCursor(NamedTuple):
+    """Позиция в выдаче поиска: rank и id последнего отданного результата"""
+    rank: float
+    id: UUID
+
+    @classmethod
+    def parse(cls, raw: str) -> "SearchCursor":
+        rank, sep, id = raw.partition(",")
+        if not sep:
+            raise ValueError("Cursor must look like '<rank>,<id>'")
+        return cls(float(rank), UUID(id))
+
+    def __str__(self) -> str:
+        return f"{self.rank!r},{self.id}"
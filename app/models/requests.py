@@ -2,6 +2,9 @@
 from uuid import UUID
 from pydantic import BaseModel
 
+# Больше ДЗ за один bulk-запрос не принимаем: вся пачка - одна транзакция
+MAX_BULK_SIZE = 5000
+
 class CreateHomeworkRequest(BaseModel):
     course_id: UUID
     title: str
@@ -11,6 +14,10 @@ class PublishHomeworkRequest(BaseModel):
     """Опубликовать ДЗ (сделать активным для студентов)"""
     homework_id: UUID
 
+class CloseHomeworkRequest(BaseModel):
+    """Закрыть ДЗ: новые решения больше не принимаются, старые можно архивировать"""
+    homework_id: UUID
+
 class SubmitSolutionRequest(BaseModel):
     """Отправить решение на проверку"""
     homework_id: UUID
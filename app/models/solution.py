@@ -22,3 +22,21 @@ class Solution(BaseModel):
     submitted_at: datetime | None = None
     grade: int | None = None
     feedback: str | None = None
+
+class GradeResult(BaseModel):
+    """Итог по одному решению из bulk-оценки: либо solution, либо error"""
+    solution_id: UUID
+    ok: bool
+    solution: Solution | None = None
+    error: str | None = None
+
+class SimilarSolutions(BaseModel):
+    """Пара похожих решений ДЗ разных студентов; similar_solution - отправленное позже.
+
+    similarity - оценка сходства Жаккара по MinHash-подписям ответов (0..1)
+    """
+    solution_id: UUID
+    student_id: UUID
+    similar_solution_id: UUID
+    similar_student_id: UUID
+    similarity: float
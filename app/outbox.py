@@ -0,0 +1,126 @@
+# app/outbox.py
+"""Relay transactional outbox -> RabbitMQ.
+
+События пишутся в таблицу outbox в транзакции изменения (HomeworkService._emit),
+так что HTTP-запрос не ждёт брокер. Relay в фоне забирает пачку старых событий
+(DELETE ... RETURNING под SKIP LOCKED), публикует её в topic exchange с
+publisher confirms и только после подтверждения всех сообщений коммитит
+удаление. Если брокер не подтвердил пачку, транзакция откатывается и события
+уйдут в следующий раз: доставка at-least-once, message_id = id события.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from aio_pika import DeliveryMode, ExchangeType, Message, connect_robust
+
+from app.settings import settings
+from app.unit_of_work import open_uow
+
+logger = logging.getLogger(__name__)
+
+
+class RelayStats:
+    """Счётчики relay'я: пропускная способность и задержка от записи до публикации"""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.published = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.busy_seconds = 0.0
+        self.last_lag = 0.0
+
+    def snapshot(self) -> dict:
+        uptime = time.monotonic() - self.started
+        return {
+            "published": self.published,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "throughput": self.published / uptime if uptime else 0.0,
+            "busy_throughput": self.published / self.busy_seconds if self.busy_seconds else 0.0,
+            "last_lag": self.last_lag,
+        }
+
+
+stats = RelayStats()
+
+
+def _message(event) -> Message:
+    return Message(
+        json.dumps(
+            {
+                "id": event.id,
+                "type": event.event_type,
+                "aggregate_id": str(event.aggregate_id),
+                "created_at": event.created_at.isoformat(),
+                "payload": event.payload,
+            }
+        ).encode(),
+        content_type="application/json",
+        message_id=str(event.id),
+        type=event.event_type,
+        timestamp=event.created_at,
+        delivery_mode=DeliveryMode.PERSISTENT,
+    )
+
+
+async def relay_batch(exchange, limit: int | None = None) -> int:
+    """Опубликовать одну пачку событий; возвращает её размер"""
+    limit = limit or settings.outbox_batch_size
+    started = time.monotonic()
+    async with open_uow() as uow:
+        async with uow:
+            events = await uow.outbox.claim(limit)
+            if not events:
+                return 0
+            # публикации идут параллельно, каждая ждёт свой confirm;
+            # исключение откатывает DELETE и события остаются в outbox
+            await asyncio.gather(
+                *(exchange.publish(_message(event), routing_key=event.event_type, mandatory=False) for event in events)
+            )
+    stats.published += len(events)
+    stats.batches += 1
+    stats.busy_seconds += time.monotonic() - started
+    stats.last_lag = max(0.0, (datetime.utcnow() - events[0].created_at).total_seconds())
+    return len(events)
+
+
+async def _relay(exchange) -> None:
+    while True:
+        try:
+            published = await relay_batch(exchange)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats.failed_batches += 1
+            logger.error(f"Outbox relay batch failed: {e}")
+            published = 0
+            # канал мог закрыться: пусть connect_robust переподключится
+            await asyncio.sleep(settings.outbox_poll_interval)
+        # полная пачка - в outbox, скорее всего, есть ещё; иначе ждём новых событий
+        if published < settings.outbox_batch_size:
+            await asyncio.sleep(settings.outbox_poll_interval)
+
+
+async def run_relay() -> None:
+    """Подключиться к RabbitMQ (с повторами) и публиковать события из outbox"""
+    retry_delay = 5
+    while True:
+        try:
+            connection = await connect_robust(settings.amqp_url, timeout=10)
+            async with connection:
+                channel = await connection.channel(publisher_confirms=True)
+                exchange = await channel.declare_exchange(
+                    settings.outbox_exchange, ExchangeType.TOPIC, durable=True
+                )
+                logger.info("Outbox relay connected to RabbitMQ")
+                await _relay(exchange)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Outbox relay connection error: {e}, retrying in {retry_delay} seconds")
+            await asyncio.sleep(retry_delay)
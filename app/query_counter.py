@@ -0,0 +1,108 @@
+# app/query_counter.py
+"""Счётчик SQL-запросов: бюджеты эндпоинтов и поиск N+1.
+
+В тестах - контекстный менеджер count_queries(). В dev-режиме
+(QUERY_BUDGETS=1) QueryBudgetMiddleware добавляет к каждому ответу
+X-Query-Count, X-Query-Budget (из @query_budget на эндпоинте) и
+X-Query-Repeated, если один и тот же запрос выполнился несколько раз.
+"""
+
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLog:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self) -> dict[str, int]:
+        """Одинаковые запросы, выполненные больше одного раза - кандидаты в N+1"""
+        return {sql: n for sql, n in Counter(self.statements).items() if n > 1}
+
+    def check(self, budget: int) -> None:
+        problems = []
+        if self.count > budget:
+            problems.append(f"{self.count} queries, budget is {budget}")
+        for sql, n in self.repeated().items():
+            problems.append(f"N+1 candidate, executed {n} times: {' '.join(sql.split())}")
+        if problems:
+            listing = "\n".join(f"  {i}. {' '.join(sql.split())}" for i, sql in enumerate(self.statements, 1))
+            raise AssertionError("\n".join(problems) + "\nqueries:\n" + listing)
+
+
+_current: ContextVar[QueryLog | None] = ContextVar("query_log", default=None)
+
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    log = _current.get()
+    if log is not None:
+        log.statements.append(statement)
+
+
+def install(engine) -> None:
+    if not event.contains(engine.sync_engine, "before_cursor_execute", _record):
+        event.listen(engine.sync_engine, "before_cursor_execute", _record)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+
+def query_budget(limit: int) -> Callable:
+    """Сколько SQL-запросов разрешено эндпоинту на один вызов"""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = limit
+        return endpoint
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as log:
+            async def send_with_counts(message) -> None:
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), *self._headers(scope, log)]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_counts)
+
+    @staticmethod
+    def _headers(scope, log: QueryLog) -> list[tuple[bytes, bytes]]:
+        # заголовки уходят вместе с началом ответа: у потоковых ответов
+        # это число запросов на момент первого байта
+        headers = [(b"x-query-count", str(log.count).encode())]
+        route = scope.get("route")
+        budget = getattr(getattr(route, "endpoint", None), "__query_budget__", None)
+        if budget is not None:
+            headers.append((b"x-query-budget", str(budget).encode()))
+            if log.count > budget:
+                logger.warning(f"{route.path}: {log.count} queries, budget is {budget}")
+        repeated = log.repeated()
+        if repeated:
+            headers.append((b"x-query-repeated", str(max(repeated.values())).encode()))
+            logger.warning(f"{scope['path']}: repeated queries (N+1 candidates): {list(repeated)}")
+        return headers
@@ -1,32 +1,310 @@
 import asyncio
 import json
 import logging
+import time
 import traceback
+from datetime import datetime, timedelta, timezone
+from uuid import NAMESPACE_URL, UUID, uuid5
 
-from aio_pika import connect_robust, IncomingMessage
+import asyncpg
+from aio_pika import DeliveryMode, Message, connect_robust, IncomingMessage
+from sqlalchemy import exc as sa_exc
+
+from app.cache import MemoryCache
 from app.settings import settings
+from app.unit_of_work import open_uow
 from app.services.homework_service import HomeworkService
 
 logger = logging.getLogger(__name__)
 
+
+class ConsumerStats:
+    """Счётчики consumer'а: по ним подбираются prefetch и число обработчиков"""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.received = 0
+        self.acked = 0
+        self.requeued = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.duplicates = 0
+        self.dedup_memory_hits = 0
+        self.dedup_batch_hits = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.backlog = 0
+
+    def observe(self, msg: IncomingMessage) -> None:
+        """Сообщение пришло: lag считается от timestamp, выставленного издателем"""
+        self.received += 1
+        if msg.timestamp is None:
+            return
+        sent = msg.timestamp
+        if sent.tzinfo is None:
+            sent = sent.replace(tzinfo=timezone.utc)
+        self.last_lag = max(0.0, (datetime.now(timezone.utc) - sent).total_seconds())
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+    def snapshot(self) -> dict:
+        uptime = time.monotonic() - self.started
+        return {
+            "received": self.received,
+            "acked": self.acked,
+            "requeued": self.requeued,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "duplicates": self.duplicates,
+            "dedup_memory_hits": self.dedup_memory_hits,
+            "dedup_batch_hits": self.dedup_batch_hits,
+            "batches": self.batches,
+            "throughput": self.acked / uptime if uptime else 0.0,
+            "utilization": self.busy_seconds / (uptime * settings.payment_workers) if uptime else 0.0,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "backlog": self.backlog,
+        }
+
+
+stats = ConsumerStats()
+
+# ключи недавно обработанных платежей: повторная доставка отсекается без похода в БД
+seen_payments = MemoryCache(settings.payment_dedup_cache_size, settings.payment_dedup_ttl)
+
+# default exchange канала consumer'а: через него сообщения уходят в очередь повторов
+retry_exchange = None
+
+RETRY_HEADER = "x-retry-count"
+
+# Сбои инфраструктуры, а не платежа: БД недоступна, соединение оборвалось, пул исчерпан
+TRANSIENT_ERRORS = (
+    OSError,
+    TimeoutError,
+    sa_exc.OperationalError,
+    sa_exc.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.AdminShutdownError,
+    asyncpg.TooManyConnectionsError,
+)
+
+
+def dedup_keys(msg: IncomingMessage, data: dict) -> list[UUID]:
+    """Ключи платежа: message_id издателя и пара (course_id, student_id), если она есть"""
+    keys = []
+    if msg.message_id:
+        keys.append(uuid5(NAMESPACE_URL, f"payment-message:{msg.message_id}"))
+    if data.get("student_id"):
+        keys.append(uuid5(NAMESPACE_URL, f"payment:{UUID(data['course_id'])}:{UUID(data['student_id'])}"))
+    return keys
+
+
+def _transient(error: BaseException | None) -> bool:
+    """Ошибка (или её причина - SQLAlchemy оборачивает ошибки asyncpg) - сбой инфраструктуры"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        if isinstance(error, sa_exc.DBAPIError) and error.connection_invalidated:
+            return True
+        error = error.__cause__ or getattr(error, "orig", None) or error.__context__
+    return False
+
+
+async def _retry_later(msg: IncomingMessage) -> None:
+    """Отложенный повтор: копия ждёт в очереди повторов и по TTL возвращается в основную.
+
+    Сообщение в dead-letter не уходит, сколько бы ни длился сбой БД. Если копия
+    опубликована, а ack оригинала не дошёл, дубль отсечёт дедупликация.
+    """
+    attempt = int((msg.headers or {}).get(RETRY_HEADER, 0)) + 1
+    delay = min(settings.payment_retry_delay * 2 ** (attempt - 1), settings.payment_retry_max_delay)
+    if retry_exchange is None:
+        await msg.nack(requeue=True)
+        stats.requeued += 1
+        return
+    await retry_exchange.publish(
+        Message(
+            msg.body,
+            headers={**(msg.headers or {}), RETRY_HEADER: attempt},
+            content_type=msg.content_type,
+            message_id=msg.message_id,
+            timestamp=msg.timestamp,
+            delivery_mode=DeliveryMode.PERSISTENT,
+            expiration=delay,
+        ),
+        routing_key=settings.payment_retry_queue,
+    )
+    await msg.ack()
+    stats.retried += 1
+
+
+async def _fail(msg: IncomingMessage) -> None:
+    """Первый сбой - обратно в очередь, повторный - в dead-letter"""
+    if msg.redelivered:
+        await msg.reject(requeue=False)
+        stats.dead_lettered += 1
+    else:
+        await msg.nack(requeue=True)
+        stats.requeued += 1
+
+
 async def process_payment_success(msg: IncomingMessage):
     """Обработка сообщения о успешном платеже"""
+    await process_payment_batch([msg])
+
+
+async def _seen(keys: list[UUID], batch_keys: set[UUID]) -> str | None:
+    """Где уже встречался платёж: "batch" - в этой же пачке, "memory" - в кэше недавних"""
+    for key in keys:
+        if key in batch_keys:
+            return "batch"
+        if await seen_payments.get(str(key)) is not None:
+            return "memory"
+    return None
+
+
+async def process_payment_batch(msgs: list[IncomingMessage]):
+    """Пачка сообщений о платежах: все новые курсы активируются одним UPDATE.
+
+    Дубли (по ключам из dedup_keys) подтверждаются без активации: сначала
+    проверяется кэш в памяти и сама пачка, затем processed_payments в БД.
+    Если пачка с повторно доставленными сообщениями падает, они пробуются
+    по одному: иначе один «ядовитый» платёж уводил бы в dead-letter всю пачку.
+    При недоступной БД сообщения уходят на отложенный повтор (_retry_later):
+    в dead-letter попадает только то, что падает при живой БД.
+    """
+    valid, payments, batch_keys = [], [], set()
+    for msg in msgs:
+        try:
+            data = json.loads(msg.body.decode())
+            course_id = UUID(data["course_id"])
+            keys = dedup_keys(msg, data)
+        except Exception as e:
+            # повтор не поможет, сразу в dead-letter
+            logger.error(f"Invalid payment message: {e}")
+            await msg.reject(requeue=False)
+            stats.dead_lettered += 1
+            continue
+
+        seen = await _seen(keys, batch_keys)
+        if seen is not None:
+            stats.duplicates += 1
+            if seen == "batch":
+                stats.dedup_batch_hits += 1
+            else:
+                stats.dedup_memory_hits += 1
+            await msg.ack()
+            stats.acked += 1
+            continue
+        batch_keys.update(keys)
+        valid.append(msg)
+        payments.append((course_id, keys))
+
+    if not valid:
+        return
+
     try:
-        data = json.loads(msg.body.decode())
-        course_id = data["course_id"]
-        student_id = data["student_id"]
-        service = HomeworkService()
-        service.activate_homeworks_by_course(course_id)
-        logger.info(f"Activated homeworks for course {course_id}, student {student_id}")
-        await msg.ack()
+        async with open_uow() as uow:
+            activated, duplicate = await HomeworkService(uow).apply_payments(payments)
     except Exception as e:
         logger.error(f"Error processing payment: {e}")
         traceback.print_exc()
+        if _transient(e):
+            for msg in valid:
+                await _retry_later(msg)
+            return
+        if len(valid) > 1 and any(msg.redelivered for msg in valid):
+            for msg in valid:
+                await process_payment_batch([msg])
+            return
+        for msg in valid:
+            await _fail(msg)
+        return
+
+    for key in batch_keys:
+        await seen_payments.set(str(key), True)
+    stats.duplicates += sum(duplicate)
+    logger.info(
+        f"Activated {len(activated)} homeworks from {len(valid) - sum(duplicate)} payment message(s), "
+        f"{sum(duplicate)} duplicate(s) skipped"
+    )
+    for msg in valid:
         await msg.ack()
+    stats.acked += len(valid)
+
+
+async def _purge_processed_payments() -> None:
+    """Держит processed_payments в пределах TTL"""
+    while True:
+        await asyncio.sleep(settings.payment_dedup_cleanup_interval)
+        try:
+            async with open_uow() as uow:
+                purged = await HomeworkService(uow).purge_processed_payments(
+                    datetime.utcnow() - timedelta(seconds=settings.payment_dedup_ttl)
+                )
+            logger.info(f"Purged {purged} processed payment key(s)")
+        except Exception as e:
+            logger.warning(f"Could not purge processed payments: {e}")
+
+
+async def _worker(buffer: asyncio.Queue) -> None:
+    """Забирает из буфера всё, что накопилось (до payment_batch_size), и обрабатывает пачкой"""
+    while True:
+        batch = [await buffer.get()]
+        while len(batch) < settings.payment_batch_size and not buffer.empty():
+            batch.append(buffer.get_nowait())
+        started = time.monotonic()
+        try:
+            await process_payment_batch(batch)
+        except Exception as e:
+            # например, канал закрылся посреди ack: брокер сам вернёт сообщения
+            logger.error(f"Payment worker error: {e}")
+        stats.batches += 1
+        stats.busy_seconds += time.monotonic() - started
+
+
+async def _report(queue) -> None:
+    """Периодически пишет счётчики и глубину очереди в лог"""
+    while True:
+        await asyncio.sleep(settings.consumer_stats_interval)
+        try:
+            declared = await queue.declare()
+            stats.backlog = declared.message_count
+        except Exception as e:
+            logger.warning(f"Could not read queue depth: {e}")
+        logger.info(f"Payment consumer stats: {stats.snapshot()}")
+
+
+async def _declare_queue(channel):
+    """Очередь платежей с dead-letter очередью для сообщений, которые не удалось обработать"""
+    await channel.declare_queue(settings.payment_dead_letter_queue, durable=True)
+    # у очереди повторов нет consumer'ов: истёкшее по TTL сообщение возвращается в основную
+    await channel.declare_queue(
+        settings.payment_retry_queue,
+        durable=True,
+        arguments={
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": settings.payment_queue,
+        },
+    )
+    return await channel.declare_queue(
+        settings.payment_queue,
+        durable=True,
+        arguments={
+            # default exchange маршрутизирует по имени очереди
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": settings.payment_dead_letter_queue,
+        },
+    )
 
 
 async def consume():
     """Подключится к RabbitMQ с retry логикой"""
+    global retry_exchange
     max_retries = 10
     retry_delay = 5
     
@@ -41,19 +319,31 @@ async def consume():
             
             async with connection:
                 channel = await connection.channel()
+                await channel.set_qos(prefetch_count=settings.payment_prefetch)
+                queue = await _declare_queue(channel)
+                retry_exchange = channel.default_exchange
                 logger.info("✅ Successfully connected to RabbitMQ")
+
+                # Callback только кладёт сообщение в буфер; prefetch ограничивает его размер,
+                # а обработчики разбирают его пачками на async-пути к БД
+                buffer: asyncio.Queue = asyncio.Queue()
+
+                async def on_message(msg: IncomingMessage) -> None:
+                    stats.observe(msg)
+                    buffer.put_nowait(msg)
+
+                tasks = [asyncio.create_task(_worker(buffer)) for _ in range(settings.payment_workers)]
+                tasks.append(asyncio.create_task(_report(queue)))
+                tasks.append(asyncio.create_task(_purge_processed_payments()))
+                await queue.consume(on_message)
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    for task in tasks:
+                        task.cancel()
                 
-                # Здесь твой код обработки очередей
-                # Пример:
-                # exchange = await channel.get_exchange('homework_exchange')
-                # queue = await channel.declare_queue('homework_queue')
-                # async with queue.iterator() as queue_iter:
-                #     async for message in queue_iter:
-                #         await process_payment_success(message)
-                
-                # Просто слушаем бесконечно
-                await asyncio.sleep(999999)
-                
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"❌ RabbitMQ connection error: {e}")
             
@@ -73,4 +363,4 @@ def start_rabbitmq_consumer():
         loop.create_task(consume())
         logger.info("Started RabbitMQ consuming for Homework Service")
     except Exception as e:
-        logger.error(f"Failed to start RabbitMQ consumer: {e}")
\ No newline at end of file
+        logger.error(f"Failed to start RabbitMQ consumer: {e}")
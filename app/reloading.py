@@ -0,0 +1,81 @@
+# app/reloading.py
+"""Значения в памяти процесса по ключу, перечитываемые из БД через TTL.
+
+Значение (рейтинг курса, LSH-индекс ДЗ) строится из строк одной загрузки при
+первом обращении и перечитывается через ttl секунд: так ограничено отставание
+от записей других процессов. Пока идёт перечитывание, запросы получают
+прежнее значение, а одновременные первые обращения ждут одну общую загрузку.
+Изменения этого процесса применяются сразу после commit - и к загруженному
+значению, и к идущей загрузке: она могла их не увидеть. В памяти не больше
+max_size ключей, вытесняется давно не запрошенный.
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class ReloadingStore(ABC, Generic[K, V]):
+    """Подкласс задаёт, как строить значение из строк загрузки и применять к нему изменение"""
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        # ключ -> (момент загрузки, значение), от давно запрошенных к недавним
+        self._values: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._loads: dict[K, asyncio.Task] = {}
+        # изменения, пришедшие, пока ключ загружается
+        self._pending: dict[K, list[Any]] = {}
+
+    @abstractmethod
+    def _build(self, rows: Any) -> V: ...
+
+    @abstractmethod
+    def _apply(self, value: V, change: Any) -> None: ...
+
+    async def get(self, key: K, load: Callable[[], Awaitable[Any]]) -> V:
+        """load должен открывать свою сессию: перечитывание может пережить запрос"""
+        loaded, value = self._values.get(key, (None, None))
+        if loaded is None or loaded + self.ttl < time.monotonic():
+            task = self._loads.get(key)
+            if task is None:
+                task = self._loads[key] = asyncio.create_task(self._load(key, load))
+                task.add_done_callback(self._log_failure)
+            if loaded is None:
+                value = await asyncio.shield(task)
+        self._values.move_to_end(key)
+        return value
+
+    async def _load(self, key: K, load) -> V:
+        self._pending[key] = []
+        try:
+            value = self._build(await load())
+            for change in self._pending[key]:
+                self._apply(value, change)
+            self._values[key] = (time.monotonic(), value)
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+            return value
+        finally:
+            self._pending.pop(key, None)
+            self._loads.pop(key, None)
+
+    def _log_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"{type(self).__name__} load failed: {task.exception()}")
+
+    def apply(self, key: K, change: Any) -> None:
+        """Изменение после commit; ключи, которых нет в памяти, прочитаются при обращении"""
+        entry = self._values.get(key)
+        if entry is not None:
+            self._apply(entry[1], change)
+        if key in self._pending:
+            self._pending[key].append(change)
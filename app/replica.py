@@ -0,0 +1,226 @@
+# app/replica.py
+"""Чтение с реплики PostgreSQL (POSTGRES_REPLICA_URL).
+
+Сессии UnitOfWork выбирают engine на каждый запрос (RoutingSession.get_bind):
+на реплику уходит только обычный SELECT внутри GET-запроса, всё остальное -
+в primary. Чтение остаётся на primary, если:
+
+  session  сессия уже писала: чтение своих записей в том же запросе
+  token    клиент недавно писал (X-Read-After или cookie read_after),
+           а реплика ещё не доиграла WAL до этого момента
+  lag      отставание реплики больше REPLICA_MAX_LAG или давно не замерялось
+  primary  не GET-запрос, фоновые задачи, скрипты, заполнение общих кэшей
+           (use_primary): устаревшая строка осталась бы в кэше до TTL
+
+Отставание замеряет ReplicaMonitor раз в REPLICA_LAG_CHECK_INTERVAL секунд;
+решения роутинга считаются в stats и отдаются в /metrics.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Iterator
+
+from sqlalchemy import Engine, Select, text
+from sqlalchemy.orm import Session
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "x-read-after"
+TOKEN_COOKIE = "read_after"
+
+# Отставание в секундах; 0, если реплика применила всё, что получила, и канал
+# репликации жив. Без живого walreceiver replay-lsn замирает, и отставание
+# считается по времени последней применённой транзакции - растёт, пока не откатимся на primary
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class ReadContext:
+    """Чтения текущего GET-запроса; after - момент последней записи клиента (его токен)"""
+    __slots__ = ("after",)
+
+    def __init__(self, after: float | None = None) -> None:
+        self.after = after
+
+
+class WriteContext:
+    """Не-GET запрос: wrote ставит RoutingSession, middleware по нему выдаёт токен"""
+    __slots__ = ("wrote",)
+
+    def __init__(self) -> None:
+        self.wrote = False
+
+
+_request: ContextVar[ReadContext | WriteContext | None] = ContextVar("replica_request", default=None)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Читать из primary внутри блока, даже в GET-запросе"""
+    token = _request.set(None)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+class ReplicaMonitor:
+    def __init__(self, max_lag: float, interval: float) -> None:
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: float | None = None
+        # до какого момента (часы приложения) реплика гарантированно доиграла WAL
+        self.replayed_until = 0.0
+        self.checked_at = -math.inf
+        self.failures = 0
+
+    def usable(self) -> bool:
+        # замер старше трёх интервалов - монитор не работает, верить ему нельзя
+        fresh = time.monotonic() - self.checked_at <= 3 * self.interval
+        return fresh and self.lag is not None and self.lag <= self.max_lag
+
+    async def check(self, engine) -> None:
+        # время до запроса: реплика видит всё, что закоммичено раньше started - lag
+        started = time.time()
+        async with engine.connect() as conn:
+            lag = (await conn.execute(LAG_QUERY)).scalar()
+        self.lag = None if lag is None else max(0.0, float(lag))
+        if self.lag is not None:
+            self.replayed_until = max(self.replayed_until, started - self.lag)
+        self.checked_at = time.monotonic()
+
+    async def run(self, engine) -> None:
+        while True:
+            try:
+                await self.check(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.lag = None
+                self.failures += 1
+                logger.warning(f"Replica lag check failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+class RoutingStats:
+    def __init__(self) -> None:
+        # (target, reason) -> число SELECT'ов
+        self.reads: Counter[tuple[str, str]] = Counter()
+
+    def snapshot(self) -> dict:
+        return {"reads": dict(self.reads), "lag": monitor.lag, "failures": monitor.failures}
+
+
+monitor = ReplicaMonitor(settings.replica_max_lag, settings.replica_lag_check_interval)
+stats = RoutingStats()
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """Session с двумя engine: primary и replica; выбор - на каждый запрос к БД.
+
+    Engine задаются в подклассе (app.database), сессия создаётся через
+    async_sessionmaker(sync_session_class=...).
+    """
+
+    primary: Engine
+    replica: Engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self._flushing and _is_read(clause):
+            reason = self._read_reason()
+            stats.reads["replica" if reason == "replica" else "primary", reason] += 1
+            return self.replica if reason == "replica" else self.primary
+        if self._flushing or clause is not None:
+            # INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE, text(): дальше сессия читает из primary
+            self.info["wrote"] = True
+            ctx = _request.get()
+            if isinstance(ctx, WriteContext):
+                ctx.wrote = True
+        return self.primary
+
+    def _read_reason(self) -> str:
+        ctx = _request.get()
+        if not isinstance(ctx, ReadContext):
+            return "primary"
+        if self.info.get("wrote"):
+            return "session"
+        if not monitor.usable():
+            return "lag"
+        if ctx.after is not None and ctx.after > monitor.replayed_until:
+            return "token"
+        return "replica"
+
+
+def _token(scope) -> float | None:
+    raw = None
+    for name, value in scope["headers"]:
+        if name == TOKEN_HEADER.encode():
+            raw = value.decode("latin-1")
+            break
+        if name == b"cookie" and raw is None:
+            morsel = SimpleCookie(value.decode("latin-1")).get(TOKEN_COOKIE)
+            if morsel is not None:
+                raw = morsel.value
+    try:
+        return None if raw is None else float(raw)
+    except ValueError:
+        return None
+
+
+class ReadRoutingMiddleware:
+    """GET-запросам - контекст чтения с токеном клиента; ответам на записи - новый токен.
+
+    Токен - время ответа (после commit) по часам приложения: чтение с ним идёт
+    на реплику, только когда та доиграла WAL дальше этого момента.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] in ("GET", "HEAD"):
+            token = _request.set(ReadContext(_token(scope)))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _request.reset(token)
+            return
+
+        ctx = WriteContext()
+
+        async def send_with_token(message) -> None:
+            if message["type"] == "http.response.start" and ctx.wrote:
+                value = repr(time.time())
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (TOKEN_HEADER.encode(), value.encode()),
+                    (b"set-cookie", f"{TOKEN_COOKIE}={value}; Path=/; HttpOnly; SameSite=Lax".encode()),
+                ]
+            await send(message)
+
+        token = _request.set(ctx)
+        try:
+            await self.app(scope, receive, send_with_token)
+        finally:
+            _request.reset(token)
@@ -0,0 +1,102 @@
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Integer, column, exists, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.homework import HomeworkStatus
+from app.models.solution import Solution
+from app.repos.progress_repo import graded_contribution
+from app.schemas.homework import Homework as DBHomework
+from app.schemas.homework_archive import ArchivedProgress, HomeworkArchive
+
+class ArchiveRepo:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def get(self, homework_id: UUID) -> HomeworkArchive | None:
+        result = await self.db.execute(
+            select(HomeworkArchive).where(HomeworkArchive.homework_id == homework_id)
+        )
+        return result.scalars().first()
+
+    async def lock(self, homework_id: UUID) -> HomeworkArchive:
+        """Строка архива под блокировкой; создаётся при первой архивации ДЗ.
+
+        Блокировка держится до конца транзакции части: два процесса не пишут
+        одну и ту же часть одновременно.
+        """
+        await self.db.execute(
+            insert(HomeworkArchive)
+            .values(homework_id=homework_id, started_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[HomeworkArchive.homework_id])
+        )
+        result = await self.db.execute(
+            select(HomeworkArchive)
+            .where(HomeworkArchive.homework_id == homework_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().one()
+
+    async def checkpoint(self, homework_id: UUID, parts: int, solutions: int) -> None:
+        """Часть parts-1 записана, её solutions решений удалены из solutions"""
+        await self.db.execute(
+            update(HomeworkArchive)
+            .where(HomeworkArchive.homework_id == homework_id)
+            .values(parts=parts, solutions=HomeworkArchive.solutions + solutions)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def finish(self, homework_id: UUID) -> None:
+        await self.db.execute(
+            update(HomeworkArchive)
+            .where(HomeworkArchive.homework_id == homework_id)
+            .values(finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def add_progress(self, solutions: list[Solution]) -> None:
+        """Запомнить вклад удаляемых решений в прогресс студентов одним upsert"""
+        totals: dict[UUID, list[int]] = defaultdict(lambda: [0, 0, 0])
+        for s in solutions:
+            completed, grade_sum = graded_contribution(s.status, s.grade)
+            row = totals[s.student_id]
+            row[0] += 1
+            row[1] += completed
+            row[2] += grade_sum
+        if not totals:
+            return
+        d = values(
+            column("student_id", PG_UUID(as_uuid=True)),
+            column("total_homeworks", Integer),
+            column("completed_homeworks", Integer),
+            column("grade_sum", BigInteger),
+            name="archived",
+        ).data([(student_id, *row) for student_id, row in totals.items()])
+        stmt = insert(ArchivedProgress).from_select(
+            ["student_id", "total_homeworks", "completed_homeworks", "grade_sum"], select(d)
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ArchivedProgress.student_id],
+                set_={
+                    name: getattr(ArchivedProgress, name) + getattr(stmt.excluded, name)
+                    for name in ("total_homeworks", "completed_homeworks", "grade_sum")
+                },
+            )
+        )
+
+    async def pending_homeworks(self) -> list[UUID]:
+        """Закрытые ДЗ, архивация которых не начата или не закончена"""
+        finished = exists().where(
+            HomeworkArchive.homework_id == DBHomework.id, HomeworkArchive.finished_at.is_not(None)
+        )
+        result = await self.db.execute(
+            select(DBHomework.id)
+            .where(DBHomework.status == HomeworkStatus.CLOSED, ~finished)
+            .order_by(DBHomework.created_at, DBHomework.id)
+        )
+        return list(result.scalars())
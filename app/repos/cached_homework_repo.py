@@ -0,0 +1,142 @@
+import logging
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from app.cache import CacheBackend, stats
+from app.models.homework import Homework, HomeworkStatus
+from app.models.pagination import Cursor, DEFAULT_PAGE_SIZE
+from app.replica import use_primary
+from app.repos.homework_repo import HomeworkRepo
+
+logger = logging.getLogger(__name__)
+
+class CachedHomeworkRepo(HomeworkRepo):
+    """HomeworkRepo с read-through кэшем для get_homework_by_id и get_homeworks_by_course.
+
+    Инвалидация откладывается до commit: иначе параллельный запрос успел бы
+    закэшировать строку, которая ещё не закоммичена или будет откатана.
+    После первой записи в транзакции чтения идут мимо кэша. Чтение, начатое
+    до инвалидации, не кладёт в кэш то, что прочитало: поколение ключа
+    (hw_gen:{id}) сверяется до и после загрузки.
+    """
+
+    def __init__(
+        self,
+        db,
+        cache: CacheBackend,
+        after_commit: Callable[[Callable[[], Awaitable[None]]], None],
+    ) -> None:
+        super().__init__(db)
+        self.cache = cache
+        self.after_commit = after_commit
+        self._wrote = False
+
+    async def _cached(
+        self,
+        kind: str,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        generation_key: str | None = None,
+    ) -> Any:
+        if self._wrote:
+            return await load()
+        try:
+            value = await self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Cache get failed: {e}")
+            return await load()
+        if value is not None:
+            stats.hits[kind] += 1
+            return value
+        stats.misses[kind] += 1
+        try:
+            generation = generation_key and await self.cache.generation(generation_key)
+        except Exception as e:
+            logger.warning(f"Cache get failed: {e}")
+            return await load()
+        # с отстающей реплики устаревшая строка пережила бы инвалидацию до TTL
+        with use_primary():
+            value = await load()
+        try:
+            # запись закоммитилась, пока шло чтение: прочитанное могло устареть
+            if generation_key is None or await self.cache.generation(generation_key) == generation:
+                await self.cache.set(key, value)
+        except Exception as e:
+            logger.warning(f"Cache set failed: {e}")
+        return value
+
+    async def get_homework_by_id(self, id: UUID) -> Homework:
+        return await self._cached(
+            "homework",
+            f"hw:{id}",
+            lambda: super(CachedHomeworkRepo, self).get_homework_by_id(id),
+            f"hw_gen:{id}",
+        )
+
+    async def get_homeworks_by_course(
+        self,
+        course_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Homework]:
+        load = lambda: super(CachedHomeworkRepo, self).get_homeworks_by_course(course_id, after, limit)
+        if self._wrote:
+            return await load()
+        try:
+            generation = await self.cache.generation(f"course_gen:{course_id}")
+        except Exception as e:
+            logger.warning(f"Cache get failed: {e}")
+            return await load()
+        key = f"course:{course_id}:{generation}:{after or ''}:{limit}"
+        return await self._cached("course", key, load)
+
+    def _invalidate(self, homeworks: list[Homework], course_ids=()) -> None:
+        self._wrote = True
+        keys = [f"hw:{h.id}" for h in homeworks]
+        generations = [f"course_gen:{c}" for c in {*course_ids, *(h.course_id for h in homeworks)}]
+        generations += [f"hw_gen:{h.id}" for h in homeworks]
+
+        async def invalidate() -> None:
+            try:
+                # сначала bump: чтение, сверившее поколение до него, уже не положит строку после delete
+                await self.cache.bump(*generations)
+                await self.cache.delete(*keys)
+                stats.invalidations += 1
+            except Exception as e:
+                # запись уже закоммичена; устаревшие ключи доживут до TTL
+                logger.warning(f"Cache invalidation failed: {e}")
+
+        self.after_commit(invalidate)
+
+    async def create_homework(self, homework: Homework) -> Homework:
+        hw = await super().create_homework(homework)
+        # новых id в кэше нет, достаточно сбросить списки курса
+        self._invalidate([], [hw.course_id])
+        return hw
+
+    async def create_homeworks(self, homeworks: list[Homework]) -> list[Homework]:
+        created = await super().create_homeworks(homeworks)
+        self._invalidate([], {h.course_id for h in created})
+        return created
+
+    async def set_status(self, id: UUID, status: HomeworkStatus) -> Homework:
+        hw = await super().set_status(id, status)
+        self._invalidate([hw])
+        return hw
+
+    async def publish_homework(self, id: UUID) -> Homework | None:
+        hw = await super().publish_homework(id)
+        if hw is not None:
+            self._invalidate([hw])
+        return hw
+
+    async def close_homework(self, id: UUID) -> Homework | None:
+        hw = await super().close_homework(id)
+        if hw is not None:
+            self._invalidate([hw])
+        return hw
+
+    async def activate_by_courses(self, course_ids: list[UUID]) -> list[Homework]:
+        activated = await super().activate_by_courses(course_ids)
+        self._invalidate(activated, course_ids)
+        return activated
@@ -1,38 +1,73 @@
 # hw_service/app/repositories/homework_repo.py
+from typing import AsyncIterator
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
 from app.models.homework import Homework, HomeworkStatus
+from app.models.pagination import Cursor, DEFAULT_PAGE_SIZE, SearchCursor
+from app.repos.pagination import keyset_page, keyset_stream
+from app.repos.search import homework_vector, search_page
 from app.schemas.homework import Homework as DBHomework
 
 class HomeworkRepo:
-    def __init__(self) -> None:
-        self.db: Session = next(get_db())
-
-    def get_homeworks(self) -> list[Homework]:
-        return [Homework.model_validate(h) for h in self.db.query(DBHomework).all()]
-
-    def get_homeworks_by_course(self, course_id: UUID) -> list[Homework]:
-        return [
-            Homework.model_validate(h)
-            for h in self.db.query(DBHomework)
-            .filter(DBHomework.course_id == course_id)
-            .all()
-        ]
-
-    def get_homework_by_id(self, id: UUID) -> Homework:
-        h = (
-            self.db.query(DBHomework)
-            .filter(DBHomework.id == id)
-            .first()
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def _page(self, stmt, after: Cursor | None, limit: int) -> list[Homework]:
+        result = await self.db.execute(keyset_page(stmt, DBHomework, after, limit))
+        return [Homework.model_validate(h) for h in result.scalars()]
+
+    async def _stream(self, stmt) -> AsyncIterator[Homework]:
+        result = await self.db.stream_scalars(keyset_stream(stmt, DBHomework))
+        async for h in result:
+            yield Homework.model_validate(h)
+
+    async def get_homeworks(
+        self,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Homework]:
+        return await self._page(select(DBHomework), after, limit)
+
+    async def get_homeworks_by_course(
+        self,
+        course_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Homework]:
+        stmt = select(DBHomework).where(DBHomework.course_id == course_id)
+        return await self._page(stmt, after, limit)
+
+    def stream_homeworks(self) -> AsyncIterator[Homework]:
+        return self._stream(select(DBHomework))
+
+    def stream_homeworks_by_course(self, course_id: UUID) -> AsyncIterator[Homework]:
+        return self._stream(select(DBHomework).where(DBHomework.course_id == course_id))
+
+    async def search_homeworks(
+        self,
+        q: str,
+        after: SearchCursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[tuple[Homework, float]]:
+        result = await self.db.execute(search_page(select(DBHomework), DBHomework, q, after, limit))
+        return [(Homework.model_validate(h), rank) for h, rank in result]
+
+    async def _get(self, id: UUID) -> DBHomework:
+        result = await self.db.execute(
+            select(DBHomework).where(DBHomework.id == id)
         )
+        h = result.scalars().first()
         if h is None:
             raise KeyError
-        return Homework.model_validate(h)
+        return h
 
-    def create_homework(self, homework: Homework) -> Homework:
+    async def get_homework_by_id(self, id: UUID) -> Homework:
+        return Homework.model_validate(await self._get(id))
+
+    async def create_homework(self, homework: Homework) -> Homework:
         db_obj = DBHomework(
             id=homework.id,
             course_id=homework.course_id,
@@ -41,47 +76,73 @@ class HomeworkRepo:
             created_at=homework.created_at,
             published_at=homework.published_at,
             status=homework.status,
+            search_vector=homework_vector(homework.title, homework.description),
         )
         self.db.add(db_obj)
-        self.db.commit()
+        await self.db.flush()
         return homework
 
-    def set_status(self, id: UUID, status: HomeworkStatus) -> Homework:
-        db_obj = (
-            self.db.query(DBHomework)
-            .filter(DBHomework.id == id)
-            .first()
+    async def create_homeworks(self, homeworks: list[Homework]) -> list[Homework]:
+        """Вставка пачки одним executemany; id и created_at уже проставлены, RETURNING не нужен"""
+        if homeworks:
+            stmt = insert(DBHomework.__table__).values(
+                search_vector=homework_vector(bindparam("search_title"), bindparam("search_description"))
+            )
+            await self.db.execute(
+                stmt,
+                [
+                    {**h.model_dump(), "search_title": h.title, "search_description": h.description}
+                    for h in homeworks
+                ],
+            )
+        return homeworks
+
+    async def _update(self, id: UUID, *where, **values) -> Homework | None:
+        """UPDATE ... RETURNING за один запрос; None, если строка есть, но не прошла условие where"""
+        result = await self.db.execute(
+            update(DBHomework)
+            .where(DBHomework.id == id, *where)
+            .values(**values)
+            .returning(DBHomework)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
-        if db_obj is None:
-            raise KeyError
-        db_obj.status = status
-        self.db.commit()
-        self.db.refresh(db_obj)
-        return Homework.model_validate(db_obj)
-
-    def publish_homework(self, id: UUID) -> Homework:
-        db_obj = (
-            self.db.query(DBHomework)
-            .filter(DBHomework.id == id)
-            .first()
+        h = result.scalars().first()
+        if h is None:
+            # сюда попадаем только на ошибочном пути: отличить 404 от неверного статуса
+            if await self.db.scalar(select(DBHomework.id).where(DBHomework.id == id)) is None:
+                raise KeyError
+            return None
+        return Homework.model_validate(h)
+
+    async def set_status(self, id: UUID, status: HomeworkStatus) -> Homework:
+        return await self._update(id, status=status)
+
+    async def publish_homework(self, id: UUID) -> Homework | None:
+        return await self._update(
+            id,
+            DBHomework.status == HomeworkStatus.CREATED,
+            status=HomeworkStatus.ACTIVE,
+            published_at=datetime.utcnow(),
         )
-        if db_obj is None:
-            raise KeyError
-        db_obj.status = HomeworkStatus.ACTIVE
-        db_obj.published_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(db_obj)
-        return Homework.model_validate(db_obj)
-
-    def activate_by_course(self, course_id: UUID) -> list[Homework]:
-        homeworks = (
-            self.db.query(DBHomework)
-            .filter(DBHomework.course_id == course_id)
-            .filter(DBHomework.status == HomeworkStatus.CREATED)
-            .all()
+
+    async def close_homework(self, id: UUID) -> Homework | None:
+        return await self._update(
+            id,
+            DBHomework.status == HomeworkStatus.ACTIVE,
+            status=HomeworkStatus.CLOSED,
+        )
+
+    async def activate_by_course(self, course_id: UUID) -> list[Homework]:
+        return await self.activate_by_courses([course_id])
+
+    async def activate_by_courses(self, course_ids: list[UUID]) -> list[Homework]:
+        """Один UPDATE ... RETURNING по всем ещё не активированным ДЗ курсов"""
+        result = await self.db.execute(
+            update(DBHomework)
+            .where(DBHomework.course_id.in_(course_ids))
+            .where(DBHomework.status == HomeworkStatus.CREATED)
+            .values(status=HomeworkStatus.ACTIVE, published_at=datetime.utcnow())
+            .returning(DBHomework)
+            .execution_options(synchronize_session=False)
         )
-        for hw in homeworks:
-            hw.status = HomeworkStatus.ACTIVE
-            hw.published_at = datetime.utcnow()
-        self.db.commit()
-        return [Homework.model_validate(h) for h in homeworks]
+        return [Homework.model_validate(h) for h in result.scalars()]
@@ -0,0 +1,44 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import any_, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.outbox import OutboxEvent
+
+class OutboxRepo:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def add(self, event_type: str, events: list[tuple[UUID, dict]]) -> None:
+        """События одного типа: (aggregate_id, payload); одна вставка на пачку"""
+        if not events:
+            return
+        now = datetime.utcnow()
+        await self.db.execute(
+            insert(OutboxEvent),
+            [
+                {"event_type": event_type, "aggregate_id": aggregate_id, "payload": payload, "created_at": now}
+                for aggregate_id, payload in events
+            ],
+        )
+
+    async def claim(self, limit: int) -> list[OutboxEvent]:
+        """Забрать и удалить самые старые события; строки вернутся при rollback.
+
+        SKIP LOCKED позволяет нескольким relay'ям разбирать очередь без ожидания друг друга.
+        id = ANY(ARRAY(...)), а не IN (...): с IN планировщик сканирует outbox целиком.
+        """
+        oldest = (
+            select(OutboxEvent.id)
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.id == any_(func.array(oldest)))
+            .returning(OutboxEvent)
+        )
+        return sorted(result.scalars().all(), key=lambda e: e.id)
@@ -0,0 +1,15 @@
+from sqlalchemy import Select, tuple_
+
+from app.models.pagination import Cursor, STREAM_BATCH_SIZE
+
+def keyset_page(stmt: Select, model, after: Cursor | None, limit: int) -> Select:
+    """Страница по (created_at, id) - индексный поиск вместо OFFSET"""
+    if after is not None:
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple(after))
+    return stmt.order_by(model.created_at, model.id).limit(limit)
+
+def keyset_stream(stmt: Select, model) -> Select:
+    """Весь результат в том же порядке, порциями через серверный курсор"""
+    return stmt.order_by(model.created_at, model.id).execution_options(
+        yield_per=STREAM_BATCH_SIZE
+    )
@@ -0,0 +1,31 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.processed_payment import ProcessedPayment
+
+class ProcessedPaymentRepo:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def record(self, keys: list[UUID]) -> set[UUID]:
+        """Запомнить ключи; возвращает те, которых ещё не было"""
+        if not keys:
+            return set()
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            insert(ProcessedPayment)
+            .values([{"key": key, "processed_at": now} for key in set(keys)])
+            .on_conflict_do_nothing(index_elements=[ProcessedPayment.key])
+            .returning(ProcessedPayment.key)
+        )
+        return set(result.scalars())
+
+    async def purge(self, before: datetime) -> int:
+        result = await self.db.execute(
+            delete(ProcessedPayment).where(ProcessedPayment.processed_at < before)
+        )
+        return result.rowcount
@@ -1,84 +1,185 @@
 from uuid import UUID, uuid4
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from collections import defaultdict
+from sqlalchemy import BigInteger, Float, Integer, case, cast, column, func, literal, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
 from app.models.homework import HomeworkProgress
+from app.schemas.homework import Homework as DBHomework
+from app.schemas.homework_archive import ArchivedProgress
 from app.schemas.proggress import StudentProgress as DBProgress
 from app.schemas.solution import Solution as DBSolution
-from app.models.solution import SolutionStatus
+from app.models.solution import Solution, SolutionStatus
+
+def graded_contribution(status: SolutionStatus, grade: int | None) -> tuple[int, int]:
+    """Вклад решения в (completed_homeworks, grade_sum): считаются только GRADED"""
+    if status == SolutionStatus.GRADED:
+        return 1, grade or 0
+    return 0, 0
+
+def _average(completed, grade_sum):
+    return case((completed > 0, cast(grade_sum, Float) / completed))
+
+def _counters():
+    """Счётчики прогресса, посчитанные заново по таблице solutions"""
+    graded = DBSolution.status == SolutionStatus.GRADED
+    return (
+        func.count().label("total"),
+        func.count().filter(graded).label("completed"),
+        func.coalesce(func.sum(DBSolution.grade).filter(graded), 0).label("grade_sum"),
+    )
+
+def _with_archived(agg):
+    """Счётчики по solutions плюс вклад архивированных решений (outer join с archived_progress)"""
+    return (
+        (func.coalesce(agg.c.total, 0) + func.coalesce(ArchivedProgress.total_homeworks, 0)).label("total"),
+        (func.coalesce(agg.c.completed, 0) + func.coalesce(ArchivedProgress.completed_homeworks, 0)).label("completed"),
+        (func.coalesce(agg.c.grade_sum, 0) + func.coalesce(ArchivedProgress.grade_sum, 0)).label("grade_sum"),
+    )
 
 class ProgressRepo:
-    def __init__(self) -> None:
-        self.db: Session = next(get_db())
-
-    def get_progress_by_student(self, student_id: UUID) -> HomeworkProgress:
-        p = (
-            self.db.query(DBProgress)
-            .filter(DBProgress.student_id == student_id)
-            .first()
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def _get(self, student_id: UUID) -> DBProgress | None:
+        result = await self.db.execute(
+            select(DBProgress).where(DBProgress.student_id == student_id)
         )
+        return result.scalars().first()
+
+    async def get_progress_by_student(self, student_id: UUID) -> HomeworkProgress:
+        p = await self._get(student_id)
         if p is None:
             raise KeyError
-        return HomeworkProgress.from_orm(p)
-
-    def create_or_update_progress(
-        self,
-        student_id: UUID,
-        course_id: UUID,
-        total_homeworks: int,
-        completed_homeworks: int,
-        average_grade: float | None = None,
-    ) -> HomeworkProgress:
-        p = (
-            self.db.query(DBProgress)
-            .filter(DBProgress.student_id == student_id)
-            .first()
+        return HomeworkProgress.model_validate(p)
+
+    async def add_submission(self, student_id: UUID, homework_id: UUID) -> None:
+        """+1 к total_homeworks; строка прогресса создаётся при первой отправке.
+
+        course_id берётся из ДЗ тем же INSERT ... SELECT, без отдельного чтения.
+        """
+        src = select(
+            literal(uuid4(), DBProgress.id.type),
+            literal(student_id, DBProgress.student_id.type),
+            DBHomework.course_id,
+            literal(1),
+            literal(0),
+            literal(0),
+        ).where(DBHomework.id == homework_id)
+        stmt = insert(DBProgress).from_select(
+            ["id", "student_id", "course_id", "total_homeworks", "completed_homeworks", "grade_sum"],
+            src,
         )
-        if p is None:
-            p = DBProgress(
-                id=uuid4(),
-                student_id=student_id,
-                course_id=course_id,
-                total_homeworks=total_homeworks,
-                completed_homeworks=completed_homeworks,
-                average_grade=average_grade,
-            )
-            self.db.add(p)
-        else:
-            p.total_homeworks = total_homeworks
-            p.completed_homeworks = completed_homeworks
-            p.average_grade = average_grade
-
-        self.db.commit()
-        self.db.refresh(p)
-        return HomeworkProgress.from_orm(p)
-
-    def update_progress_by_solution(self, student_id: UUID) -> HomeworkProgress:
-        
-        solutions = (
-            self.db.query(DBSolution)
-            .filter(DBSolution.student_id == student_id)
-            .all()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBProgress.student_id],
+            set_={"total_homeworks": DBProgress.total_homeworks + 1},
         )
+        await self.db.execute(stmt)
+
+    async def apply_transition(self, old: Solution, new: Solution) -> list[tuple[UUID, UUID, float | None]]:
+        """Поправить счётчики на разницу между старым и новым состоянием решения.
+
+        Один UPDATE в транзакции смены статуса, без перечитывания истории студента.
+        Повторная оценка меняет только grade_sum, возврат на доработку
+        убирает решение из completed и из среднего.
+        """
+        return await self.apply_transitions([(old, new)])
 
-        completed = len([s for s in solutions if s.status == SolutionStatus.GRADED])
-        total = len(solutions)
-        
-        grades = [s.grade for s in solutions if s.grade is not None]
-        avg_grade = sum(grades) / len(grades) if grades else None
+    async def apply_transitions(
+        self, transitions: list[tuple[Solution, Solution]]
+    ) -> list[tuple[UUID, UUID, float | None]]:
+        """То же для пачки: дельты суммируются по студентам и применяются одним UPDATE ... FROM (VALUES ...)
 
-        p = (
-            self.db.query(DBProgress)
-            .filter(DBProgress.student_id == student_id)
-            .first()
+        Возвращает (student_id, course_id, average_grade) изменённых строк - для рейтинга курса.
+        """
+        deltas: dict[UUID, list[int]] = defaultdict(lambda: [0, 0])
+        for old, new in transitions:
+            old_completed, old_sum = graded_contribution(old.status, old.grade)
+            new_completed, new_sum = graded_contribution(new.status, new.grade)
+            delta = deltas[new.student_id]
+            delta[0] += new_completed - old_completed
+            delta[1] += new_sum - old_sum
+        rows = [(student_id, *delta) for student_id, delta in deltas.items() if any(delta)]
+        if not rows:
+            return []
+
+        d = values(
+            column("student_id", PG_UUID(as_uuid=True)),
+            column("completed", Integer),
+            column("grade_sum", BigInteger),
+            name="deltas",
+        ).data(rows)
+        completed = DBProgress.completed_homeworks + d.c.completed
+        grade_sum = DBProgress.grade_sum + d.c.grade_sum
+        result = await self.db.execute(
+            update(DBProgress)
+            .where(DBProgress.student_id == d.c.student_id)
+            .values(
+                completed_homeworks=completed,
+                grade_sum=grade_sum,
+                average_grade=_average(completed, grade_sum),
+            )
+            .returning(DBProgress.student_id, DBProgress.course_id, DBProgress.average_grade)
+            .execution_options(synchronize_session=False)
+        )
+        return [tuple(row) for row in result]
+
+    async def course_averages(self, course_id: UUID) -> list[tuple[UUID, float]]:
+        """Средние всех студентов курса с оценками - для загрузки рейтинга"""
+        result = await self.db.execute(
+            select(DBProgress.student_id, DBProgress.average_grade)
+            .where(DBProgress.course_id == course_id, DBProgress.average_grade.is_not(None))
         )
+        return [tuple(row) for row in result]
 
-        if p:
-            p.completed_homeworks = completed
-            p.average_grade = avg_grade
-            self.db.commit()
-            self.db.refresh(p)
-            return HomeworkProgress.from_orm(p)
+    async def update_progress_by_solution(self, student_id: UUID) -> HomeworkProgress:
+        """Полный пересчёт прогресса студента (для сверки и ручного исправления)"""
+        # агрегат без GROUP BY всегда даёт ровно одну строку, даже без решений
+        agg = select(*_counters()).where(DBSolution.student_id == student_id).subquery()
+        agg = (
+            select(literal(student_id, PG_UUID(as_uuid=True)).label("student_id"), *_with_archived(agg))
+            .select_from(agg)
+            .outerjoin(ArchivedProgress, ArchivedProgress.student_id == student_id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            update(DBProgress)
+            # условие по agg.c.student_id связывает FROM с обновляемой строкой (не декартово произведение)
+            .where(DBProgress.student_id == student_id, DBProgress.student_id == agg.c.student_id)
+            .values(
+                total_homeworks=agg.c.total,
+                completed_homeworks=agg.c.completed,
+                grade_sum=agg.c.grade_sum,
+                average_grade=_average(agg.c.completed, agg.c.grade_sum),
+            )
+            .returning(DBProgress)
+            .execution_options(synchronize_session="fetch")
+        )
+        p = result.scalars().first()
+        if p is None:
+            raise KeyError
+        return HomeworkProgress.model_validate(p)
 
-        raise KeyError
+    async def find_drift(self, limit: int = 1000) -> list[dict]:
+        """Студенты, у которых счётчики разошлись с полным пересчётом"""
+        agg = (
+            select(DBSolution.student_id, *_counters())
+            .group_by(DBSolution.student_id)
+            .subquery()
+        )
+        expected = _with_archived(agg)
+        stored = (DBProgress.total_homeworks, DBProgress.completed_homeworks, DBProgress.grade_sum)
+        result = await self.db.execute(
+            select(
+                DBProgress.student_id,
+                *stored,
+                expected[0].label("expected_total"),
+                expected[1].label("expected_completed"),
+                expected[2].label("expected_grade_sum"),
+            )
+            .outerjoin(agg, agg.c.student_id == DBProgress.student_id)
+            .outerjoin(ArchivedProgress, ArchivedProgress.student_id == DBProgress.student_id)
+            .where(tuple_(*stored).is_distinct_from(tuple_(*expected)))
+            .limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
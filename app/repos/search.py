@@ -0,0 +1,36 @@
+from sqlalchemy import Select, func, literal_column, tuple_
+
+from app.models.pagination import SearchCursor
+
+# Словарь поиска: русская морфология, латиница - английским стеммером
+SEARCH_CONFIG = "russian"
+# tsvector не бывает больше 1 МБ: в индекс попадает начало текста
+MAX_INDEXED_CHARS = 100_000
+
+def _config():
+    return literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+def search_vector(text, weight: str = "D"):
+    """Выражение для search_vector при INSERT/UPDATE: вектор считает Postgres.
+
+    text - строка, bindparam или колонка с исходным текстом; колонка годится,
+    только если значения в ней не сжаты (см. CompressedText).
+    """
+    text = func.left(text, literal_column(str(MAX_INDEXED_CHARS)))
+    return func.setweight(func.to_tsvector(_config(), text), literal_column(f"'{weight}'"))
+
+def homework_vector(title, description):
+    """Вектор ДЗ: совпадения в заголовке весят больше, чем в описании"""
+    return search_vector(title, "A").op("||")(search_vector(description))
+
+def search_page(stmt: Select, model, q: str, after: SearchCursor | None, limit: int) -> Select:
+    """Совпадения с запросом, от самых релевантных; keyset по (rank, id).
+
+    Выбирает (строка, rank): rank нужен для курсора следующей страницы.
+    """
+    query = func.websearch_to_tsquery(_config(), q)
+    rank = func.ts_rank(model.search_vector, query)
+    stmt = stmt.add_columns(rank).where(model.search_vector.op("@@")(query))
+    if after is not None:
+        stmt = stmt.where(tuple_(rank, model.id) < tuple(after))
+    return stmt.order_by(rank.desc(), model.id.desc()).limit(limit)
@@ -1,17 +1,24 @@
+from typing import AsyncIterator
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Integer, LargeBinary, column, delete, func, insert, literal, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.models.homework import HomeworkStatus
 from app.models.solution import Solution, SolutionStatus
+from app.models.pagination import Cursor, DEFAULT_PAGE_SIZE, SearchCursor
+from app.repos.pagination import keyset_page, keyset_stream
+from app.repos.search import search_page, search_vector
+from app.schemas.compressed_text import CompressedText
+from app.schemas.homework import Homework as DBHomework
 from app.schemas.solution import Solution as DBSolution
 
 class SolutionRepo:
-    def __init__(self) -> None:
-        self.db: Session = next(get_db())
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
 
-    def create_solution(self, solution: Solution) -> Solution:
+    async def create_solution(self, solution: Solution, minhash: bytes | None = None) -> Solution:
         db_obj = DBSolution(
             id=solution.id,
             homework_id=solution.homework_id,
@@ -22,90 +29,236 @@ class SolutionRepo:
             submitted_at=solution.submitted_at,
             grade=solution.grade,
             feedback=solution.feedback,
+            search_vector=search_vector(solution.answer),
+            minhash=minhash,
         )
         self.db.add(db_obj)
-        self.db.commit()
+        await self.db.flush()
         return solution
 
-    def get_solution_by_id(self, id: UUID) -> Solution:
-        s = (
-            self.db.query(DBSolution)
-            .filter(DBSolution.id == id)
-            .first()
+    async def create_submitted(self, solution: Solution, minhash: bytes | None = None) -> Solution | None:
+        """INSERT ... SELECT ... RETURNING: решение сразу в статусе SUBMITTED и только к активному ДЗ.
+
+        minhash - подпись ответа (app.similarity.minhash). None, если ДЗ нет или оно не ACTIVE.
+        """
+        columns = ("id", "student_id", "answer", "status", "created_at", "submitted_at", "grade", "feedback")
+        src = select(
+            DBHomework.id,
+            *(literal(getattr(solution, c), DBSolution.__table__.c[c].type) for c in columns),
+            search_vector(solution.answer),
+            literal(minhash, LargeBinary),
+        ).where(DBHomework.id == solution.homework_id, DBHomework.status == HomeworkStatus.ACTIVE)
+        result = await self.db.execute(
+            insert(DBSolution)
+            .from_select(["homework_id", *columns, "search_vector", "minhash"], src)
+            .returning(DBSolution)
         )
+        s = result.scalars().first()
+        return None if s is None else Solution.model_validate(s)
+
+    async def _get(self, id: UUID, for_update: bool = False) -> DBSolution:
+        stmt = select(DBSolution).where(DBSolution.id == id)
+        if for_update:
+            stmt = stmt.with_for_update()
+        result = await self.db.execute(stmt)
+        s = result.scalars().first()
         if s is None:
             raise KeyError
-        return Solution.model_validate(s)
-
-    def get_solutions_by_homework(self, homework_id: UUID) -> list[Solution]:
-        return [
-            Solution.model_validate(s)
-            for s in self.db.query(DBSolution)
-            .filter(DBSolution.homework_id == homework_id)
-            .all()
-        ]
-
-    def get_solutions_by_student(self, student_id: UUID) -> list[Solution]:
-        return [
-            Solution.model_validate(s)
-            for s in self.db.query(DBSolution)
-            .filter(DBSolution.student_id == student_id)
-            .all()
-        ]
-
-    def set_status(self, id: UUID, status: SolutionStatus) -> Solution:
-        s = (
-            self.db.query(DBSolution)
-            .filter(DBSolution.id == id)
-            .first()
+        return s
+
+    async def get_solution_by_id(self, id: UUID, for_update: bool = False) -> Solution:
+        return Solution.model_validate(await self._get(id, for_update))
+
+    async def lock_solutions(self, ids: list[UUID]) -> list[Solution]:
+        """SELECT ... FOR UPDATE пачки решений; порядок по id, чтобы параллельные пачки не взаимоблокировались"""
+        result = await self.db.execute(
+            select(DBSolution)
+            .where(DBSolution.id.in_(ids))
+            .order_by(DBSolution.id)
+            .with_for_update()
         )
-        if s is None:
-            raise KeyError
-        s.status = status
-        self.db.commit()
-        self.db.refresh(s)
-        return Solution.model_validate(s)
-
-    def submit_solution(self, id: UUID) -> Solution:
-        s = (
-            self.db.query(DBSolution)
-            .filter(DBSolution.id == id)
-            .first()
+        return [Solution.model_validate(s) for s in result.scalars()]
+
+    async def _page(self, stmt, after: Cursor | None, limit: int) -> list[Solution]:
+        result = await self.db.execute(keyset_page(stmt, DBSolution, after, limit))
+        return [Solution.model_validate(s) for s in result.scalars()]
+
+    async def _stream(self, stmt) -> AsyncIterator[Solution]:
+        result = await self.db.stream_scalars(keyset_stream(stmt, DBSolution))
+        async for s in result:
+            yield Solution.model_validate(s)
+
+    async def get_solutions_by_homework(
+        self,
+        homework_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Solution]:
+        stmt = select(DBSolution).where(DBSolution.homework_id == homework_id)
+        return await self._page(stmt, after, limit)
+
+    async def get_solutions_by_student(
+        self,
+        student_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Solution]:
+        stmt = select(DBSolution).where(DBSolution.student_id == student_id)
+        return await self._page(stmt, after, limit)
+
+    async def search_solutions(
+        self,
+        homework_id: UUID,
+        q: str,
+        after: SearchCursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[tuple[Solution, float]]:
+        stmt = select(DBSolution).where(DBSolution.homework_id == homework_id)
+        result = await self.db.execute(search_page(stmt, DBSolution, q, after, limit))
+        return [(Solution.model_validate(s), rank) for s, rank in result]
+
+    async def get_minhashes(self, homework_id: UUID) -> list[tuple[UUID, UUID, bytes]]:
+        """(id, student_id, minhash) решений ДЗ с подписью - для LSH-индекса app.similarity"""
+        result = await self.db.execute(
+            select(DBSolution.id, DBSolution.student_id, DBSolution.minhash)
+            .where(DBSolution.homework_id == homework_id, DBSolution.minhash.is_not(None))
+            .order_by(DBSolution.created_at, DBSolution.id)
         )
-        if s is None:
-            raise KeyError
-        s.status = SolutionStatus.SUBMITTED
-        s.submitted_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(s)
-        return Solution.model_validate(s)
-
-    def return_solution(self, id: UUID, feedback: str) -> Solution:
-        s = (
-            self.db.query(DBSolution)
-            .filter(DBSolution.id == id)
-            .first()
+        return [tuple(row) for row in result]
+
+    async def get_unsigned_answers(self, after: UUID | None, limit: int) -> list[tuple[UUID, str]]:
+        """(id, answer) решений без подписи по возрастанию id, начиная после after"""
+        stmt = select(DBSolution.id, DBSolution.answer).where(DBSolution.minhash.is_(None))
+        if after is not None:
+            stmt = stmt.where(DBSolution.id > after)
+        result = await self.db.execute(stmt.order_by(DBSolution.id).limit(limit))
+        return [tuple(row) for row in result]
+
+    async def set_minhashes(self, minhashes: list[tuple[UUID, bytes]]) -> None:
+        """Записать подписи пачкой (executemany UPDATE по первичному ключу)"""
+        if minhashes:
+            await self.db.execute(
+                update(DBSolution),
+                [{"id": id, "minhash": minhash} for id, minhash in minhashes],
+                execution_options={"synchronize_session": False},
+            )
+
+    async def delete_oldest(self, homework_id: UUID, limit: int) -> list[Solution]:
+        """Удалить limit самых ранних решений ДЗ и вернуть их в порядке (created_at, id).
+
+        Для архивации: строки возвращаются, только если транзакция закоммитится,
+        так что файл с ними пишется до commit, а при сбое всё откатывается.
+        """
+        oldest = (
+            select(DBSolution.id)
+            .where(DBSolution.homework_id == homework_id)
+            .order_by(DBSolution.created_at, DBSolution.id)
+            .limit(limit)
+            .with_for_update()
         )
-        if s is None:
-            raise KeyError
-        s.status = SolutionStatus.RETURNED
-        s.feedback = feedback
-        self.db.commit()
-        self.db.refresh(s)
-        return Solution.model_validate(s)
-
-    def grade_solution(self, id: UUID, grade: int, feedback: str | None = None) -> Solution:
-        s = (
-            self.db.query(DBSolution)
-            .filter(DBSolution.id == id)
-            .first()
+        result = await self.db.execute(
+            delete(DBSolution)
+            .where(DBSolution.id.in_(oldest.scalar_subquery()))
+            .returning(DBSolution)
+            .execution_options(synchronize_session=False)
         )
-        if s is None:
-            raise KeyError
-        s.status = SolutionStatus.GRADED
-        s.grade = grade
+        # порядок строк RETURNING не определён
+        solutions = [Solution.model_validate(s) for s in result.scalars()]
+        return sorted(solutions, key=lambda s: (s.created_at, s.id))
+
+    def stream_solutions_by_homework(self, homework_id: UUID) -> AsyncIterator[Solution]:
+        return self._stream(select(DBSolution).where(DBSolution.homework_id == homework_id))
+
+    def stream_solutions_by_student(self, student_id: UUID) -> AsyncIterator[Solution]:
+        return self._stream(select(DBSolution).where(DBSolution.student_id == student_id))
+
+    async def _transition(
+        self, id: UUID, allowed: tuple[SolutionStatus, ...] | None, **values
+    ) -> tuple[Solution, Solution] | None:
+        """Смена состояния одним UPDATE ... FROM (SELECT ... FOR UPDATE) ... RETURNING.
+
+        Подзапрос блокирует строку и отдаёт её прежние status и grade, так что
+        (старое, новое) состояние для пересчёта прогресса приходит за один запрос.
+        None, если статус решения не входит в allowed.
+        """
+        old = (
+            select(DBSolution.id, DBSolution.status, DBSolution.grade)
+            .where(DBSolution.id == id)
+            .with_for_update()
+            .subquery("old")
+        )
+        stmt = update(DBSolution).where(DBSolution.id == old.c.id)
+        if allowed is not None:
+            stmt = stmt.where(old.c.status.in_(allowed))
+        result = await self.db.execute(
+            stmt.values(**values)
+            .returning(DBSolution, old.c.status, old.c.grade)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        row = result.first()
+        if row is None:
+            # только на ошибочном пути: отличить 404 от неверного статуса
+            if await self.db.scalar(select(DBSolution.id).where(DBSolution.id == id)) is None:
+                raise KeyError
+            return None
+        s, old_status, old_grade = row
+        new = Solution.model_validate(s)
+        return new.model_copy(update={"status": old_status, "grade": old_grade}), new
+
+    async def set_status(self, id: UUID, status: SolutionStatus) -> Solution:
+        _, new = await self._transition(id, None, status=status)
+        return new
+
+    async def submit_solution(self, id: UUID) -> Solution | None:
+        changed = await self._transition(
+            id,
+            (SolutionStatus.DRAFT,),
+            status=SolutionStatus.SUBMITTED,
+            submitted_at=datetime.utcnow(),
+        )
+        return None if changed is None else changed[1]
+
+    async def return_solution(self, id: UUID, feedback: str) -> tuple[Solution, Solution] | None:
+        return await self._transition(
+            id,
+            (SolutionStatus.SUBMITTED, SolutionStatus.GRADED),
+            status=SolutionStatus.RETURNED,
+            feedback=feedback,
+        )
+
+    async def grade_solutions(self, grades: list[tuple[UUID, int, str | None]]) -> list[Solution]:
+        """Оценить пачку решений одним UPDATE ... FROM (VALUES ...) RETURNING.
+
+        Строки должны быть заблокированы lock_solutions в этой же транзакции.
+        Пустой feedback, как и в grade_solution, не затирает прежний.
+        """
+        if not grades:
+            return []
+        g = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("grade", Integer),
+            column("feedback", CompressedText),
+            name="grades",
+        ).data(grades)
+        result = await self.db.execute(
+            update(DBSolution)
+            .where(DBSolution.id == g.c.id)
+            .values(
+                status=SolutionStatus.GRADED,
+                grade=g.c.grade,
+                feedback=func.coalesce(func.nullif(g.c.feedback, ""), DBSolution.feedback),
+            )
+            .returning(DBSolution)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return [Solution.model_validate(s) for s in result.scalars()]
+
+    async def grade_solution(
+        self, id: UUID, grade: int, feedback: str | None = None
+    ) -> tuple[Solution, Solution] | None:
+        values = {"status": SolutionStatus.GRADED, "grade": grade}
         if feedback:
-            s.feedback = feedback
-        self.db.commit()
-        self.db.refresh(s)
-        return Solution.model_validate(s)
+            values["feedback"] = feedback
+        return await self._transition(
+            id, (SolutionStatus.SUBMITTED, SolutionStatus.RETURNED), **values
+        )
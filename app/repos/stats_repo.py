@@ -0,0 +1,176 @@
+from collections import Counter, defaultdict
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Integer, String, cast, column, func, literal, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.homework import HomeworkStats
+from app.models.solution import Solution, SolutionStatus
+from app.repos.progress_repo import graded_contribution
+from app.schemas.homework import Homework as DBHomework
+from app.schemas.homework_archive import HomeworkArchive
+from app.schemas.homework_stats import HomeworkStats as DBStats
+from app.schemas.solution import Solution as DBSolution
+
+COUNTERS = ("submitted_count", "graded_count", "returned_count", "grade_sum")
+
+def _archived(homework_id):
+    """ДЗ, архивация которых начата: решений в solutions уже не все, их статистика заморожена"""
+    return homework_id.in_(select(HomeworkArchive.homework_id))
+
+def _recomputed():
+    """Статистика всех неархивированных ДЗ, посчитанная заново по solutions одним запросом"""
+    graded = DBSolution.status == SolutionStatus.GRADED
+    counts = (
+        select(
+            DBSolution.homework_id,
+            func.count().label("submitted_count"),
+            func.count().filter(graded).label("graded_count"),
+            func.count().filter(DBSolution.status == SolutionStatus.RETURNED).label("returned_count"),
+            func.coalesce(func.sum(DBSolution.grade).filter(graded), 0).label("grade_sum"),
+        )
+        .where(~_archived(DBSolution.homework_id))
+        .group_by(DBSolution.homework_id)
+        .subquery()
+    )
+    by_grade = (
+        select(DBSolution.homework_id, DBSolution.grade, func.count().label("n"))
+        .where(graded, DBSolution.grade.is_not(None), ~_archived(DBSolution.homework_id))
+        .group_by(DBSolution.homework_id, DBSolution.grade)
+        .subquery()
+    )
+    histograms = (
+        select(
+            by_grade.c.homework_id,
+            func.jsonb_object_agg(cast(by_grade.c.grade, String), by_grade.c.n).label("histogram"),
+        )
+        .group_by(by_grade.c.homework_id)
+        .subquery()
+    )
+    return (
+        select(
+            counts,
+            func.coalesce(histograms.c.histogram, cast(literal("{}"), JSONB)).label("histogram"),
+        )
+        .outerjoin(histograms, histograms.c.homework_id == counts.c.homework_id)
+        .subquery()
+    )
+
+class HomeworkStatsRepo:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def get(self, homework_id: UUID) -> HomeworkStats:
+        """Одна строка; у ДЗ без решений строки статистики ещё нет - нули"""
+        result = await self.db.execute(
+            select(DBHomework.id, DBStats)
+            .outerjoin(DBStats, DBStats.homework_id == DBHomework.id)
+            .where(DBHomework.id == homework_id)
+        )
+        row = result.first()
+        if row is None:
+            raise KeyError
+        stats = row.HomeworkStats
+        if stats is None:
+            return HomeworkStats(homework_id=homework_id)
+        return HomeworkStats(
+            homework_id=homework_id,
+            submitted_count=stats.submitted_count,
+            graded_count=stats.graded_count,
+            returned_count=stats.returned_count,
+            average_grade=stats.grade_sum / stats.graded_count if stats.graded_count else None,
+            histogram=stats.histogram,
+        )
+
+    async def add_submission(self, homework_id: UUID) -> None:
+        """+1 к submitted_count; строка создаётся при первой отправке"""
+        stmt = insert(DBStats).values(homework_id=homework_id, submitted_count=1)
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DBStats.homework_id],
+                set_={"submitted_count": DBStats.submitted_count + 1},
+            )
+        )
+
+    async def apply_transitions(self, transitions: list[tuple[Solution, Solution]]) -> None:
+        """Дельты переходов решений, сложенные по ДЗ, одним UPDATE ... FROM (VALUES ...)
+
+        Как и ProgressRepo.apply_transitions: повторная оценка переносит решение
+        между столбцами гистограммы, возврат убирает его из оценённых.
+        """
+        counters: dict[UUID, list[int]] = defaultdict(lambda: [0, 0, 0])
+        histograms: dict[UUID, Counter] = defaultdict(Counter)
+        for old, new in transitions:
+            delta = counters[new.homework_id]
+            histogram = histograms[new.homework_id]
+            for solution, sign in ((old, -1), (new, 1)):
+                graded, grade_sum = graded_contribution(solution.status, solution.grade)
+                delta[0] += sign * graded
+                delta[1] += sign * (solution.status == SolutionStatus.RETURNED)
+                delta[2] += sign * grade_sum
+                if graded and solution.grade is not None:
+                    histogram[str(solution.grade)] += sign
+        rows = []
+        for homework_id, delta in counters.items():
+            histogram = {grade: n for grade, n in histograms[homework_id].items() if n}
+            if any(delta) or histogram:
+                rows.append((homework_id, *delta, histogram))
+        if not rows:
+            return
+
+        d = values(
+            column("homework_id", PG_UUID(as_uuid=True)),
+            column("graded", Integer),
+            column("returned", Integer),
+            column("grade_sum", BigInteger),
+            column("histogram", JSONB),
+            name="deltas",
+        ).data(rows)
+        await self.db.execute(
+            update(DBStats)
+            .where(DBStats.homework_id == d.c.homework_id)
+            .values(
+                graded_count=DBStats.graded_count + d.c.graded,
+                returned_count=DBStats.returned_count + d.c.returned,
+                grade_sum=DBStats.grade_sum + d.c.grade_sum,
+                histogram=func.jsonb_add_counts(DBStats.histogram, d.c.histogram),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def find_drift(self, limit: int = 1000) -> list[dict]:
+        """ДЗ, у которых сохранённая статистика разошлась с полным пересчётом"""
+        r = _recomputed()
+        stored = [func.coalesce(getattr(DBStats, name), 0) for name in COUNTERS]
+        stored.append(func.coalesce(DBStats.histogram, cast(literal("{}"), JSONB)))
+        expected = [func.coalesce(getattr(r.c, name), 0) for name in COUNTERS]
+        expected.append(func.coalesce(r.c.histogram, cast(literal("{}"), JSONB)))
+        result = await self.db.execute(
+            select(
+                func.coalesce(DBStats.homework_id, r.c.homework_id).label("homework_id"),
+                *(s.label(name) for s, name in zip(stored, (*COUNTERS, "histogram"))),
+                *(e.label(f"expected_{name}") for e, name in zip(expected, (*COUNTERS, "histogram"))),
+            )
+            .select_from(DBStats)
+            .join(r, r.c.homework_id == DBStats.homework_id, full=True)
+            .where(tuple_(*stored).is_distinct_from(tuple_(*expected)))
+            .where(~func.coalesce(_archived(DBStats.homework_id), False))
+            .limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def rebuild(self) -> int:
+        """Пересчитать статистику ДЗ по solutions (кроме архивированных); возвращает число записанных строк"""
+        r = _recomputed()
+        stmt = insert(DBStats).from_select(
+            ["homework_id", *COUNTERS, "histogram"],
+            select(r.c.homework_id, *(getattr(r.c, name) for name in COUNTERS), r.c.histogram),
+        )
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DBStats.homework_id],
+                set_={name: getattr(stmt.excluded, name) for name in (*COUNTERS, "histogram")},
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,59 @@
+import base64
+import zlib
+
+from sqlalchemy import String
+from sqlalchemy.types import TypeDecorator
+
+from app.settings import settings
+
+# U+FFFE - не символ Юникода и в обычном тексте не встречается. Сжатое
+# значение начинается с MARKER + "z"; текст, который сам начинается с MARKER,
+# хранится с префиксом MARKER + "r" - так разбор однозначен для любой строки.
+MARKER = "\ufffe"
+COMPRESSED = MARKER + "z"
+ESCAPED = MARKER + "r"
+LEVEL = 6
+# С такой длины строки Postgres сам сжимает значение в TOAST (pglz), и base64
+# поверх zlib выходит не меньше: сжимаем только то, что иначе лежит как есть
+TOAST_THRESHOLD = 2032
+
+
+def pack(text: str, threshold: int | None = None) -> str:
+    """Хранимое значение: zlib + base64 для текста от threshold до TOAST_THRESHOLD байт, если это выгодно"""
+    threshold = settings.compress_threshold if threshold is None else threshold
+    if len(text) * 4 >= threshold and len(text) < TOAST_THRESHOLD:
+        data = text.encode()
+        if threshold <= len(data) < TOAST_THRESHOLD:
+            packed = COMPRESSED + base64.b64encode(zlib.compress(data, LEVEL)).decode("ascii")
+            if len(packed) < len(data):
+                return packed
+    if text.startswith(MARKER):
+        return ESCAPED + text
+    return text
+
+
+def unpack(stored: str) -> str:
+    if not stored.startswith(MARKER):
+        return stored
+    if stored.startswith(COMPRESSED):
+        return zlib.decompress(base64.b64decode(stored[len(COMPRESSED):])).decode()
+    return stored[len(ESCAPED):]
+
+
+class CompressedText(TypeDecorator):
+    """Текстовая колонка, длинные значения которой лежат сжатыми.
+
+    Тип колонки в БД - прежний varchar: сжатие прозрачно для репозиториев,
+    ORM и Core-запросов, а короткие и длинные (их сжимает TOAST) значения
+    хранятся как есть. В SQL (поиск, LIKE) сжатые значения видны в
+    закодированном виде.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else pack(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else unpack(value)
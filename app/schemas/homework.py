@@ -1,8 +1,10 @@
-from sqlalchemy import Column, String, DateTime, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Enum, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from datetime import datetime
 
 from app.schemas.base_schema import Base
+from app.schemas.compressed_text import CompressedText
 from app.models.homework import HomeworkStatus
 
 class Homework(Base):
@@ -11,7 +13,25 @@ class Homework(Base):
     id = Column(UUID(as_uuid=True), primary_key=True)
     course_id = Column(UUID(as_uuid=True), nullable=False)
     title = Column(String, nullable=False)
-    description = Column(String, nullable=False)
+    description = Column(CompressedText, nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     published_at = Column(DateTime, nullable=True)
     status = Column(Enum(HomeworkStatus), nullable=False)
+    # title (вес A) + description; заполняет репозиторий, см. app.repos.search.
+    # deferred: спискам ДЗ вектор не нужен
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
+    __table_args__ = (
+        # GET /homeworks/ - keyset по (created_at, id)
+        Index("ix_homeworks_created_at_id", "created_at", "id"),
+        # GET /homeworks/course/{id} - фильтр по курсу + keyset
+        Index("ix_homeworks_course_id_created_at_id", "course_id", "created_at", "id"),
+        # activate_by_course трогает только ещё не активированные ДЗ курса
+        Index(
+            "ix_homeworks_course_id_created",
+            "course_id",
+            postgresql_where=text("status = 'CREATED'"),
+        ),
+        # GET /homeworks/search
+        Index("ix_homeworks_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.schemas.base_schema import Base
+
+class HomeworkArchive(Base):
+    """Архивация решений закрытого ДЗ в файлы, см. app.archive.
+
+    parts и solutions - чекпоинт: меняются в той же транзакции, что удаляет
+    строки части из solutions, поэтому прерванная архивация продолжается с них.
+    """
+    __tablename__ = "homework_archives"
+
+    homework_id = Column(UUID(as_uuid=True), primary_key=True)
+    parts = Column(Integer, nullable=False, default=0, server_default="0")
+    solutions = Column(Integer, nullable=False, default=0, server_default="0")
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class ArchivedProgress(Base):
+    """Вклад архивированных решений в счётчики прогресса студента.
+
+    Полный пересчёт прогресса по solutions (сверка, ручное исправление)
+    прибавляет его: иначе архивация выглядела бы как расхождение.
+    """
+    __tablename__ = "archived_progress"
+
+    student_id = Column(UUID(as_uuid=True), primary_key=True)
+    total_homeworks = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_homeworks = Column(Integer, nullable=False, default=0, server_default="0")
+    grade_sum = Column(BigInteger, nullable=False, default=0, server_default="0")
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, Integer, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.schemas.base_schema import Base
+
+class HomeworkStats(Base):
+    """Счётчики решений по ДЗ, поддерживаются инкрементально из переходов решений"""
+    __tablename__ = "homework_stats"
+
+    homework_id = Column(UUID(as_uuid=True), primary_key=True)
+    # все отправленные решения, в любом статусе
+    submitted_count = Column(Integer, nullable=False, default=0, server_default="0")
+    graded_count = Column(Integer, nullable=False, default=0, server_default="0")
+    returned_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # сумма оценок GRADED-решений: средняя = grade_sum / graded_count
+    grade_sum = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # {"оценка": число GRADED-решений с ней}; нулевые счётчики не хранятся
+    histogram = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, DateTime, Identity, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from datetime import datetime
+
+from app.schemas.base_schema import Base
+
+class OutboxEvent(Base):
+    """Доменное событие, записанное в одной транзакции с изменением; relay публикует и удаляет"""
+    __tablename__ = "outbox"
+
+    # порядок публикации - порядок вставки
+    id = Column(BigInteger, Identity(), primary_key=True)
+    event_type = Column(String, nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.schemas.base_schema import Base
+
+class ProcessedPayment(Base):
+    """Ключ уже обработанного события об оплате (uuid5 от message_id или курса и студента)"""
+    __tablename__ = "processed_payments"
+
+    key = Column(UUID(as_uuid=True), primary_key=True)
+    # по нему чистятся ключи старше PAYMENT_DEDUP_TTL
+    processed_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, Integer
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, text
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.schemas.base_schema import Base
@@ -11,4 +11,17 @@ class StudentProgress(Base):
     course_id = Column(UUID(as_uuid=True), nullable=False)
     total_homeworks = Column(Integer, nullable=False, default=0)
     completed_homeworks = Column(Integer, nullable=False, default=0)
+    # сумма оценок GRADED-решений: average_grade = grade_sum / completed_homeworks
+    grade_sum = Column(BigInteger, nullable=False, default=0, server_default="0")
     average_grade = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # рейтинг курса: загрузка средних курса одним index-only scan
+        Index(
+            "ix_student_progress_course_id_average_grade",
+            "course_id",
+            "average_grade",
+            "student_id",
+            postgresql_where=text("average_grade IS NOT NULL"),
+        ),
+    )
@@ -1,8 +1,10 @@
-from sqlalchemy import Column, String, DateTime, Integer, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, Integer, Enum, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from datetime import datetime
 
 from app.schemas.base_schema import Base
+from app.schemas.compressed_text import CompressedText
 from app.models.solution import SolutionStatus
 
 class Solution(Base):
@@ -11,9 +13,23 @@ class Solution(Base):
     id = Column(UUID(as_uuid=True), primary_key=True)
     homework_id = Column(UUID(as_uuid=True), nullable=False)
     student_id = Column(UUID(as_uuid=True), nullable=False)
-    answer = Column(String, nullable=False)
+    answer = Column(CompressedText, nullable=False)
     status = Column(Enum(SolutionStatus), nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     submitted_at = Column(DateTime, nullable=True)
     grade = Column(Integer, nullable=True)
-    feedback = Column(String, nullable=True)
+    feedback = Column(CompressedText, nullable=True)
+    # по answer; заполняет репозиторий, см. app.repos.search. GIN-индекса нет:
+    # поиск идёт внутри ДЗ, строки которого находит индекс по homework_id
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    # MinHash-подпись answer для поиска похожих решений, см. app.similarity;
+    # NULL у решений, отправленных до неё и ещё не обработанных backfill
+    minhash = deferred(Column(LargeBinary, nullable=True))
+
+    __table_args__ = (
+        # списки решений по ДЗ / по студенту - фильтр + keyset по (created_at, id)
+        Index("ix_solutions_homework_id_created_at_id", "homework_id", "created_at", "id"),
+        Index("ix_solutions_student_id_created_at_id", "student_id", "created_at", "id"),
+        # очереди проверки: решения ДЗ в заданном статусе
+        Index("ix_solutions_homework_id_status", "homework_id", "status"),
+    )
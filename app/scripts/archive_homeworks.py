@@ -0,0 +1,52 @@
+# app/scripts/archive_homeworks.py
+"""Архивация решений закрытых ДЗ в файлы (ARCHIVE_DIR) с удалением из solutions.
+
+    python -m app.scripts.archive_homeworks --all-closed            # все закрытые, ещё не архивированные
+    python -m app.scripts.archive_homeworks --homework <id> --chunk 5000
+
+Каждая часть (--chunk решений, по умолчанию ARCHIVE_CHUNK_SIZE) - своя
+транзакция и свой файл; прерванный запуск можно просто повторить, он
+продолжит с последней закоммиченной части. Архивированные решения отдаёт
+GET /homeworks/{homework_id}/archive/solutions.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from uuid import UUID
+
+from app.database import async_engine
+from app.services.homework_service import HomeworkService
+from app.unit_of_work import open_uow
+
+
+async def main(args) -> int:
+    started = time.perf_counter()
+    failed = 0
+    async with open_uow() as uow:
+        homework_ids = args.homework
+        if args.all_closed:
+            async with uow:
+                homework_ids = await uow.archives.pending_homeworks()
+        svc = HomeworkService(uow)
+        for homework_id in homework_ids:
+            try:
+                archived = await svc.archive_homework(homework_id, args.chunk)
+            except (KeyError, ValueError) as e:
+                print(f"{homework_id}: skipped ({e.args[0] if e.args else 'not found'})")
+                failed += 1
+                continue
+            print(f"{homework_id}: {archived} solution(s) archived")
+    await async_engine.dispose()
+    print(f"done: {len(homework_ids) - failed} homework(s) in {time.perf_counter() - started:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--homework", type=UUID, action="append")
+    target.add_argument("--all-closed", action="store_true")
+    parser.add_argument("--chunk", type=int, default=None)
+    sys.exit(asyncio.run(main(parser.parse_args())))
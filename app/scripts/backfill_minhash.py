@@ -0,0 +1,46 @@
+# app/scripts/backfill_minhash.py
+"""Заполнение MinHash-подписей (solutions.minhash) у решений, отправленных до их появления.
+
+    python -m app.scripts.backfill_minhash                  # все решения без подписи
+    python -m app.scripts.backfill_minhash --batch 5000 --max 100000
+
+Решения читаются пачками по возрастанию id, каждая пачка записывается в своей
+транзакции: прерванный запуск можно просто повторить - обработанные решения
+уже с подписью и не выбираются. Индексы похожих решений в работающих
+процессах увидят подписи после SIMILARITY_TTL.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.database import async_engine
+from app.similarity import signatures, to_bytes
+from app.unit_of_work import open_uow
+
+
+async def main(args) -> None:
+    started = time.perf_counter()
+    done, after = 0, None
+    async with open_uow() as uow:
+        while args.max is None or done < args.max:
+            async with uow:
+                limit = args.batch if args.max is None else min(args.batch, args.max - done)
+                rows = await uow.solutions.get_unsigned_answers(after, limit)
+                if not rows:
+                    break
+                computed = signatures(answer for _, answer in rows)
+                await uow.solutions.set_minhashes([(id, to_bytes(sig)) for (id, _), sig in zip(rows, computed)])
+            done += len(rows)
+            after = rows[-1][0]
+            elapsed = time.perf_counter() - started
+            print(f"{done} solution(s) signed, {done / elapsed:.0f}/s")
+    await async_engine.dispose()
+    print(f"done: {done} solution(s) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--max", type=int, default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,271 @@
+# app/scripts/check_query_plans.py
+"""Проверка планов запросов репозиториев: ни один не должен уходить в Seq Scan.
+
+Скрипт применяет миграции, засевает БД внутри транзакции (в конце она
+откатывается), вызывает методы репозиториев, перехватывает их SQL и
+делает EXPLAIN каждого запроса с теми же параметрами.
+
+    python -m app.scripts.check_query_plans --homeworks 20000 --solutions 200000
+
+Код возврата 1, если хотя бы один план содержит Seq Scan.
+Полная выгрузка без фильтра (stream_homeworks) и поиск закрытых ДЗ для
+архивации (ArchiveRepo.pending_homeworks, раз в запуск скрипта) не
+проверяются: для них последовательное чтение и есть оптимальный план.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import event, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, init_db
+from app.models.homework import HomeworkStatus
+from app.models.pagination import Cursor
+from app.models.solution import Solution, SolutionStatus
+from app.schemas.homework import Homework as DBHomework
+from app.schemas.solution import Solution as DBSolution
+from app.schemas.proggress import StudentProgress as DBProgress
+from app.schemas.outbox import OutboxEvent
+from app.schemas.processed_payment import ProcessedPayment
+from app.schemas.homework_stats import HomeworkStats as DBStats
+from app.schemas.homework_archive import ArchivedProgress, HomeworkArchive
+from app.repos.search import homework_vector, search_vector
+from app.unit_of_work import UnitOfWork
+
+CHECKED_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# словарь текстов: у поиска должна быть реалистичная селективность
+WORDS = [f"term{i}" for i in range(1000)]
+
+
+def words(n: int) -> str:
+    return " ".join(random.choices(WORDS, k=n))
+
+
+async def seed(conn, homeworks: int, solutions: int) -> dict:
+    now = datetime.utcnow()
+    courses = [uuid4() for _ in range(max(1, homeworks // 20))]
+    students = [uuid4() for _ in range(max(1, solutions // 10))]
+
+    hw_rows = [
+        {
+            "id": uuid4(),
+            "course_id": random.choice(courses),
+            "title": f"hw {i}",
+            "description": words(20),
+            "created_at": now - timedelta(seconds=i),
+            "published_at": None,
+            "status": random.choice(list(HomeworkStatus)),
+        }
+        for i in range(homeworks)
+    ]
+    await conn.execute(insert(DBHomework), hw_rows)
+
+    sol_rows = [
+        {
+            "id": uuid4(),
+            "homework_id": random.choice(hw_rows)["id"],
+            "student_id": random.choice(students),
+            "answer": words(50),
+            "status": random.choice(list(SolutionStatus)),
+            "created_at": now - timedelta(seconds=i),
+            "submitted_at": now,
+            "grade": random.randint(1, 5),
+            "feedback": None,
+        }
+        for i in range(solutions)
+    ]
+    for start in range(0, len(sol_rows), 10_000):
+        await conn.execute(insert(DBSolution), sol_rows[start:start + 10_000])
+
+    await conn.execute(
+        update(DBHomework)
+            .where(DBHomework.search_vector.is_(None))
+            .values(search_vector=homework_vector(DBHomework.title, DBHomework.description))
+    )
+    await conn.execute(update(DBSolution)
+            .where(DBSolution.search_vector.is_(None))
+            .values(search_vector=search_vector(DBSolution.answer)))
+    # в рабочей базе pending list GIN-индекса разбирает autovacuum
+    await conn.execute(text("SELECT gin_clean_pending_list('ix_homeworks_search_vector')"))
+
+    progress_rows = [
+        {
+            "id": uuid4(),
+            "student_id": student_id,
+            "course_id": random.choice(courses),
+            "total_homeworks": 0,
+            "completed_homeworks": 0,
+            "average_grade": random.choice([None, 1 + 4 * random.random()]),
+        }
+        for student_id in students
+    ]
+    await conn.execute(insert(DBProgress), progress_rows)
+
+    # неопубликованные события: relay должен брать голову очереди по индексу, а не сканировать её
+    await conn.execute(
+        insert(OutboxEvent),
+        [
+            {"event_type": "homework.published", "aggregate_id": row["id"], "payload": {}, "created_at": now}
+            for row in hw_rows
+        ],
+    )
+
+    # ключи дедупликации за неделю: чистка по TTL должна идти по индексу processed_at
+    await conn.execute(
+        insert(ProcessedPayment),
+        [{"key": uuid4(), "processed_at": now - timedelta(seconds=i * 60)} for i in range(homeworks)],
+    )
+
+    await conn.execute(insert(DBStats), [{"homework_id": row["id"], "histogram": {}} for row in hw_rows])
+
+    # закрытые ДЗ уже архивированы, у студентов есть вклад архивированных решений
+    await conn.execute(
+        insert(HomeworkArchive),
+        [
+            {"homework_id": row["id"], "parts": 1, "solutions": 10, "started_at": now, "finished_at": now}
+            for row in hw_rows
+            if row["status"] == HomeworkStatus.CLOSED
+        ],
+    )
+    await conn.execute(
+        insert(ArchivedProgress),
+        [{"student_id": student_id, "total_homeworks": 1, "completed_homeworks": 1, "grade_sum": 5}
+         for student_id in students],
+    )
+
+    for table in (
+        "homeworks", "solutions", "student_progress", "outbox", "processed_payments", "homework_stats",
+        "homework_archives", "archived_progress",
+    ):
+        await conn.execute(text(f"ANALYZE {table}"))
+
+    hw = hw_rows[0]
+    sol = sol_rows[0]
+    submitted = Solution.model_validate(sol | {"status": SolutionStatus.SUBMITTED})
+    graded = submitted.model_copy(update={"status": SolutionStatus.GRADED, "grade": 5})
+    return {
+        "new_solution": submitted.model_copy(update={"id": uuid4()}),
+        "course_ids": courses[:10],
+        "transition": (submitted, graded),
+        "course_id": hw["course_id"],
+        "progress_course_id": progress_rows[0]["course_id"],
+        "homework_id": hw["id"],
+        "cursor": Cursor(hw["created_at"], hw["id"]),
+        "solution_id": sol["id"],
+        # чистка раз в час удаляет только самый старый час ключей
+        "purge_before": now - timedelta(seconds=(homeworks - 60) * 60),
+        "student_id": sol["student_id"],
+    }
+
+
+async def capture(conn, ids: dict) -> list[tuple[str, str, tuple]]:
+    """Вызвать методы репозиториев и собрать выполненные ими запросы"""
+    captured = []
+    label = ""
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(CHECKED_PREFIXES):
+            # у executemany план один на все наборы параметров
+            captured.append((label, statement, parameters[0] if executemany else parameters))
+
+    uow = UnitOfWork(lambda: AsyncSession(bind=conn, join_transaction_mode="create_savepoint"))
+    hw, sol, prog, outbox, payments = uow.homeworks, uow.solutions, uow.progress, uow.outbox, uow.payments
+    stats, archives = uow.stats, uow.archives
+    calls = [
+        ("HomeworkRepo.get_homeworks", lambda: hw.get_homeworks()),
+        ("HomeworkRepo.get_homeworks(after)", lambda: hw.get_homeworks(ids["cursor"])),
+        ("HomeworkRepo.get_homeworks_by_course", lambda: hw.get_homeworks_by_course(ids["course_id"])),
+        ("HomeworkRepo.get_homework_by_id", lambda: hw.get_homework_by_id(ids["homework_id"])),
+        ("HomeworkRepo.search_homeworks", lambda: hw.search_homeworks("term1 term2")),
+        ("HomeworkRepo.set_status", lambda: hw.set_status(ids["homework_id"], HomeworkStatus.CREATED)),
+        ("HomeworkRepo.publish_homework", lambda: hw.publish_homework(ids["homework_id"])),
+        ("HomeworkRepo.activate_by_course", lambda: hw.activate_by_course(ids["course_id"])),
+        ("HomeworkRepo.activate_by_courses", lambda: hw.activate_by_courses(ids["course_ids"])),
+        ("HomeworkRepo.close_homework", lambda: hw.close_homework(ids["homework_id"])),
+        ("SolutionRepo.create_submitted", lambda: sol.create_submitted(ids["new_solution"])),
+        ("SolutionRepo.get_solution_by_id", lambda: sol.get_solution_by_id(ids["solution_id"])),
+        ("SolutionRepo.get_solutions_by_homework", lambda: sol.get_solutions_by_homework(ids["homework_id"])),
+        ("SolutionRepo.get_solutions_by_student", lambda: sol.get_solutions_by_student(ids["student_id"])),
+        ("SolutionRepo.search_solutions", lambda: sol.search_solutions(ids["homework_id"], "term1 -term2")),
+        ("SolutionRepo.get_minhashes", lambda: sol.get_minhashes(ids["homework_id"])),
+        ("SolutionRepo.get_unsigned_answers", lambda: sol.get_unsigned_answers(ids["solution_id"], 1000)),
+        ("SolutionRepo.set_minhashes", lambda: sol.set_minhashes([(ids["solution_id"], b"sig")])),
+        ("SolutionRepo.lock_solutions", lambda: sol.lock_solutions([ids["solution_id"]])),
+        ("SolutionRepo.grade_solutions", lambda: sol.grade_solutions([(ids["solution_id"], 4, None)])),
+        ("SolutionRepo.return_solution", lambda: sol.return_solution(ids["solution_id"], "again")),
+        ("SolutionRepo.grade_solution", lambda: sol.grade_solution(ids["solution_id"], 5)),
+        ("ProgressRepo.add_submission", lambda: prog.add_submission(ids["student_id"], ids["homework_id"])),
+        ("ProgressRepo.apply_transition", lambda: prog.apply_transition(*ids["transition"])),
+        ("ProgressRepo.course_averages", lambda: prog.course_averages(ids["progress_course_id"])),
+        ("ProgressRepo.get_progress_by_student", lambda: prog.get_progress_by_student(ids["student_id"])),
+        ("ProgressRepo.update_progress_by_solution", lambda: prog.update_progress_by_solution(ids["student_id"])),
+        ("HomeworkStatsRepo.get", lambda: stats.get(ids["homework_id"])),
+        ("HomeworkStatsRepo.add_submission", lambda: stats.add_submission(ids["homework_id"])),
+        ("HomeworkStatsRepo.apply_transitions", lambda: stats.apply_transitions([ids["transition"]])),
+        ("OutboxRepo.add", lambda: outbox.add("homework.published", [(ids["homework_id"], {})])),
+        ("OutboxRepo.claim", lambda: outbox.claim(500)),
+        ("ProcessedPaymentRepo.record", lambda: payments.record([uuid4(), uuid4()])),
+        ("ProcessedPaymentRepo.purge", lambda: payments.purge(ids["purge_before"])),
+        ("ArchiveRepo.lock", lambda: archives.lock(ids["homework_id"])),
+        ("ArchiveRepo.get", lambda: archives.get(ids["homework_id"])),
+        ("SolutionRepo.delete_oldest", lambda: sol.delete_oldest(ids["homework_id"], 1000)),
+        ("ArchiveRepo.add_progress", lambda: archives.add_progress([ids["transition"][1]])),
+        ("ArchiveRepo.checkpoint", lambda: archives.checkpoint(ids["homework_id"], 1, 1)),
+        ("ArchiveRepo.finish", lambda: archives.finish(ids["homework_id"])),
+    ]
+
+    event.listen(conn.sync_connection, "before_cursor_execute", on_execute)
+    try:
+        async with uow:
+            for label, call in calls:
+                await call()
+    finally:
+        event.remove(conn.sync_connection, "before_cursor_execute", on_execute)
+        await uow.close()
+    return captured
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan["Node Type"] == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+async def main(args) -> int:
+    init_db()
+    failed = 0
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            ids = await seed(conn, args.homeworks, args.solutions)
+            for label, statement, params in await capture(conn, ids):
+                result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params)
+                plan = result.scalar()[0]["Plan"]
+                scans = seq_scans(plan)
+                status = "FAIL" if scans else "ok"
+                failed += bool(scans)
+                print(f"{status:<5} {label:<45} {plan['Node Type']}"
+                      + (f"  seq scan on {', '.join(scans)}" if scans else ""))
+                if scans and args.verbose:
+                    print("      " + " ".join(statement.split()))
+        finally:
+            await trans.rollback()
+    await async_engine.dispose()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--homeworks", type=int, default=20_000)
+    parser.add_argument("--solutions", type=int, default=200_000)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
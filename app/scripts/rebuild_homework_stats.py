@@ -0,0 +1,46 @@
+# app/scripts/rebuild_homework_stats.py
+"""Сверка статистики ДЗ (homework_stats) с полным пересчётом по solutions.
+
+    python -m app.scripts.rebuild_homework_stats             # только отчёт
+    python -m app.scripts.rebuild_homework_stats --rebuild   # пересчитать все ДЗ
+
+Пересчёт идёт одним INSERT ... SELECT ... ON CONFLICT DO UPDATE по всей таблице.
+Код возврата 1, если найдены расхождения и статистика не пересчитана.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.database import async_engine
+from app.repos.stats_repo import COUNTERS
+from app.unit_of_work import open_uow
+
+
+async def main(args) -> int:
+    async with open_uow() as uow:
+        async with uow:
+            drift = await uow.stats.find_drift(args.limit)
+            for row in drift:
+                print(
+                    f"{row['homework_id']}: "
+                    + " | ".join(
+                        f"{name} {row[name]} != {row[f'expected_{name}']}"
+                        for name in (*COUNTERS, "histogram")
+                        if row[name] != row[f"expected_{name}"]
+                    )
+                )
+            if args.rebuild:
+                rebuilt = await uow.stats.rebuild()
+                print(f"{rebuilt} homework(s) recomputed")
+    await async_engine.dispose()
+
+    print(f"{len(drift)} homework(s) drifted" + (", rebuilt" if args.rebuild and drift else ""))
+    return 1 if drift and not args.rebuild else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--limit", type=int, default=10_000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,41 @@
+# app/scripts/reconcile_progress.py
+"""Сверка инкрементальных счётчиков прогресса с полным пересчётом по solutions.
+
+    python -m app.scripts.reconcile_progress          # только отчёт
+    python -m app.scripts.reconcile_progress --fix    # пересчитать разошедшиеся
+
+Код возврата 1, если найдены расхождения и они не исправлены.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.database import async_engine
+from app.unit_of_work import open_uow
+
+
+async def main(args) -> int:
+    async with open_uow() as uow:
+        async with uow:
+            drift = await uow.progress.find_drift(args.limit)
+            for row in drift:
+                print(
+                    f"{row['student_id']}: "
+                    f"total {row['total_homeworks']} != {row['expected_total']} | "
+                    f"completed {row['completed_homeworks']} != {row['expected_completed']} | "
+                    f"grade_sum {row['grade_sum']} != {row['expected_grade_sum']}"
+                )
+                if args.fix:
+                    await uow.progress.update_progress_by_solution(row["student_id"])
+    await async_engine.dispose()
+
+    print(f"{len(drift)} student(s) drifted" + (", fixed" if args.fix and drift else ""))
+    return 1 if drift and not args.fix else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fix", action="store_true")
+    parser.add_argument("--limit", type=int, default=10_000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,110 +1,408 @@
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Callable
 from uuid import UUID, uuid4
 from datetime import datetime
+from fastapi import Depends
 
-from app.models.homework import Homework, HomeworkStatus, HomeworkProgress
-from app.models.solution import Solution, SolutionStatus
+from app.archive import load_part, read_page, write_part
+from app.leaderboard import leaderboard
+from app.replica import use_primary
+from app.settings import settings
+from app.similarity import minhash, similarity
+from app.unit_of_work import UnitOfWork, get_uow, open_uow
+from app.models.events import EventType
+from app.models.homework import Homework, HomeworkStatus, HomeworkProgress, HomeworkStats, LeaderboardEntry
+from app.models.pagination import Cursor, DEFAULT_PAGE_SIZE, SearchCursor
+from app.models.solution import GradeResult, SimilarSolutions, Solution, SolutionStatus
 from app.models.requests import (
+    CloseHomeworkRequest,
     CreateHomeworkRequest,
     PublishHomeworkRequest,
     SubmitSolutionRequest,
     ReturnSolutionRequest,
     GradeSolutionRequest,
 )
-from app.repos.homework_repo import HomeworkRepo
-from app.repos.solution_repo import SolutionRepo
-from app.repos.progress_repo import ProgressRepo
 
 class HomeworkService:
-    def __init__(self) -> None:
-        self.hw_repo = HomeworkRepo()
-        self.sol_repo = SolutionRepo()
-        self.prog_repo = ProgressRepo()
-
-    def publish_homework(self, dto: PublishHomeworkRequest) -> Homework:
-        hw = self.hw_repo.get_homework_by_id(dto.homework_id)
-        if hw.status != HomeworkStatus.CREATED:
-            raise ValueError("Homework is not in CREATED status")
-        return self.hw_repo.publish_homework(dto.homework_id)
-
-    def submit_solution(self, dto: SubmitSolutionRequest) -> Solution:
-
-        hw = self.hw_repo.get_homework_by_id(dto.homework_id)
-        if hw.status != HomeworkStatus.ACTIVE:
-            raise ValueError("Homework is not active")
-
-        sol = Solution(
-            id=uuid4(),
-            homework_id=hw.id,
-            student_id=dto.student_id,
-            answer=dto.answer,
-            status=SolutionStatus.DRAFT,
-            created_at=datetime.utcnow(),
-            submitted_at=None,
-            grade=None,
-            feedback=None,
-        )
-        created_sol = self.sol_repo.create_solution(sol)
-
-        submitted_sol = self.sol_repo.submit_solution(created_sol.id)
-        return submitted_sol
-
-    def return_solution(self, dto: ReturnSolutionRequest) -> Solution:
-        sol = self.sol_repo.get_solution_by_id(dto.solution_id)
-        if sol.status not in [SolutionStatus.SUBMITTED, SolutionStatus.GRADED]:
-            raise ValueError("Solution cannot be returned")
-        return self.sol_repo.return_solution(dto.solution_id, dto.feedback)
-
-    def grade_solution(self, dto: GradeSolutionRequest) -> Solution:
-        sol = self.sol_repo.get_solution_by_id(dto.solution_id)
-        if sol.status not in [SolutionStatus.SUBMITTED, SolutionStatus.RETURNED]:
-            raise ValueError("Solution cannot be graded")
-
-        graded_sol = self.sol_repo.grade_solution(
-            dto.solution_id,
-            dto.grade,
-            dto.feedback,
-        )
+    def __init__(self, uow: UnitOfWork = Depends(get_uow)) -> None:
+        self.uow = uow
+        self.hw_repo = uow.homeworks
+        self.sol_repo = uow.solutions
+        self.prog_repo = uow.progress
+        self.stats_repo = uow.stats
+        self.outbox = uow.outbox
+
+    async def _emit(self, event_type: EventType, items: list[Homework] | list[Solution]) -> None:
+        """Событие на каждый объект пишется в outbox в той же транзакции"""
+        await self.outbox.add(event_type.value, [(item.id, item.model_dump(mode="json")) for item in items])
+
+    def _sync_leaderboard(self, rows: list[tuple[UUID, UUID, float | None]]) -> None:
+        """Новые средние попадают в рейтинг только после commit"""
+        async def apply() -> None:
+            leaderboard.update(rows)
+        if rows:
+            self.uow.after_commit(apply)
+
+    def _index_solution(self, sol: Solution, signature: bytes) -> None:
+        """Новое решение попадает в индекс похожих только после commit"""
+        async def apply() -> None:
+            similarity.add(sol.homework_id, (sol.id, sol.student_id, signature))
+        self.uow.after_commit(apply)
+
+    async def publish_homework(self, dto: PublishHomeworkRequest) -> Homework:
+        async with self.uow:
+            hw = await self.hw_repo.publish_homework(dto.homework_id)
+            if hw is None:
+                raise ValueError("Homework is not in CREATED status")
+            await self._emit(EventType.HOMEWORK_PUBLISHED, [hw])
+            return hw
+
+    async def close_homework(self, dto: CloseHomeworkRequest) -> Homework:
+        async with self.uow:
+            hw = await self.hw_repo.close_homework(dto.homework_id)
+            if hw is None:
+                raise ValueError("Homework is not in ACTIVE status")
+            await self._emit(EventType.HOMEWORK_CLOSED, [hw])
+            return hw
+
+    async def archive_homework(self, homework_id: UUID, chunk_size: int | None = None) -> int:
+        """Перенести решения закрытого ДЗ из solutions в файлы архива (app.archive).
+
+        Каждая часть - своя транзакция: удалить chunk_size самых ранних решений,
+        записать их в файл, запомнить их вклад в прогресс и сдвинуть чекпоинт.
+        В памяти не больше одной части; прерванную архивацию можно просто
+        запустить снова. Возвращает число решений, перенесённых этим запуском.
+        """
+        chunk_size = chunk_size or settings.archive_chunk_size
+        async with self.uow:
+            hw = await self.hw_repo.get_homework_by_id(homework_id)
+            if hw.status != HomeworkStatus.CLOSED:
+                raise ValueError("Homework is not closed")
+        archived = 0
+        while True:
+            async with self.uow:
+                archive = await self.uow.archives.lock(homework_id)
+                if archive.finished_at is not None:
+                    return archived
+                solutions = await self.sol_repo.delete_oldest(homework_id, chunk_size)
+                if not solutions:
+                    await self.uow.archives.finish(homework_id)
+                    return archived
+                # файл - до commit: упадёт запись - удаление откатится
+                await asyncio.to_thread(write_part, homework_id, archive.parts, solutions)
+                await self.uow.archives.add_progress(solutions)
+                await self.uow.archives.checkpoint(homework_id, archive.parts + 1, len(solutions))
+            archived += len(solutions)
+
+    async def _archived_parts(self, homework_id: UUID) -> int:
+        async with self.uow:
+            archive = await self.uow.archives.get(homework_id)
+        if archive is None:
+            raise KeyError
+        return archive.parts
+
+    async def get_archived_solutions(
+        self,
+        homework_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Solution]:
+        parts = await self._archived_parts(homework_id)
+        return await asyncio.to_thread(read_page, homework_id, parts, after, limit)
+
+    async def stream_archived_solutions(self, homework_id: UUID) -> AsyncIterator[Solution]:
+        """KeyError - сразу, до начала ответа; дальше файлы читаются по одной части"""
+        parts = await self._archived_parts(homework_id)
+
+        async def items() -> AsyncIterator[Solution]:
+            for part in range(parts):
+                for s in await asyncio.to_thread(load_part, homework_id, part):
+                    yield s
+        return items()
+
+    async def submit_solution(self, dto: SubmitSolutionRequest) -> Solution:
+        # подпись считается до транзакции и в потоке: на длинном ответе это десятки мс CPU
+        signature = await asyncio.to_thread(minhash, dto.answer)
+        async with self.uow:
+            now = datetime.utcnow()
+            sol = await self.sol_repo.create_submitted(
+                Solution(
+                    id=uuid4(),
+                    homework_id=dto.homework_id,
+                    student_id=dto.student_id,
+                    answer=dto.answer,
+                    status=SolutionStatus.SUBMITTED,
+                    created_at=now,
+                    submitted_at=now,
+                    grade=None,
+                    feedback=None,
+                ),
+                signature,
+            )
+            if sol is None:
+                # KeyError, если ДЗ нет вовсе
+                await self.hw_repo.get_homework_by_id(dto.homework_id)
+                raise ValueError("Homework is not active")
+            await self.prog_repo.add_submission(dto.student_id, dto.homework_id)
+            await self.stats_repo.add_submission(dto.homework_id)
+            self._index_solution(sol, signature)
+            return sol
+
+    async def return_solution(self, dto: ReturnSolutionRequest) -> Solution:
+        async with self.uow:
+            changed = await self.sol_repo.return_solution(dto.solution_id, dto.feedback)
+            if changed is None:
+                raise ValueError("Solution cannot be returned")
+            self._sync_leaderboard(await self.prog_repo.apply_transition(*changed))
+            await self.stats_repo.apply_transitions([changed])
+            await self._emit(EventType.SOLUTION_RETURNED, [changed[1]])
+            return changed[1]
+
+    async def grade_solution(self, dto: GradeSolutionRequest) -> Solution:
+        async with self.uow:
+            # прежняя оценка читается под блокировкой в том же UPDATE,
+            # так что параллельная переоценка не посчитает дельту от устаревшего значения
+            changed = await self.sol_repo.grade_solution(dto.solution_id, dto.grade, dto.feedback)
+            if changed is None:
+                raise ValueError("Solution cannot be graded")
+            self._sync_leaderboard(await self.prog_repo.apply_transition(*changed))
+            await self.stats_repo.apply_transitions([changed])
+            await self._emit(EventType.SOLUTION_GRADED, [changed[1]])
+            return changed[1]
+
+    async def grade_solutions(self, dtos: list[GradeSolutionRequest]) -> list[GradeResult]:
+        """Оценить пачку решений в одной транзакции.
+
+        Статусы проверяются по одному SELECT ... FOR UPDATE, оценки ставятся одним
+        UPDATE, прогресс каждого студента меняется один раз. Решения, которые
+        нельзя оценить, попадают в результат с ошибкой и не мешают остальным.
+        """
+        async with self.uow:
+            current = {
+                s.id: s
+                for s in await self.sol_repo.lock_solutions([dto.solution_id for dto in dtos])
+            }
+            results, accepted = [], {}
+            for dto in dtos:
+                sol = current.get(dto.solution_id)
+                if sol is None:
+                    error = "Solution not found"
+                elif dto.solution_id in accepted:
+                    error = "Solution is graded twice in one batch"
+                elif sol.status not in [SolutionStatus.SUBMITTED, SolutionStatus.RETURNED]:
+                    error = "Solution cannot be graded"
+                else:
+                    error = None
+                    accepted[dto.solution_id] = dto
+                results.append(GradeResult(solution_id=dto.solution_id, ok=error is None, error=error))
 
-        try:
-            self.prog_repo.update_progress_by_solution(graded_sol.student_id)
-        except KeyError:
-            pass  
+            graded = await self.sol_repo.grade_solutions(
+                [(dto.solution_id, dto.grade, dto.feedback) for dto in accepted.values()]
+            )
+            transitions = [(current[s.id], s) for s in graded]
+            self._sync_leaderboard(await self.prog_repo.apply_transitions(transitions))
+            await self.stats_repo.apply_transitions(transitions)
+            await self._emit(EventType.SOLUTION_GRADED, graded)
 
-        return graded_sol
+            by_id = {s.id: s for s in graded}
+            for result in results:
+                if result.ok:
+                    result.solution = by_id[result.solution_id]
+            return results
 
-    def get_student_progress(self, student_id: UUID) -> HomeworkProgress:
-        try:
-            return self.prog_repo.get_progress_by_student(student_id)
-        except KeyError:
-            raise ValueError("Progress not found")
+    async def get_homework_stats(self, homework_id: UUID) -> HomeworkStats:
+        async with self.uow:
+            return await self.stats_repo.get(homework_id)
 
-    def update_progress(self, student_id: UUID) -> HomeworkProgress:
-        return self.prog_repo.update_progress_by_solution(student_id)
+    async def get_student_progress(self, student_id: UUID) -> HomeworkProgress:
+        async with self.uow:
+            try:
+                return await self.prog_repo.get_progress_by_student(student_id)
+            except KeyError:
+                raise ValueError("Progress not found")
 
+    async def update_progress(self, student_id: UUID) -> HomeworkProgress:
+        async with self.uow:
+            p = await self.prog_repo.update_progress_by_solution(student_id)
+            self._sync_leaderboard([(p.student_id, p.course_id, p.average_grade)])
+            return p
 
-    def create_homework(self, dto: CreateHomeworkRequest) -> Homework:
-        hw = Homework(
-            id=uuid4(),
-            course_id=dto.course_id,
-            title=dto.title,
-            description=dto.description,
-            created_at=datetime.utcnow(),
-            published_at=None,
-            status=HomeworkStatus.CREATED,
+    async def _course_board(self, course_id: UUID):
+        async def load() -> list[tuple[UUID, float]]:
+            # перечитывание идёт в фоне и может пережить запрос: своя сессия;
+            # из primary - иначе обновления, не доехавшие до реплики, пропали бы до TTL
+            with use_primary():
+                async with open_uow() as uow:
+                    async with uow:
+                        return await uow.progress.course_averages(course_id)
+        return await leaderboard.board(course_id, load)
+
+    async def get_leaderboard(self, course_id: UUID, limit: int) -> list[LeaderboardEntry]:
+        return (await self._course_board(course_id)).top(limit)
+
+    async def get_student_rank(self, course_id: UUID, student_id: UUID) -> LeaderboardEntry:
+        entry = (await self._course_board(course_id)).rank(student_id)
+        if entry is None:
+            raise KeyError
+        return entry
+
+    async def get_similar_solutions(
+        self, homework_id: UUID, threshold: float, limit: int
+    ) -> list[SimilarSolutions]:
+        async def load() -> list[tuple[UUID, UUID, bytes]]:
+            # своя сессия, из primary - как у рейтинга курса
+            with use_primary():
+                async with open_uow() as uow:
+                    async with uow:
+                        return await uow.solutions.get_minhashes(homework_id)
+        return (await similarity.index(homework_id, load)).similar(threshold, limit)
+
+    async def create_homework(self, dto: CreateHomeworkRequest) -> Homework:
+        async with self.uow:
+            hw = Homework(
+                id=uuid4(),
+                course_id=dto.course_id,
+                title=dto.title,
+                description=dto.description,
+                created_at=datetime.utcnow(),
+                published_at=None,
+                status=HomeworkStatus.CREATED,
+            )
+            return await self.hw_repo.create_homework(hw)
+
+    async def create_homeworks(self, dtos: list[CreateHomeworkRequest]) -> list[Homework]:
+        """Импорт программы курса: вся пачка в одной транзакции"""
+        now = datetime.utcnow()
+        homeworks = [
+            Homework(
+                id=uuid4(),
+                course_id=dto.course_id,
+                title=dto.title,
+                description=dto.description,
+                created_at=now,
+                published_at=None,
+                status=HomeworkStatus.CREATED,
+            )
+            for dto in dtos
+        ]
+        async with self.uow:
+            return await self.hw_repo.create_homeworks(homeworks)
+
+    async def get_homeworks(
+        self,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Homework]:
+        async with self.uow:
+            return await self.hw_repo.get_homeworks(after, limit)
+
+    async def get_homeworks_by_course(
+        self,
+        course_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Homework]:
+        async with self.uow:
+            return await self.hw_repo.get_homeworks_by_course(course_id, after, limit)
+
+    async def search_homeworks(
+        self,
+        q: str,
+        after: SearchCursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[tuple[Homework, float]]:
+        async with self.uow:
+            return await self.hw_repo.search_homeworks(q, after, limit)
+
+    async def _emit_activated(self, activated: list[Homework]) -> None:
+        """Одно событие на курс со списком активированных ДЗ"""
+        by_course = defaultdict(list)
+        for hw in activated:
+            by_course[hw.course_id].append(str(hw.id))
+        await self.outbox.add(
+            EventType.HOMEWORKS_ACTIVATED.value,
+            [
+                (course_id, {"course_id": str(course_id), "homework_ids": homework_ids})
+                for course_id, homework_ids in by_course.items()
+            ],
         )
-        return self.hw_repo.create_homework(hw)
 
-    def get_homeworks(self) -> list[Homework]:
-        return self.hw_repo.get_homeworks()
+    async def activate_homeworks_by_course(self, course_id: UUID) -> list[Homework]:
+        async with self.uow:
+            activated = await self.hw_repo.activate_by_course(course_id)
+            await self._emit_activated(activated)
+            return activated
+
+    async def activate_homeworks_by_courses(self, course_ids: list[UUID]) -> list[Homework]:
+        async with self.uow:
+            activated = await self.hw_repo.activate_by_courses(course_ids)
+            await self._emit_activated(activated)
+            return activated
+
+    async def apply_payments(self, payments: list[tuple[UUID, list[UUID]]]) -> tuple[list[Homework], list[bool]]:
+        """Платежи (course_id, ключи дедупликации): активировать курсы только по новым.
+
+        Ключи записываются в той же транзакции, что и активация: при сбое
+        откатятся вместе с ней, и повторная доставка будет обработана заново.
+        Возвращает активированные ДЗ и признак дубля для каждого платежа.
+        """
+        async with self.uow:
+            new_keys = await self.uow.payments.record([key for _, keys in payments for key in keys])
+            duplicate = [any(key not in new_keys for key in keys) for _, keys in payments]
+            course_ids = {course_id for (course_id, _), dup in zip(payments, duplicate) if not dup}
+            activated = await self.hw_repo.activate_by_courses(list(course_ids)) if course_ids else []
+            await self._emit_activated(activated)
+            return activated, duplicate
+
+    async def purge_processed_payments(self, before: datetime) -> int:
+        async with self.uow:
+            return await self.uow.payments.purge(before)
+
+    async def get_solutions_by_student(
+        self,
+        student_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Solution]:
+        async with self.uow:
+            return await self.sol_repo.get_solutions_by_student(student_id, after, limit)
+
+    async def get_solutions_by_homework(
+        self,
+        homework_id: UUID,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[Solution]:
+        async with self.uow:
+            return await self.sol_repo.get_solutions_by_homework(homework_id, after, limit)
+
+    async def search_solutions(
+        self,
+        homework_id: UUID,
+        q: str,
+        after: SearchCursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[tuple[Solution, float]]:
+        async with self.uow:
+            return await self.sol_repo.search_solutions(homework_id, q, after, limit)
+
+    async def _stream(self, pick: Callable[[UnitOfWork], AsyncIterator]) -> AsyncIterator:
+        # Потоковый ответ дочитывается уже после выхода из обработчика,
+        # поэтому у него своя сессия, а не сессия запроса
+        async with open_uow() as uow:
+            async with uow:
+                async for item in pick(uow):
+                    yield item
 
-    def get_homeworks_by_course(self, course_id: UUID) -> list[Homework]:
-        return self.hw_repo.get_homeworks_by_course(course_id)
+    def stream_homeworks(self) -> AsyncIterator[Homework]:
+        return self._stream(lambda uow: uow.homeworks.stream_homeworks())
 
-    def activate_homeworks_by_course(self, course_id: UUID) -> None:
-        self.hw_repo.activate_by_course(course_id)
+    def stream_homeworks_by_course(self, course_id: UUID) -> AsyncIterator[Homework]:
+        return self._stream(lambda uow: uow.homeworks.stream_homeworks_by_course(course_id))
 
-    def get_solutions_by_student(self, student_id: UUID) -> list[Solution]:
-        return self.sol_repo.get_solutions_by_student(student_id)
+    def stream_solutions_by_student(self, student_id: UUID) -> AsyncIterator[Solution]:
+        return self._stream(lambda uow: uow.solutions.stream_solutions_by_student(student_id))
 
-    def get_solutions_by_homework(self, homework_id: UUID) -> list[Solution]:
-        return self.sol_repo.get_solutions_by_homework(homework_id)
+    def stream_solutions_by_homework(self, homework_id: UUID) -> AsyncIterator[Solution]:
+        return self._stream(lambda uow: uow.solutions.stream_solutions_by_homework(homework_id))
@@ -11,17 +11,86 @@
 # app/settings.py
 # app/settings.py
 # app/settings.py
+import logging
 import os
 import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
 
 class Settings:
     def __init__(self):
         # Полностью игнорируем переменную окружения, используем жестко заданный URL
         self.postgres_url = self._get_safe_postgres_url()
         self.amqp_url = self._get_safe_amqp_url()
-        
-        print(f"Using PostgreSQL URL: {self.postgres_url}")
-        print(f"Using AMQP URL: {self.amqp_url}")
+
+        # Реплика для чтения (app.replica): без POSTGRES_REPLICA_URL всё идёт в primary.
+        # GET-запросы читают с неё, пока отставание не больше REPLICA_MAX_LAG секунд;
+        # отставание замеряется раз в REPLICA_LAG_CHECK_INTERVAL секунд
+        self.postgres_replica_url = os.getenv("POSTGRES_REPLICA_URL") or None
+        self.replica_max_lag = self._get_float("REPLICA_MAX_LAG", 1.0)
+        self.replica_lag_check_interval = self._get_float("REPLICA_LAG_CHECK_INTERVAL", 1.0)
+
+        # Consumer событий об оплате
+        self.payment_queue = os.getenv("PAYMENT_QUEUE", "payment_success")
+        self.payment_dead_letter_queue = os.getenv("PAYMENT_DEAD_LETTER_QUEUE", "payment_success.dead")
+        # Отложенные повторы при недоступной БД: сообщение ждёт в PAYMENT_RETRY_QUEUE
+        # PAYMENT_RETRY_DELAY * 2^(попытка - 1) секунд, но не дольше PAYMENT_RETRY_MAX_DELAY
+        self.payment_retry_queue = os.getenv("PAYMENT_RETRY_QUEUE", "payment_success.retry")
+        self.payment_retry_delay = self._get_float("PAYMENT_RETRY_DELAY", 5.0)
+        self.payment_retry_max_delay = self._get_float("PAYMENT_RETRY_MAX_DELAY", 300.0)
+        self.payment_prefetch = self._get_int("PAYMENT_PREFETCH", 200)
+        self.payment_workers = self._get_int("PAYMENT_WORKERS", 4)
+        self.payment_batch_size = self._get_int("PAYMENT_BATCH_SIZE", 50)
+        self.consumer_stats_interval = self._get_int("CONSUMER_STATS_INTERVAL", 60)
+        # Дедупликация платежей: ключи живут в processed_payments PAYMENT_DEDUP_TTL секунд,
+        # последние PAYMENT_DEDUP_CACHE_SIZE ещё и в памяти, чтобы дубль не шёл в БД
+        self.payment_dedup_ttl = self._get_int("PAYMENT_DEDUP_TTL", 7 * 24 * 3600)
+        self.payment_dedup_cache_size = self._get_int("PAYMENT_DEDUP_CACHE_SIZE", 100_000)
+        self.payment_dedup_cleanup_interval = self._get_int("PAYMENT_DEDUP_CLEANUP_INTERVAL", 3600)
+
+        # Outbox relay: доменные события в topic exchange, пачками с publisher confirms
+        self.outbox_exchange = os.getenv("OUTBOX_EXCHANGE", "homework.events")
+        self.outbox_batch_size = self._get_int("OUTBOX_BATCH_SIZE", 500)
+        self.outbox_poll_interval = self._get_float("OUTBOX_POLL_INTERVAL", 0.5)
+
+        # Кэш чтений ДЗ: memory (в процессе), redis (общий для реплик) или off
+        self.cache_backend = os.getenv("CACHE_BACKEND", "memory").lower()
+        self.cache_url = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+        self.cache_ttl = self._get_int("CACHE_TTL", 60)
+        self.cache_max_size = self._get_int("CACHE_MAX_SIZE", 10_000)
+
+        # Рейтинг курса в памяти процесса: перечитывается из БД раз в LEADERBOARD_TTL секунд
+        self.leaderboard_ttl = self._get_int("LEADERBOARD_TTL", 300)
+        self.leaderboard_max_courses = self._get_int("LEADERBOARD_MAX_COURSES", 1000)
+
+        # LSH-индекс похожих решений ДЗ в памяти процесса: перечитывается раз в SIMILARITY_TTL секунд
+        self.similarity_ttl = self._get_int("SIMILARITY_TTL", 300)
+        self.similarity_max_homeworks = self._get_int("SIMILARITY_MAX_HOMEWORKS", 100)
+
+        # Решения закрытых ДЗ после архивации: ARCHIVE_DIR/<homework_id>/part-*.jsonl.gz
+        # частями по ARCHIVE_CHUNK_SIZE; каждая часть - одна транзакция удаления из solutions
+        self.archive_dir = os.getenv("ARCHIVE_DIR", str(Path(__file__).resolve().parent.parent / "archive"))
+        self.archive_chunk_size = self._get_int("ARCHIVE_CHUNK_SIZE", 1000)
+
+        # answer, feedback и description от COMPRESS_THRESHOLD байт до порога TOAST хранятся сжатыми zlib
+        self.compress_threshold = self._get_int("COMPRESS_THRESHOLD", 512)
+
+        # Списки отдаются сериализацией pydantic-core в обход повторной валидации response_model
+        self.fast_json = self._get_bool("FAST_JSON", False)
+
+        # GET /metrics и сбор латентности, SQL-статистики и ожидания пула
+        self.metrics_enabled = self._get_bool("METRICS_ENABLED", True)
+
+        # Dev-режим: X-Query-Count / X-Query-Budget / X-Query-Repeated в каждом ответе
+        self.query_budgets = self._get_bool("QUERY_BUDGETS", False)
+
+        # Логи пишутся через очередь; SQL целиком - только с SQL_ECHO,
+        # иначе лишь запросы дольше SLOW_QUERY_MS (доля SLOW_QUERY_SAMPLE_RATE)
+        self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.sql_echo = self._get_bool("SQL_ECHO", False)
+        self.slow_query_ms = self._get_int("SLOW_QUERY_MS", 200)
+        self.slow_query_sample_rate = self._get_float("SLOW_QUERY_SAMPLE_RATE", 1.0)
     
     def _get_safe_postgres_url(self) -> str:
         """Получаем безопасный URL для PostgreSQL"""
@@ -34,12 +103,12 @@ class Settings:
             
             # Проверяем на наличие проблемных символов
             if not self._is_valid_utf8(env_url):
-                print("Warning: POSTGRES_URL contains invalid UTF-8 characters, using default")
+                logger.warning("POSTGRES_URL contains invalid UTF-8 characters, using default")
                 return default_url
             
             # Проверяем, что URL похож на валидный
             if not env_url.startswith(("postgresql://", "postgres://")):
-                print("Warning: POSTGRES_URL format is invalid, using default")
+                logger.warning("POSTGRES_URL format is invalid, using default")
                 return default_url
                 
             return env_url
@@ -54,13 +123,35 @@ class Settings:
             env_url = os.getenv("AMQP_URL", default_url)
             
             if not self._is_valid_utf8(env_url):
-                print("Warning: AMQP_URL contains invalid UTF-8 characters, using default")
+                logger.warning("AMQP_URL contains invalid UTF-8 characters, using default")
                 return default_url
             
             return env_url
         except:
             return default_url
     
+    def _get_int(self, name: str, default: int) -> int:
+        """Целое положительное число из переменной окружения"""
+        try:
+            value = int(os.getenv(name, default))
+            return value if value > 0 else default
+        except ValueError:
+            logger.warning(f"{name} is not an integer, using {default}")
+            return default
+
+    def _get_float(self, name: str, default: float) -> float:
+        try:
+            return float(os.getenv(name, default))
+        except ValueError:
+            logger.warning(f"{name} is not a number, using {default}")
+            return default
+    
+    def _get_bool(self, name: str, default: bool) -> bool:
+        value = os.getenv(name)
+        if value is None:
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    
     def _is_valid_utf8(self, text: str) -> bool:
         """Проверяет, является ли строка валидной UTF-8"""
         try:
@@ -0,0 +1,253 @@
+# app/similarity.py
+"""Поиск похожих решений ДЗ (списывание) по MinHash + LSH.
+
+Ответ нормализуется (нижний регистр, пробелы схлопнуты) и режется на
+шинглы - все подстроки по SHINGLE байт UTF-8. MinHash-подпись из
+PERMUTATIONS минимумов хэшей оценивает сходство Жаккара множеств шинглов:
+доля совпавших позиций двух подписей. Подпись считается один раз при
+отправке решения (ответ после этого не меняется) и хранится в
+solutions.minhash; для старых решений её заполняет
+app.scripts.backfill_minhash. Хэширование векторизовано NumPy: все
+PERMUTATIONS хэш-функций считаются одной матричной операцией над шинглами.
+
+Для каждого запрошенного ДЗ в памяти процесса держится LSH-индекс: подпись
+делится на BANDS полос, решения с одинаковой полосой попадают в одну
+корзину. Пары-кандидаты - только соседи по корзинам, так что поиск почти
+линеен по числу решений, а не квадратичен. Пара с сходством s становится
+кандидатом с вероятностью 1 - (1 - s^ROWS)^BANDS: для s = 0.8 это 95%,
+для 0.9 - почти 100%, для 0.5 - 6%; поэтому порог ниже MIN_THRESHOLD не
+принимается. Индекс загружается одним запросом при первом обращении и
+перечитывается через SIMILARITY_TTL секунд (app.reloading); решения этого
+процесса добавляются сразу после commit.
+"""
+
+from collections import defaultdict
+from typing import Awaitable, Callable, Iterable, Iterator
+from uuid import UUID
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.models.solution import SimilarSolutions
+from app.reloading import ReloadingStore
+from app.settings import settings
+
+SHINGLE = 8
+PERMUTATIONS = 128
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+MIN_THRESHOLD = 0.7
+# длиннее - не шинглуется: хватает и начала, а память на хэши ограничена
+MAX_INDEXED_CHARS = 100_000
+# шинглов в одной матрице хэшей (PERMUTATIONS x BLOCK uint64 = 4 МБ)
+BLOCK = 4096
+# с каким числом первых решений корзины сравнивается каждое её решение
+BUCKET_LEADERS = 16
+# пар-кандидатов в одной порции оценки: две выборки подписей по 8 МБ
+CHUNK = 16384
+
+# Параметры хэшей - часть формата подписей в БД: при их смене нужен backfill заново
+_rng = np.random.default_rng(20261018)
+_MIX = _rng.integers(1, 2**63, dtype=np.uint64) | np.uint64(1)
+_A = (_rng.integers(1, 2**63, size=PERMUTATIONS, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_B = _rng.integers(0, 2**63, size=PERMUTATIONS, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+
+# (solution_id, student_id, minhash)
+SignatureRow = tuple[UUID, UUID, bytes]
+
+
+def _shingles(text: str) -> np.ndarray:
+    """Различные 32-битные хэши шинглов текста, по возрастанию"""
+    data = np.frombuffer(" ".join(text[:MAX_INDEXED_CHARS].lower().split()).encode(), dtype=np.uint8)
+    if len(data) < SHINGLE:
+        data = np.pad(data, (0, SHINGLE - len(data)))
+    # SHINGLE = 8 байт - ровно одно 64-битное число: окна читаются как big-endian uint64
+    windows = np.ascontiguousarray(sliding_window_view(data, SHINGLE)).view(">u8").ravel()
+    hashes = np.sort((windows.astype(np.uint64) * _MIX) >> _SHIFT)
+    return hashes[np.concatenate(([True], hashes[1:] != hashes[:-1]))]
+
+
+def _signature(shingles: np.ndarray) -> np.ndarray:
+    """Минимумы PERMUTATIONS хэш-функций по шинглам.
+
+    multiply-shift: (a * x + b) mod 2^64, старшие 32 бита. Матрица
+    PERMUTATIONS x BLOCK считается на месте, чтобы не выходить из кэша.
+    """
+    result = np.full(PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    buffer = np.empty((PERMUTATIONS, min(BLOCK, len(shingles))), dtype=np.uint64)
+    for start in range(0, len(shingles), BLOCK):
+        block = shingles[start:start + BLOCK]
+        hashed = buffer[:, :len(block)]
+        np.multiply(_A[:, None], block, out=hashed)
+        hashed += _B[:, None]
+        np.minimum(result, hashed.min(axis=1), out=result)
+    # порядок 64-битных значений задают старшие биты: сдвиг - уже после минимума
+    return (result >> _SHIFT).astype(np.uint32)
+
+
+def signatures(texts: Iterable[str]) -> np.ndarray:
+    """MinHash-подписи текстов: uint32, по строке из PERMUTATIONS чисел на текст"""
+    rows = [_signature(_shingles(text)) for text in texts]
+    return np.stack(rows) if rows else np.empty((0, PERMUTATIONS), dtype=np.uint32)
+
+
+def to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def minhash(text: str) -> bytes:
+    """Подпись одного ответа в том виде, в каком она хранится в solutions.minhash"""
+    return to_bytes(signatures([text])[0])
+
+
+def _chunks(pairs: list[tuple[np.ndarray, np.ndarray]]) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Склеить накопленные пары и отдать порциями не больше CHUNK"""
+    if not pairs:
+        return
+    first, second = (np.concatenate(column) for column in zip(*pairs))
+    for start in range(0, len(first), CHUNK):
+        yield first[start:start + CHUNK], second[start:start + CHUNK]
+
+
+class HomeworkIndex:
+    def __init__(self, rows: Iterable[SignatureRow]) -> None:
+        self.ids: list[UUID] = []
+        self.students: list[UUID] = []
+        self.signatures: list[bytes] = []
+        self.buckets: list[defaultdict[bytes, list[int]]] = [defaultdict(list) for _ in range(BANDS)]
+        self._positions: dict[UUID, int] = {}
+        # подпись -> первое решение с ней; в корзинах лежат только первые
+        self._first: dict[bytes, int] = {}
+        # первое решение -> более поздние с той же подписью
+        self._copies: defaultdict[int, list[int]] = defaultdict(list)
+        self._arrays: tuple[np.ndarray, np.ndarray] | None = None
+        for row in rows:
+            self.add(*row)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, solution_id: UUID, student_id: UUID, signature: bytes) -> None:
+        if solution_id in self._positions:
+            return
+        position = self._positions[solution_id] = len(self.ids)
+        self.ids.append(solution_id)
+        self.students.append(student_id)
+        self.signatures.append(signature)
+        self._arrays = None
+        first = self._first.setdefault(signature, position)
+        if first != position:
+            self._copies[first].append(position)
+            return
+        width = ROWS * 4
+        for band, buckets in enumerate(self.buckets):
+            buckets[signature[band * width:(band + 1) * width]].append(position)
+
+    def _matrix(self) -> tuple[np.ndarray, np.ndarray]:
+        """Подписи и номера студентов массивами; пересобираются после add"""
+        if self._arrays is None:
+            codes: dict[UUID, int] = {}
+            self._arrays = (
+                np.frombuffer(b"".join(self.signatures), dtype="<u4").reshape(len(self), PERMUTATIONS),
+                np.array([codes.setdefault(s, len(codes)) for s in self.students], dtype=np.int64),
+            )
+        return self._arrays
+
+    def candidates(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Пары позиций (i < j) порциями до CHUNK; пара может повториться в разных порциях.
+
+        Одинаковые подписи (пустые, шаблонные ответы) - одна группа, в корзинах
+        только её первое решение. Каждое решение группы идёт в паре с первым
+        (а решение того же студента - с первым решением другого студента);
+        похожие группы сравниваются первыми решениями (и копией другого студента).
+        В корзине каждое решение сравнивается только с первыми BUCKET_LEADERS:
+        ответы по одному шаблону делят почти все полосы, а все пары корзины
+        квадратичны по её размеру. Всего пар - O(n * BANDS * BUCKET_LEADERS).
+        """
+        n = len(self)
+        _, students = self._matrix()
+        pending, size = [], 0
+        # первое решение группы -> первое решение группы другого студента
+        other = np.full(n, -1, dtype=np.int64)
+        for first, copies in self._copies.items():
+            members = np.array([first, *copies], dtype=np.int64)
+            differs = students[members] != students[first]
+            if differs.any():
+                other[first] = members[differs.argmax()]
+                partner = np.where(differs, first, other[first])[1:]
+                pending.append((np.minimum(partner, members[1:]), np.maximum(partner, members[1:])))
+                size += len(partner)
+
+        leaders = np.arange(BUCKET_LEADERS)[:, None]
+        for buckets in self.buckets:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                positions = np.array(members, dtype=np.int64)
+                i, j = np.nonzero(leaders[:len(positions) - 1] < np.arange(len(positions)))
+                first, second = positions[i], positions[j]
+                pending.append((first, second))
+                # первые решения групп одного студента: сравнивается и копия другого студента
+                for a, b in ((other[first], second), (first, other[second])):
+                    keep = (a >= 0) & (b >= 0)
+                    pending.append((np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])))
+                size += 3 * len(first)
+                if size >= CHUNK:
+                    yield from _chunks(pending)
+                    pending, size = [], 0
+        yield from _chunks(pending)
+
+    def similar(self, threshold: float, limit: int) -> list[SimilarSolutions]:
+        """Пары решений разных студентов со сходством не ниже threshold, самые похожие первыми.
+
+        Кандидаты оцениваются порциями; между порциями хранятся только limit лучших.
+        """
+        n = len(self)
+        matrix, students = self._matrix()
+        best, scores = np.empty(0, dtype=np.int64), np.empty(0)
+        for first, second in self.candidates():
+            keep = students[first] != students[second]
+            first, second = first[keep], second[keep]
+            similarity = (matrix[first] == matrix[second]).mean(axis=1)
+            keep = similarity >= threshold
+            # пара - число first * n + second: порядок чисел совпадает с порядком (first, second)
+            best, index = np.unique(np.concatenate((best, first[keep] * n + second[keep])), return_index=True)
+            scores = np.concatenate((scores, similarity[keep]))[index]
+            order = np.lexsort((best, -scores))[:limit]
+            best, scores = best[order], scores[order]
+        return [
+            SimilarSolutions(
+                solution_id=self.ids[i],
+                student_id=self.students[i],
+                similar_solution_id=self.ids[j],
+                similar_student_id=self.students[j],
+                similarity=float(score),
+            )
+            for i, j, score in zip((best // n).tolist(), (best % n).tolist(), scores.tolist())
+        ]
+
+
+class SimilarityIndex(ReloadingStore[UUID, HomeworkIndex]):
+    def __init__(self, ttl: float, max_homeworks: int) -> None:
+        super().__init__(ttl, max_homeworks)
+
+    def _build(self, rows: list[SignatureRow]) -> HomeworkIndex:
+        return HomeworkIndex(rows)
+
+    def _apply(self, index: HomeworkIndex, row: SignatureRow) -> None:
+        index.add(*row)
+
+    async def index(
+        self,
+        homework_id: UUID,
+        load: Callable[[], Awaitable[list[SignatureRow]]],
+    ) -> HomeworkIndex:
+        return await self.get(homework_id, load)
+
+    def add(self, homework_id: UUID, row: SignatureRow) -> None:
+        """Новое решение после commit"""
+        self.apply(homework_id, row)
+
+
+similarity = SimilarityIndex(settings.similarity_ttl, settings.similarity_max_homeworks)
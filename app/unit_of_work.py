@@ -0,0 +1,82 @@
+# app/unit_of_work.py
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import CacheBackend, cache
+from app.database import AsyncSessionLocal
+from app.repos.archive_repo import ArchiveRepo
+from app.repos.cached_homework_repo import CachedHomeworkRepo
+from app.repos.homework_repo import HomeworkRepo
+from app.repos.outbox_repo import OutboxRepo
+from app.repos.payment_repo import ProcessedPaymentRepo
+from app.repos.solution_repo import SolutionRepo
+from app.repos.progress_repo import ProgressRepo
+from app.repos.stats_repo import HomeworkStatsRepo
+
+class UnitOfWork:
+    """Одна сессия на запрос, общая для всех репозиториев.
+
+    `async with uow:` - одна транзакция: commit при успешном выходе,
+    rollback при исключении. После выхода соединение возвращается в пул.
+    Колбэки after_commit (инвалидация кэша) выполняются после успешного commit.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        cache: CacheBackend | None = None,
+    ) -> None:
+        self.session = session_factory()
+        self._after_commit: list[Callable[[], Awaitable[None]]] = []
+        if cache is not None:
+            self.homeworks = CachedHomeworkRepo(self.session, cache, self.after_commit)
+        else:
+            self.homeworks = HomeworkRepo(self.session)
+        self.solutions = SolutionRepo(self.session)
+        self.progress = ProgressRepo(self.session)
+        self.stats = HomeworkStatsRepo(self.session)
+        self.outbox = OutboxRepo(self.session)
+        self.payments = ProcessedPaymentRepo(self.session)
+        self.archives = ArchiveRepo(self.session)
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        self._after_commit.append(callback)
+
+    async def commit(self) -> None:
+        await self.session.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            await callback()
+
+    async def rollback(self) -> None:
+        self._after_commit.clear()
+        await self.session.rollback()
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+@asynccontextmanager
+async def open_uow():
+    """UnitOfWork с гарантированным закрытием сессии (для кода вне HTTP-запроса)"""
+    uow = UnitOfWork(cache=cache)
+    try:
+        yield uow
+    finally:
+        await uow.close()
+
+
+async def get_uow():
+    async with open_uow() as uow:
+        yield uow
@@ -0,0 +1,62 @@
+"""initial schema
+
+Схема, которую раньше создавал Base.metadata.create_all() в init_db.
+Базы, созданные тем путём, помечаются этой ревизией без её выполнения.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+homework_status = sa.Enum("CREATED", "ACTIVE", "CLOSED", name="homeworkstatus")
+solution_status = sa.Enum("DRAFT", "SUBMITTED", "RETURNED", "GRADED", name="solutionstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "homeworks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("course_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("published_at", sa.DateTime(), nullable=True),
+        sa.Column("status", homework_status, nullable=False),
+    )
+    op.create_table(
+        "solutions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("homework_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("student_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("answer", sa.String(), nullable=False),
+        sa.Column("status", solution_status, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("submitted_at", sa.DateTime(), nullable=True),
+        sa.Column("grade", sa.Integer(), nullable=True),
+        sa.Column("feedback", sa.String(), nullable=True),
+    )
+    op.create_table(
+        "student_progress",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("student_id", postgresql.UUID(as_uuid=True), nullable=False, unique=True),
+        sa.Column("course_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("total_homeworks", sa.Integer(), nullable=False),
+        sa.Column("completed_homeworks", sa.Integer(), nullable=False),
+        sa.Column("average_grade", sa.Float(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("student_progress")
+    op.drop_table("solutions")
+    op.drop_table("homeworks")
+    solution_status.drop(op.get_bind())
+    homework_status.drop(op.get_bind())
@@ -0,0 +1,45 @@
+"""hot lookup indexes
+
+Индексы под запросы репозиториев: фильтры по course_id / homework_id /
+student_id вместе с keyset-сортировкой по (created_at, id).
+Создаются CONCURRENTLY, чтобы не блокировать запись в рабочих таблицах.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_homeworks_created_at_id", "homeworks", ["created_at", "id"], None),
+    ("ix_homeworks_course_id_created_at_id", "homeworks", ["course_id", "created_at", "id"], None),
+    ("ix_homeworks_course_id_created", "homeworks", ["course_id"], "status = 'CREATED'"),
+    ("ix_solutions_homework_id_created_at_id", "solutions", ["homework_id", "created_at", "id"], None),
+    ("ix_solutions_student_id_created_at_id", "solutions", ["student_id", "created_at", "id"], None),
+    ("ix_solutions_homework_id_status", "solutions", ["homework_id", "status"], None),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,51 @@
+"""progress grade_sum
+
+Счётчики прогресса поддерживаются инкрементально, для среднего нужна
+сумма оценок. Существующие строки пересчитываются по solutions, недостающие
+строки прогресса создаются для всех студентов, у которых есть решения.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+RECOMPUTED = """
+    SELECT s.student_id,
+           min(h.course_id::text)::uuid AS course_id,
+           count(*) AS total,
+           count(*) FILTER (WHERE s.status = 'GRADED') AS completed,
+           coalesce(sum(s.grade) FILTER (WHERE s.status = 'GRADED'), 0) AS grade_sum
+    FROM solutions s
+    JOIN homeworks h ON h.id = s.homework_id
+    GROUP BY s.student_id
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        "student_progress",
+        sa.Column("grade_sum", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute(f"""
+        INSERT INTO student_progress
+            (id, student_id, course_id, total_homeworks, completed_homeworks, grade_sum, average_grade)
+        SELECT gen_random_uuid(), r.student_id, r.course_id, r.total, r.completed, r.grade_sum,
+               CASE WHEN r.completed > 0 THEN r.grade_sum::float / r.completed END
+        FROM ({RECOMPUTED}) r
+        ON CONFLICT (student_id) DO UPDATE SET
+            total_homeworks = EXCLUDED.total_homeworks,
+            completed_homeworks = EXCLUDED.completed_homeworks,
+            grade_sum = EXCLUDED.grade_sum,
+            average_grade = EXCLUDED.average_grade
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("student_progress", "grade_sum")
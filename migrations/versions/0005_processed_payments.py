@@ -0,0 +1,31 @@
+"""processed payments
+
+Ключи обработанных событий payment_success для дедупликации повторных
+доставок и дублей оплаты. Таблица ограничена TTL: consumer периодически
+удаляет ключи старше PAYMENT_DEDUP_TTL.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "processed_payments",
+        sa.Column("key", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("processed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_processed_payments_processed_at", "processed_payments", ["processed_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("processed_payments")
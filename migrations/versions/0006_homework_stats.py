@@ -0,0 +1,79 @@
+"""homework stats
+
+Статистика решений по ДЗ (отправлено, оценено, возвращено, сумма оценок,
+гистограмма). Дальше её поддерживает HomeworkStatsRepo по переходам
+решений; здесь она один раз считается по solutions. jsonb_add_counts
+складывает две гистограммы, чтобы пачка переходов применялась одним UPDATE.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+ADD_COUNTS = """
+    CREATE OR REPLACE FUNCTION jsonb_add_counts(counts jsonb, delta jsonb) RETURNS jsonb
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT coalesce(jsonb_object_agg(key, total), '{}'::jsonb)
+        FROM (
+            SELECT key, sum(value::bigint) AS total
+            FROM (
+                SELECT * FROM jsonb_each_text(counts)
+                UNION ALL
+                SELECT * FROM jsonb_each_text(delta)
+            ) e
+            GROUP BY key
+        ) s
+        WHERE total <> 0
+    $$
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "homework_stats",
+        sa.Column("homework_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("submitted_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("graded_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("returned_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("grade_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("histogram", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+    )
+    op.execute(ADD_COUNTS)
+    # тот же пересчёт, что делает app.scripts.rebuild_homework_stats
+    op.execute("""
+        INSERT INTO homework_stats
+            (homework_id, submitted_count, graded_count, returned_count, grade_sum, histogram)
+        SELECT c.homework_id, c.submitted, c.graded, c.returned, c.grade_sum, coalesce(h.histogram, '{}'::jsonb)
+        FROM (
+            SELECT homework_id,
+                   count(*) AS submitted,
+                   count(*) FILTER (WHERE status = 'GRADED') AS graded,
+                   count(*) FILTER (WHERE status = 'RETURNED') AS returned,
+                   coalesce(sum(grade) FILTER (WHERE status = 'GRADED'), 0) AS grade_sum
+            FROM solutions
+            GROUP BY homework_id
+        ) c
+        LEFT JOIN (
+            SELECT homework_id, jsonb_object_agg(grade::text, n) AS histogram
+            FROM (
+                SELECT homework_id, grade, count(*) AS n
+                FROM solutions
+                WHERE status = 'GRADED' AND grade IS NOT NULL
+                GROUP BY homework_id, grade
+            ) g
+            GROUP BY homework_id
+        ) h ON h.homework_id = c.homework_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("homework_stats")
+    op.execute("DROP FUNCTION IF EXISTS jsonb_add_counts(jsonb, jsonb)")
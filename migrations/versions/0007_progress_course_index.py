@@ -0,0 +1,39 @@
+"""progress course index
+
+Индекс для рейтинга курса (app.leaderboard): средние студентов курса
+читаются index-only scan'ом без сортировки всей таблицы прогресса.
+Создаётся CONCURRENTLY, как и индексы 0002.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_student_progress_course_id_average_grade",
+            "student_progress",
+            ["course_id", "average_grade", "student_id"],
+            postgresql_where=sa.text("average_grade IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_student_progress_course_id_average_grade",
+            table_name="student_progress",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
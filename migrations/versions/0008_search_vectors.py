@@ -0,0 +1,90 @@
+"""search vectors
+
+Полнотекстовый поиск по ДЗ (title + description) и решениям (answer).
+Вектор хранится в search_vector и заполняется репозиторием при записи
+(app.repos.search), а не генерируемой колонкой: добавление STORED-колонки
+переписало бы solutions целиком под эксклюзивной блокировкой.
+
+Колонки добавляются без значения по умолчанию - без перезаписи таблиц.
+Существующие строки заполняются пачками по id, каждая пачка в своей
+транзакции; GIN-индекс ДЗ строится CONCURRENTLY уже по заполненной колонке.
+
+У solutions GIN-индекса нет: поиск по решениям всегда внутри одного ДЗ.
+На миллионе решений частые слова через GIN давали до 60 мс (их posting
+list покрывает почти всю таблицу), а проверка готовых векторов строк ДЗ,
+найденных по homework_id, - 5-7 мс на любом запросе.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+BATCH = 10_000
+
+# те же выражения, что в app.repos.search.search_vector
+VECTORS = {
+    "homeworks": (
+        "setweight(to_tsvector('russian', left(title, 100000)), 'A')"
+        " || setweight(to_tsvector('russian', left(description, 100000)), 'D')"
+    ),
+    "solutions": "setweight(to_tsvector('russian', left(answer, 100000)), 'D')",
+}
+
+
+def backfill(table: str, vector: str) -> None:
+    conn = op.get_bind()
+    last = None
+    while True:
+        last = conn.execute(
+            sa.text(f"""
+                WITH batch AS (
+                    SELECT id FROM {table}
+                    WHERE CAST(:last AS uuid) IS NULL OR id > CAST(:last AS uuid)
+                    ORDER BY id
+                    LIMIT {BATCH}
+                ), updated AS (
+                    UPDATE {table} t SET search_vector = {vector}
+                    FROM batch WHERE t.id = batch.id AND t.search_vector IS NULL
+                )
+                SELECT id FROM batch ORDER BY id DESC LIMIT 1
+            """),
+            {"last": last},
+        ).scalar()
+        if last is None:
+            break
+
+
+def upgrade() -> None:
+    for table in VECTORS:
+        op.add_column(table, sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+    with op.get_context().autocommit_block():
+        for table, vector in VECTORS.items():
+            backfill(table, vector)
+        op.create_index(
+            "ix_homeworks_search_vector",
+            "homeworks",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_homeworks_search_vector",
+            table_name="homeworks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    for table in VECTORS:
+        op.drop_column(table, "search_vector")
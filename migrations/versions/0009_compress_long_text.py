@@ -0,0 +1,78 @@
+"""compress long text
+
+answer и feedback решений и description ДЗ от COMPRESS_THRESHOLD байт до
+порога TOAST хранятся сжатыми (app.schemas.compressed_text). Тип колонок не меняется,
+поэтому таблицы не переписываются: существующие длинные значения
+перекодируются на месте пачками по id, каждая пачка в своей транзакции.
+
+Значения, которые уже начинаются с маркера, считаются перекодированными:
+миграцию можно перезапустить после сбоя с начала.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.schemas.compressed_text import MARKER, TOAST_THRESHOLD, pack, unpack
+from app.settings import settings
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+COLUMNS = {
+    "solutions": ("answer", "feedback"),
+    "homeworks": ("description",),
+}
+
+
+def recode(table: str, columns: tuple[str, ...], candidate: str, convert) -> None:
+    """Пройти таблицу по id и переписать значения, для которых convert что-то меняет"""
+    conn = op.get_bind()
+    where = " OR ".join(candidate.format(column=c) for c in columns)
+    select_batch = sa.text(f"""
+        SELECT id, {", ".join(columns)} FROM {table}
+        WHERE (CAST(:last AS uuid) IS NULL OR id > CAST(:last AS uuid)) AND ({where})
+        ORDER BY id
+        LIMIT {BATCH}
+    """)
+    update_row = sa.text(
+        f"UPDATE {table} SET {', '.join(f'{c} = :{c}' for c in columns)} WHERE id = :id"
+    )
+    last = None
+    while True:
+        rows = conn.execute(
+            select_batch, {"last": last, "threshold": settings.compress_threshold, "toast": TOAST_THRESHOLD}
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for id, *texts in rows:
+            recoded = [None if t is None else convert(t) for t in texts]
+            if recoded != texts:
+                updates.append({"id": id, **dict(zip(columns, recoded))})
+        if updates:
+            conn.execute(update_row, updates)
+        last = rows[-1].id
+
+
+def _pack(text: str) -> str:
+    # уже закодированные (в том числе прошлым запуском) не трогаем
+    return text if text.startswith(MARKER) else pack(text)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, columns in COLUMNS.items():
+            recode(table, columns, "octet_length({column}) BETWEEN :threshold AND :toast - 1", _pack)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, columns in COLUMNS.items():
+            recode(table, columns, "starts_with({column}, U&'\\FFFE')", unpack)
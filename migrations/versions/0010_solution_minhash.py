@@ -0,0 +1,27 @@
+"""solution minhash
+
+MinHash-подпись ответа (app.similarity) для поиска похожих решений ДЗ.
+Заполняется при отправке решения; существующие решения - скриптом
+app.scripts.backfill_minhash, а не миграцией: подписи считаются в Python,
+и на большой таблице это минуты работы CPU. Колонка добавляется без
+значения по умолчанию - без перезаписи таблицы.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("solutions", sa.Column("minhash", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("solutions", "minhash")
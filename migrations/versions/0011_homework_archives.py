@@ -0,0 +1,42 @@
+"""homework archives
+
+Архивация закрытых ДЗ (app.archive): homework_archives хранит чекпоинт
+архивации каждого ДЗ, archived_progress - вклад удалённых из solutions
+решений в прогресс студентов, чтобы полный пересчёт прогресса его учитывал.
+Новые пустые таблицы, существующие не трогаются.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "homework_archives",
+        sa.Column("homework_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("parts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("solutions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "archived_progress",
+        sa.Column("student_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("total_homeworks", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_homeworks", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("grade_sum", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("archived_progress")
+    op.drop_table("homework_archives")
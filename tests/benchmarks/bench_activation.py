@@ -0,0 +1,104 @@
+# tests/benchmarks/bench_activation.py
+"""Пропускная способность активации ДЗ по событиям payment_success.
+
+Засевает --courses курсов по --homeworks ДЗ в статусе CREATED внутри
+транзакции (в конце она откатывается) и сравнивает три способа активации:
+
+  legacy      загрузить ORM-объекты, поменять по одному, flush (прежний путь)
+  per_course  HomeworkRepo.activate_by_course: UPDATE ... RETURNING на курс
+  batched     HomeworkRepo.activate_by_courses: один UPDATE на пачку курсов
+
+    python -m tests.benchmarks.bench_activation --courses 20 --homeworks 5000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, init_db
+from app.models.homework import HomeworkStatus
+from app.repos.homework_repo import HomeworkRepo
+from app.schemas.homework import Homework as DBHomework
+
+
+async def seed(conn, courses: int, homeworks: int) -> list:
+    course_ids = [uuid4() for _ in range(courses)]
+    now = datetime.utcnow()
+    for course_id in course_ids:
+        await conn.execute(
+            insert(DBHomework),
+            [
+                {
+                    "id": uuid4(),
+                    "course_id": course_id,
+                    "title": f"hw {i}",
+                    "description": "bench",
+                    "created_at": now,
+                    "status": HomeworkStatus.CREATED,
+                }
+                for i in range(homeworks)
+            ],
+        )
+    await conn.execute(text("ANALYZE homeworks"))
+    return course_ids
+
+
+async def legacy(session: AsyncSession, course_ids: list) -> int:
+    activated = 0
+    for course_id in course_ids:
+        result = await session.execute(
+            select(DBHomework)
+            .where(DBHomework.course_id == course_id)
+            .where(DBHomework.status == HomeworkStatus.CREATED)
+        )
+        for hw in result.scalars():
+            hw.status = HomeworkStatus.ACTIVE
+            hw.published_at = datetime.utcnow()
+            activated += 1
+        await session.flush()
+    return activated
+
+
+async def per_course(session: AsyncSession, course_ids: list) -> int:
+    repo = HomeworkRepo(session)
+    return sum([len(await repo.activate_by_course(c)) for c in course_ids])
+
+
+async def batched(session: AsyncSession, course_ids: list) -> int:
+    return len(await HomeworkRepo(session).activate_by_courses(course_ids))
+
+
+async def main(args) -> None:
+    init_db()
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            course_ids = await seed(conn, args.courses, args.homeworks)
+            for name, fn in (("legacy", legacy), ("per_course", per_course), ("batched", batched)):
+                savepoint = await conn.begin_nested()
+                session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+                started = time.perf_counter()
+                activated = await fn(session, course_ids)
+                elapsed = time.perf_counter() - started
+                await session.close()
+                await savepoint.rollback()
+                print(
+                    f"{name:<11} {activated:>8} homeworks in {elapsed:7.3f}s  "
+                    f"{activated / elapsed:>10.0f} activations/s  "
+                    f"{len(course_ids) / elapsed:>8.1f} courses/s"
+                )
+        finally:
+            await trans.rollback()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--homeworks", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
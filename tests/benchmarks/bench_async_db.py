@@ -0,0 +1,95 @@
+# tests/benchmarks/bench_async_db.py
+"""Сравнение sync- и async-пути работы с БД под одинаковой конкурентностью.
+
+Бенчмарк гоняет одинаковую нагрузку по двум запущенным инстансам сервиса:
+`--baseline-url` - сборка на sync-engine (psycopg2 + threadpool),
+`--url` - текущая сборка на AsyncSession. Например:
+
+    git worktree add /tmp/hw-sync <sync-коммит>
+    (cd /tmp/hw-sync && uvicorn app.main:app --port 8001) &
+    uvicorn app.main:app --port 8000 &
+    python -m tests.benchmarks.bench_async_db \\
+        --url http://localhost:8000/api --baseline-url http://localhost:8001/api \\
+        --concurrency 128 --requests 5000
+
+Перед каждым прогоном сервис засевается курсом с опубликованными ДЗ.
+"""
+
+import argparse
+import asyncio
+from uuid import uuid4
+
+from tests.benchmarks.common import LoadResult, make_client, run_load
+
+
+async def seed(client, homeworks: int) -> tuple[str, list[str]]:
+    course_id = str(uuid4())
+    hw_ids = []
+    for i in range(homeworks):
+        resp = await client.post(
+            "/homeworks/",
+            json={"course_id": course_id, "title": f"bench {i}", "description": "bench"},
+        )
+        resp.raise_for_status()
+        hw_id = resp.json()["id"]
+        (await client.post("/homeworks/publish", json={"homework_id": hw_id})).raise_for_status()
+        hw_ids.append(hw_id)
+    return course_id, hw_ids
+
+
+async def bench_target(label: str, url: str, args) -> list[LoadResult]:
+    async with make_client(url, args.concurrency) as client:
+        course_id, hw_ids = await seed(client, args.homeworks)
+
+        async def list_course(c, i):
+            return await c.get(f"/homeworks/course/{course_id}")
+
+        async def submit(c, i):
+            return await c.post(
+                "/homeworks/solutions/submit",
+                json={
+                    "homework_id": hw_ids[i % len(hw_ids)],
+                    "student_id": str(uuid4()),
+                    "answer": "bench answer",
+                },
+            )
+
+        results = []
+        for name, fn in (("list_course", list_course), ("submit", submit)):
+            # прогрев, чтобы пул соединений успел наполниться
+            await run_load(name, client, fn, args.concurrency, args.concurrency)
+            results.append(
+                await run_load(f"{label}:{name}", client, fn, args.concurrency, args.requests)
+            )
+        return results
+
+
+async def main(args) -> None:
+    targets = [("async", args.url)]
+    if args.baseline_url:
+        targets.insert(0, ("sync", args.baseline_url))
+
+    by_label = {}
+    for label, url in targets:
+        by_label[label] = await bench_target(label, url, args)
+        for r in by_label[label]:
+            print(r.summary())
+
+    if "sync" in by_label:
+        print()
+        for sync_r, async_r in zip(by_label["sync"], by_label["async"]):
+            print(
+                f"{async_r.name.split(':')[1]:<12} "
+                f"rps x{async_r.rps / sync_r.rps:.2f}  "
+                f"p99 {sync_r.percentile(99):.1f}ms -> {async_r.percentile(99):.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000/api")
+    parser.add_argument("--baseline-url", default=None)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--homeworks", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,46 @@
+# tests/benchmarks/bench_bulk_create.py
+"""Импорт программы курса: POST /homeworks/ по одному против POST /homeworks/bulk.
+
+    uvicorn app.main:app --port 8000 &
+    python -m tests.benchmarks.bench_bulk_create --items 1000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from tests.benchmarks.common import make_client, run_load
+
+
+async def main(args) -> None:
+    async with make_client(args.url, args.concurrency) as client:
+        course_id = str(uuid4())
+        items = [
+            {"course_id": course_id, "title": f"bulk {i}", "description": "bench"}
+            for i in range(args.items)
+        ]
+
+        async def create_one(c, i):
+            return await c.post("/homeworks/", json=items[i])
+
+        single = await run_load("single", client, create_one, args.concurrency, args.items)
+        single_rows = single.rps
+
+        started = time.perf_counter()
+        resp = await client.post("/homeworks/bulk", json=items)
+        elapsed = time.perf_counter() - started
+        resp.raise_for_status()
+        bulk_rows = len(resp.json()) / elapsed
+
+    print(f"single  {single_rows:>10.0f} rows/s  ({args.items} requests, concurrency {args.concurrency})")
+    print(f"bulk    {bulk_rows:>10.0f} rows/s  (1 request, {elapsed * 1000:.0f}ms)")
+    print(f"speedup x{bulk_rows / single_rows:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000/api")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--items", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,41 @@
+# tests/benchmarks/bench_cache.py
+"""Пропускная способность отправки решений и списка ДЗ курса с кэшем и без.
+
+Нагрузка та же, что в bench_async_db; два инстанса сервиса отличаются
+только настройкой CACHE_BACKEND:
+
+    CACHE_BACKEND=off uvicorn app.main:app --port 8001 &
+    CACHE_BACKEND=memory uvicorn app.main:app --port 8000 &
+    python -m tests.benchmarks.bench_cache \\
+        --url http://localhost:8000/api --baseline-url http://localhost:8001/api
+"""
+
+import argparse
+import asyncio
+
+from tests.benchmarks.bench_async_db import bench_target
+
+
+async def main(args) -> None:
+    off = await bench_target("cache_off", args.baseline_url, args)
+    on = await bench_target("cache_on", args.url, args)
+    for r in off + on:
+        print(r.summary())
+
+    print()
+    for off_r, on_r in zip(off, on):
+        print(
+            f"{on_r.name.split(':')[1]:<12} "
+            f"rps x{on_r.rps / off_r.rps:.2f}  "
+            f"p99 {off_r.percentile(99):.1f}ms -> {on_r.percentile(99):.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000/api")
+    parser.add_argument("--baseline-url", default="http://localhost:8001/api")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--homeworks", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
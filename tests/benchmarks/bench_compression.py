@@ -0,0 +1,151 @@
+# tests/benchmarks/bench_compression.py
+"""Сжатие длинных answer/feedback: размер таблицы решений и задержка списка решений ДЗ.
+
+Засевает --solutions решений внутри транзакции (в конце она откатывается)
+в нескольких вариантах хранения и для каждого печатает:
+
+  size     pg_total_relation_size копии таблицы (heap + TOAST + индексы)
+  page     SolutionRepo.get_solutions_by_homework, страница --limit решений
+           (с распаковкой в CompressedText)
+
+Варианты: raw - как до сжатия, и пороги COMPRESS_THRESHOLD из --thresholds
+(сжимаются значения от порога до TOAST_THRESHOLD, длиннее - как есть).
+Ответы похожи на код: строки из шаблонов со случайными именами, длина
+распределена логнормально (медиана ~1.5 КБ, хвост до десятков КБ).
+
+    python -m tests.benchmarks.bench_compression --solutions 200000 --thresholds 256 512 1024
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, init_db
+from app.repos.solution_repo import SolutionRepo
+from app.schemas.compressed_text import pack
+
+NAMES = [f"{a}_{b}" for a in ("items", "result", "node", "count", "total", "queue", "graph", "left")
+         for b in ("list", "map", "idx", "tmp", "val", "acc")]
+LINES = [
+    "def {a}({b}, {c}):",
+    "    for {a} in range(len({b})):",
+    "        if {a} > {b}:",
+    "            {a} = {b} + {c}",
+    "    return {a}",
+    "    {a}.append({b}[{c}])",
+    "    while {a}:",
+    "        {a}, {b} = {b}, {a} % {c}",
+    "# {a}: считаем {b} для каждого {c}",
+    "print({a}, {b})",
+]
+FEEDBACK = ["Хорошо", "Проверьте граничные случаи", "Не хватает тестов", "Сложность можно снизить до O(n log n)"]
+COLUMNS = ["id", "homework_id", "student_id", "answer", "status", "created_at", "submitted_at", "grade", "feedback"]
+
+
+def answer() -> str:
+    size = min(60_000, int(random.lognormvariate(math.log(1500), 1.0)))
+    lines, length = [], 0
+    while length < size:
+        line = random.choice(LINES).format(a=random.choice(NAMES), b=random.choice(NAMES), c=random.choice(NAMES))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def feedback() -> str | None:
+    if random.random() < 0.5:
+        return None
+    return ". ".join(random.choices(FEEDBACK, k=random.randint(1, 60)))
+
+
+def generate(homeworks: int, solutions: int) -> list[tuple]:
+    now = datetime.utcnow()
+    homework_ids = [uuid4() for _ in range(homeworks)]
+    return [
+        (uuid4(), random.choice(homework_ids), uuid4(), answer(), "GRADED",
+         now - timedelta(seconds=i), now, random.randint(1, 5), feedback())
+        for i in range(solutions)
+    ]
+
+
+def encode(rows: list[tuple], threshold: int | None) -> list[tuple]:
+    if threshold is None:
+        return rows
+    return [
+        (*row[:3], pack(row[3], threshold), *row[4:8], None if row[8] is None else pack(row[8], threshold))
+        for row in rows
+    ]
+
+
+def report(name: str, size: int, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    print(f"{name:<10} size={size / 2**20:8.1f}MB  page p50={p50:7.2f}ms  p95={p95:7.2f}ms")
+
+
+async def measure(conn, rows: list[tuple], homework_ids: list, args) -> tuple[int, list[float]]:
+    driver = (await conn.get_raw_connection()).driver_connection
+    # размер - по отдельной копии: в solutions могут лежать чужие строки
+    await conn.execute(text("CREATE TEMP TABLE bench_solutions (LIKE solutions INCLUDING INDEXES)"))
+    await driver.copy_records_to_table("bench_solutions", records=rows, columns=COLUMNS)
+    size = await conn.scalar(text("SELECT pg_total_relation_size('bench_solutions')"))
+    await conn.execute(text("DROP TABLE bench_solutions"))
+
+    savepoint = await conn.begin_nested()
+    await driver.copy_records_to_table("solutions", records=rows, columns=COLUMNS)
+    await conn.execute(text("ANALYZE solutions"))
+    session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+    repo = SolutionRepo(session)
+    latencies = []
+    for _ in range(args.queries):
+        homework_id = random.choice(homework_ids)
+        started = time.perf_counter()
+        await repo.get_solutions_by_homework(homework_id, None, args.limit)
+        latencies.append(time.perf_counter() - started)
+        session.expunge_all()
+    await session.close()
+    await savepoint.rollback()
+    return size, latencies
+
+
+async def main(args) -> None:
+    init_db()
+    started = time.perf_counter()
+    rows = generate(args.homeworks, args.solutions)
+    homework_ids = list({row[1] for row in rows})
+    print(f"generated {args.solutions} solutions, {sum(len(r[3].encode()) for r in rows) / 2**20:.0f}MB "
+          f"of answers in {time.perf_counter() - started:.0f}s")
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            now = datetime.utcnow()
+            driver = (await conn.get_raw_connection()).driver_connection
+            await driver.copy_records_to_table(
+                "homeworks",
+                records=[(id, uuid4(), "bench", "d", now, now, "ACTIVE") for id in homework_ids],
+                columns=["id", "course_id", "title", "description", "created_at", "published_at", "status"],
+            )
+            for threshold in [None, *args.thresholds]:
+                size, latencies = await measure(conn, encode(rows, threshold), homework_ids, args)
+                report("raw" if threshold is None else f"z>={threshold}", size, latencies)
+        finally:
+            await trans.rollback()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--homeworks", type=int, default=200)
+    parser.add_argument("--solutions", type=int, default=200_000)
+    parser.add_argument("--thresholds", type=int, nargs="*", default=[256, 512, 1024])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+# tests/benchmarks/bench_json.py
+"""Стоимость сериализации ответа-списка на строку: response_model против FAST_JSON.
+
+Без БД и HTTP: берутся --rows готовых моделей Solution (как их отдаёт репозиторий)
+и кодируются так же, как это делает FastAPI для response_model=list[Solution],
+и одним вызовом, как в режиме FAST_JSON (orjson, а без него TypeAdapter.dump_json).
+
+    python -m tests.benchmarks.bench_json --rows 10000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.endpoints.homework_router import SolutionList, _dump_json
+from app.main import app
+from app.models.solution import Solution, SolutionStatus
+
+
+def pg_uuid() -> PgUUID:
+    """UUID в том виде, в каком его возвращает asyncpg"""
+    return PgUUID(str(uuid4()))
+
+
+def make_rows(n: int) -> list[Solution]:
+    now = datetime.utcnow()
+    return [
+        Solution(
+            id=pg_uuid(),
+            homework_id=pg_uuid(),
+            student_id=pg_uuid(),
+            answer="def solve():\n    return 42\n" * 4,
+            status=SolutionStatus.GRADED,
+            created_at=now,
+            submitted_at=now,
+            grade=5,
+            feedback="ok",
+        )
+        for _ in range(n)
+    ]
+
+
+def response_field():
+    for route in app.routes:
+        if getattr(route, "path", None) == "/api/homeworks/solutions/homework/{homework_id}":
+            return route.secure_cloned_response_field
+    raise LookupError("solutions route not found")
+
+
+async def main(args) -> None:
+    rows = make_rows(args.rows)
+    field = response_field()
+
+    async def response_model() -> bytes:
+        content = await serialize_response(field=field, response_content=rows)
+        return JSONResponse(content).body
+
+    async def fast_json() -> bytes:
+        return _dump_json(rows, SolutionList)
+
+    async def type_adapter() -> bytes:
+        return SolutionList.dump_json(rows)
+
+    assert await response_model() == await fast_json() == await type_adapter()
+    for name, encode in (
+        ("response_model", response_model),
+        ("fast_json", fast_json),
+        ("type_adapter", type_adapter),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            await encode()
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<15} {best * 1000:8.1f}ms per response  {best / args.rows * 1e6:6.2f}us per row")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
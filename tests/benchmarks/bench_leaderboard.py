@@ -0,0 +1,144 @@
+# tests/benchmarks/bench_leaderboard.py
+"""Рейтинг курса: top-k и место студента при --students студентов в курсе.
+
+Засевает прогресс одного курса внутри транзакции (в конце она откатывается)
+и сравнивает:
+
+  naive      на каждый запрос читать весь курс с ORDER BY average_grade
+  sql        top-k по индексу (LIMIT k), место - count(*) лучших по индексу
+  memory     app.leaderboard: загрузка курса один раз, дальше SortedList
+
+    python -m tests.benchmarks.bench_leaderboard --students 100000 --k 10 --queries 200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, init_db
+from app.leaderboard import CourseBoard
+from app.repos.progress_repo import ProgressRepo
+from app.schemas.proggress import StudentProgress as DBProgress
+
+
+async def seed(conn, students: int) -> tuple:
+    course_id = uuid4()
+    rows = [
+        {
+            "id": uuid4(),
+            "student_id": uuid4(),
+            "course_id": course_id,
+            "total_homeworks": 10,
+            "completed_homeworks": 10,
+            "grade_sum": 0,
+            # сетка с шагом 0.1: много равных средних, как в жизни
+            "average_grade": round(random.uniform(1, 5), 1),
+        }
+        for _ in range(students)
+    ]
+    for start in range(0, len(rows), 10_000):
+        await conn.execute(insert(DBProgress), rows[start:start + 10_000])
+    await conn.execute(text("ANALYZE student_progress"))
+    return course_id, [r["student_id"] for r in rows]
+
+
+def report(name: str, op: str, seconds: float, queries: int) -> None:
+    print(f"{name:<7} {op:<7} {seconds / queries * 1e6:>12.1f} µs/query")
+
+
+async def naive(session: AsyncSession, course_id, student_ids, k: int, queries: int) -> None:
+    async def ordered():
+        result = await session.execute(
+            select(DBProgress.student_id, DBProgress.average_grade)
+            .where(DBProgress.course_id == course_id, DBProgress.average_grade.is_not(None))
+            .order_by(DBProgress.average_grade.desc())
+        )
+        return result.all()
+
+    started = time.perf_counter()
+    for _ in range(queries):
+        (await ordered())[:k]
+    report("naive", "top-k", time.perf_counter() - started, queries)
+
+    started = time.perf_counter()
+    for student_id in random.sample(student_ids, queries):
+        rows = await ordered()
+        average = next(avg for sid, avg in rows if sid == student_id)
+        1 + sum(1 for _, avg in rows if avg > average)
+    report("naive", "rank", time.perf_counter() - started, queries)
+
+
+async def sql(session: AsyncSession, course_id, student_ids, k: int, queries: int) -> None:
+    in_course = (DBProgress.course_id == course_id, DBProgress.average_grade.is_not(None))
+    started = time.perf_counter()
+    for _ in range(queries):
+        await session.execute(
+            select(DBProgress.student_id, DBProgress.average_grade)
+            .where(*in_course)
+            .order_by(DBProgress.average_grade.desc())
+            .limit(k)
+        )
+    report("sql", "top-k", time.perf_counter() - started, queries)
+
+    started = time.perf_counter()
+    for student_id in random.sample(student_ids, queries):
+        mine = (
+            select(DBProgress.average_grade)
+            .where(DBProgress.student_id == student_id)
+            .scalar_subquery()
+        )
+        await session.execute(
+            select(func.count() + 1).where(*in_course, DBProgress.average_grade > mine)
+        )
+    report("sql", "rank", time.perf_counter() - started, queries)
+
+
+async def memory(session: AsyncSession, course_id, student_ids, k: int, queries: int) -> None:
+    started = time.perf_counter()
+    board = CourseBoard(await ProgressRepo(session).course_averages(course_id))
+    print(f"memory  load    {(time.perf_counter() - started) * 1000:>12.1f} ms once, {len(board)} students")
+
+    started = time.perf_counter()
+    for _ in range(queries):
+        board.top(k)
+    report("memory", "top-k", time.perf_counter() - started, queries)
+
+    sample = random.sample(student_ids, queries)
+    started = time.perf_counter()
+    for student_id in sample:
+        board.rank(student_id)
+    report("memory", "rank", time.perf_counter() - started, queries)
+
+    started = time.perf_counter()
+    for student_id in sample:
+        board.set(student_id, round(random.uniform(1, 5), 1))
+    report("memory", "update", time.perf_counter() - started, queries)
+
+
+async def main(args) -> None:
+    init_db()
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            course_id, student_ids = await seed(conn, args.students)
+            session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+            for fn in (naive, sql, memory):
+                queries = min(args.queries, 20) if fn is naive else args.queries
+                await fn(session, course_id, student_ids, args.k, queries)
+            await session.close()
+        finally:
+            await trans.rollback()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,244 @@
+# tests/benchmarks/bench_load.py
+"""Нагрузочный прогон всех эндпоинтов homework_router на засеянной базе.
+
+Три шага:
+
+    # 1. залить данные (см. seed.py) и сохранить их идентификаторы
+    python -m tests.benchmarks.bench_load seed --courses 200 --homeworks-per-course 50 \\
+        --students 100000 --solutions 1000000 --dataset /tmp/dataset.json
+
+    # 2. прогнать эндпоинты и записать результат в JSON
+    uvicorn app.main:app --port 8000 &
+    python -m tests.benchmarks.bench_load run --dataset /tmp/dataset.json \\
+        --concurrency 256 --requests 5000 --out /tmp/before.json
+
+    # 3. сравнить два прогона; код возврата 1, если что-то стало хуже порога
+    python -m tests.benchmarks.bench_load compare /tmp/before.json /tmp/after.json --threshold 0.1
+
+Сценарии оценки и возврата расходуют отложенные при засеве решения,
+поэтому перед каждым сравниваемым прогоном базу нужно засеять заново.
+Регрессией считается падение rps или рост p99 больше порога, а также
+выросшая доля ошибок.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from tests.benchmarks.common import make_client, run_load
+from tests.benchmarks.seed import Dataset, seed
+
+BULK_SIZE = 10
+
+
+def scenarios(ds: Dataset, created: list[str]) -> dict:
+    """Сценарий: (запрос по номеру i, сколько запросов он может сделать)"""
+    pick = random.choice
+    half = len(ds.submitted_ids) // 2
+    to_grade, to_bulk_grade = ds.submitted_ids[:half], ds.submitted_ids[half:]
+
+    def homework(i):
+        return {"course_id": pick(ds.course_ids), "title": f"load {i}", "description": "load"}
+
+    return {
+        "list_homeworks": (lambda c, i: c.get("/homeworks/"), None),
+        "list_course": (lambda c, i: c.get(f"/homeworks/course/{pick(ds.course_ids)}"), None),
+        "create_homework": (lambda c, i: c.post("/homeworks/", json=homework(i)), None),
+        "bulk_create": (
+            lambda c, i: c.post("/homeworks/bulk", json=[homework(i) for _ in range(BULK_SIZE)]),
+            None,
+        ),
+        "publish_homework": (
+            lambda c, i: c.post("/homeworks/publish", json={"homework_id": created[i]}),
+            len(created),
+        ),
+        "submit_solution": (
+            lambda c, i: c.post(
+                "/homeworks/solutions/submit",
+                json={
+                    "homework_id": pick(ds.homework_ids),
+                    "student_id": pick(ds.student_ids),
+                    "answer": "load answer",
+                },
+            ),
+            None,
+        ),
+        "grade_solution": (
+            lambda c, i: c.post("/homeworks/solutions/grade", json={"solution_id": to_grade[i], "grade": 5}),
+            len(to_grade),
+        ),
+        "grade_bulk": (
+            lambda c, i: c.post(
+                "/homeworks/solutions/grade/bulk",
+                json=[
+                    {"solution_id": id, "grade": 5}
+                    for id in to_bulk_grade[i * BULK_SIZE:(i + 1) * BULK_SIZE]
+                ],
+            ),
+            len(to_bulk_grade) // BULK_SIZE,
+        ),
+        "return_solution": (
+            lambda c, i: c.post(
+                "/homeworks/solutions/return", json={"solution_id": ds.graded_ids[i], "feedback": "redo"}
+            ),
+            len(ds.graded_ids),
+        ),
+        "solutions_by_student": (
+            lambda c, i: c.get(f"/homeworks/solutions/student/{pick(ds.student_ids)}"),
+            None,
+        ),
+        "solutions_by_homework": (
+            lambda c, i: c.get(f"/homeworks/solutions/homework/{pick(ds.homework_ids)}"),
+            None,
+        ),
+        "search_homeworks": (lambda c, i: c.get("/homeworks/search", params={"q": "seeded"}), None),
+        "search_solutions": (
+            lambda c, i: c.get(
+                "/homeworks/solutions/search", params={"homework_id": pick(ds.homework_ids), "q": "answer"}
+            ),
+            None,
+        ),
+        "homework_stats": (
+            lambda c, i: c.get(f"/homeworks/{pick(ds.homework_ids)}/stats"),
+            None,
+        ),
+        "student_progress": (
+            lambda c, i: c.get(f"/homeworks/progress/student/{pick(ds.student_ids)}"),
+            None,
+        ),
+        "update_progress": (
+            lambda c, i: c.post(f"/homeworks/progress/update/{pick(ds.student_ids)}"),
+            None,
+        ),
+    }
+
+
+async def create_publish_targets(client, ds: Dataset, count: int) -> list[str]:
+    """ДЗ в статусе CREATED для сценария publish_homework"""
+    created = []
+    for start in range(0, count, 1000):
+        batch = [
+            {"course_id": random.choice(ds.course_ids), "title": "to publish", "description": "load"}
+            for _ in range(min(1000, count - start))
+        ]
+        resp = await client.post("/homeworks/bulk", json=batch)
+        resp.raise_for_status()
+        created += [h["id"] for h in resp.json()]
+    return created
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def cmd_seed(args) -> int:
+    ds = await seed(args.courses, args.homeworks_per_course, args.students, args.solutions, args.reserve)
+    ds.save(Path(args.dataset))
+    print(
+        f"seeded {len(ds.course_ids)} courses, {len(ds.homework_ids)} homeworks, "
+        f"{len(ds.student_ids)} students, {args.solutions + 2 * args.reserve} solutions -> {args.dataset}"
+    )
+    return 0
+
+
+async def cmd_run(args) -> int:
+    ds = Dataset.load(Path(args.dataset))
+    only = set(args.only.split(",")) if args.only else None
+    results = {}
+    async with make_client(args.url, args.concurrency) as client:
+        created = []
+        if only is None or "publish_homework" in only:
+            created = await create_publish_targets(client, ds, args.requests)
+
+        # прогрев пула соединений и кэшей
+        warmup, _ = scenarios(ds, created)["list_homeworks"]
+        await run_load("warmup", client, warmup, args.concurrency, args.concurrency)
+
+        for name, (make_request, available) in scenarios(ds, created).items():
+            if only is not None and name not in only:
+                continue
+            total = args.requests if available is None else min(args.requests, available)
+            if total < args.requests:
+                print(f"{name}: only {total} prepared targets, seed a larger --reserve")
+            result = await run_load(name, client, make_request, args.concurrency, total)
+            print(result.summary())
+            results[name] = result.to_dict()
+
+    report = {
+        "meta": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "git": git_revision(),
+            "started": datetime.utcnow().isoformat(),
+        },
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"results -> {args.out}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    base = json.loads(Path(args.base).read_text())["results"]
+    new = json.loads(Path(args.new).read_text())["results"]
+    regressions = 0
+    print(f"{'endpoint':<24} {'rps':>20} {'p99 ms':>22}")
+    for name in sorted(base.keys() & new.keys()):
+        b, n = base[name], new[name]
+        rps_change = n["rps"] / b["rps"] - 1 if b["rps"] else 0.0
+        p99_change = n["p99_ms"] / b["p99_ms"] - 1 if b["p99_ms"] else 0.0
+        errors_grew = n["errors"] / n["requests"] > b["errors"] / b["requests"] if n["requests"] and b["requests"] else False
+        regressed = rps_change < -args.threshold or p99_change > args.threshold or errors_grew
+        regressions += regressed
+        print(
+            f"{name:<24} {b['rps']:>8.1f} -> {n['rps']:>8.1f} ({rps_change:+.0%})"
+            f" {b['p99_ms']:>7.1f} -> {n['p99_ms']:>7.1f} ({p99_change:+.0%})"
+            + ("  REGRESSION" if regressed else "")
+        )
+    for name in sorted(base.keys() ^ new.keys()):
+        print(f"{name:<24} only in {'base' if name in base else 'new'} run")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("seed", help="залить данные и сохранить их идентификаторы")
+    p.add_argument("--courses", type=int, default=100)
+    p.add_argument("--homeworks-per-course", type=int, default=20)
+    p.add_argument("--students", type=int, default=10_000)
+    p.add_argument("--solutions", type=int, default=100_000)
+    p.add_argument("--reserve", type=int, default=20_000, help="решений для сценариев оценки и возврата")
+    p.add_argument("--dataset", default="dataset.json")
+
+    p = sub.add_parser("run", help="прогнать эндпоинты")
+    p.add_argument("--url", default="http://localhost:8000/api")
+    p.add_argument("--dataset", default="dataset.json")
+    p.add_argument("--concurrency", type=int, default=64)
+    p.add_argument("--requests", type=int, default=2000, help="запросов на эндпоинт")
+    p.add_argument("--only", default=None, help="список сценариев через запятую")
+    p.add_argument("--out", default="bench_results.json")
+
+    p = sub.add_parser("compare", help="сравнить два прогона")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.1, help="допустимое ухудшение, доля")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return cmd_compare(args)
+    return asyncio.run(cmd_seed(args) if args.command == "seed" else cmd_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
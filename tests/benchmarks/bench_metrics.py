@@ -0,0 +1,62 @@
+# tests/benchmarks/bench_metrics.py
+"""Накладные расходы сбора метрик на запрос и на SQL-запрос.
+
+Без БД и сети: пустое ASGI-приложение вызывается напрямую и через
+MetricsMiddleware, обработчики событий engine - на фиктивном контексте.
+Разница и есть цена метрик на горячем пути.
+
+    python -m tests.benchmarks.bench_metrics --requests 100000
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.metrics import MetricsMiddleware, RequestStats, _after_execute, _before_execute, current_request
+
+ROUTE = SimpleNamespace(path="/api/homeworks/course/{course_id}")
+
+
+async def endpoint(scope, receive, send) -> None:
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"[]"})
+
+
+async def per_call(app, n: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(n):
+        await app({"type": "http", "method": "GET", "path": "/"}, receive, send)
+    return (time.perf_counter() - started) / n
+
+
+def per_query(n: int) -> float:
+    context = SimpleNamespace()
+    current_request.set(RequestStats())
+    started = time.perf_counter()
+    for _ in range(n):
+        _before_execute(None, None, "", None, context, False)
+        _after_execute(None, None, "", None, context, False)
+    return (time.perf_counter() - started) / n
+
+
+async def main(args) -> None:
+    bare = await per_call(endpoint, args.requests)
+    wrapped = await per_call(MetricsMiddleware(endpoint), args.requests)
+    query = per_query(args.requests)
+    print(f"asgi call, bare          {bare * 1e6:7.2f}us")
+    print(f"asgi call, with metrics  {wrapped * 1e6:7.2f}us  (+{(wrapped - bare) * 1e6:.2f}us per request)")
+    print(f"sql event handlers       {query * 1e6:7.2f}us per statement")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,161 @@
+# tests/benchmarks/bench_search.py
+"""Полнотекстовый поиск по решениям и ДЗ: задержка запроса при --solutions решениях.
+
+Засевает ДЗ и решения внутри транзакции (в конце она откатывается) и сравнивает:
+
+  grep     как раньше: все решения ДЗ страницами get_solutions_by_homework, поиск на клиенте
+  ilike    answer ILIKE '%слово%' по решениям ДЗ, без полнотекстового индекса
+  fts      SolutionRepo.search_solutions (готовые векторы строк ДЗ)
+           и HomeworkRepo.search_homeworks (GIN)
+
+Тексты собраны из словаря с частотами по закону Ципфа: в запросах есть
+и редкие, и частые слова.
+
+    python -m tests.benchmarks.bench_search --homeworks 2000 --solutions 1000000 --queries 100
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import MetaData, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, init_db
+from app.models.pagination import Cursor, MAX_PAGE_SIZE
+from app.repos.homework_repo import HomeworkRepo
+from app.repos.search import homework_vector, search_vector
+from app.repos.solution_repo import SolutionRepo
+from app.schemas.homework import Homework as DBHomework
+from app.schemas.solution import Solution as DBSolution
+
+VOCABULARY = [f"term{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+CHUNK = 100_000
+
+
+def words(n: int) -> str:
+    return " ".join(random.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=n))
+
+
+async def seed(conn, homeworks: int, solutions: int) -> list:
+    now = datetime.utcnow()
+    homework_ids = [uuid4() for _ in range(homeworks)]
+    driver = (await conn.get_raw_connection()).driver_connection
+    await driver.copy_records_to_table(
+        "homeworks",
+        records=[(id, uuid4(), words(5), words(40), now, now, "ACTIVE") for id in homework_ids],
+        columns=["id", "course_id", "title", "description", "created_at", "published_at", "status"],
+    )
+    # решения - через временную таблицу: вектор считается тем же INSERT, без второй записи строки
+    await conn.execute(text("CREATE TEMP TABLE staging_solutions (LIKE solutions) ON COMMIT DROP"))
+    columns = ["id", "homework_id", "student_id", "answer", "status", "created_at", "submitted_at"]
+    for start in range(0, solutions, CHUNK):
+        await driver.copy_records_to_table(
+            "staging_solutions",
+            records=[
+                (uuid4(), random.choice(homework_ids), uuid4(), words(60), "SUBMITTED",
+                 now - timedelta(seconds=i), now)
+                for i in range(start, min(solutions, start + CHUNK))
+            ],
+            columns=columns,
+        )
+    staging = DBSolution.__table__.to_metadata(MetaData(), name="staging_solutions")
+    await conn.execute(
+        insert(DBSolution.__table__).from_select(
+            [*columns, "search_vector"],
+            select(*(staging.c[c] for c in columns), search_vector(staging.c.answer)),
+        )
+    )
+    # COPY ДЗ идёт мимо репозитория: векторы - тем же выражением, что пишет он
+    await conn.execute(
+        update(DBHomework)
+        .where(DBHomework.search_vector.is_(None))
+        .values(search_vector=homework_vector(DBHomework.title, DBHomework.description))
+    )
+    await conn.execute(text("SELECT gin_clean_pending_list('ix_homeworks_search_vector')"))
+    await conn.execute(text("ANALYZE homeworks"))
+    await conn.execute(text("ANALYZE solutions"))
+    return homework_ids
+
+
+def queries(n: int) -> list[str]:
+    """Слово из головы словаря, из середины и пара слов"""
+    head, middle = VOCABULARY[:50], VOCABULARY[50:2000]
+    kinds = [
+        lambda: random.choice(head),
+        lambda: random.choice(middle),
+        lambda: f"{random.choice(head)} {random.choice(middle)}",
+    ]
+    return [kinds[i % len(kinds)]() for i in range(n)]
+
+
+def report(name: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    print(f"{name:<22} p50={p50:9.2f}ms  p95={p95:9.2f}ms  ({len(ordered)} queries)")
+
+
+async def timed(call) -> float:
+    started = time.perf_counter()
+    await call()
+    return time.perf_counter() - started
+
+
+async def grep(repo: SolutionRepo, homework_id, q: str) -> list:
+    found, after = [], None
+    terms = q.split()
+    while True:
+        page = await repo.get_solutions_by_homework(homework_id, after, MAX_PAGE_SIZE)
+        found += [s for s in page if all(t in s.answer.split() for t in terms)]
+        if len(page) < MAX_PAGE_SIZE:
+            return found
+        after = Cursor(page[-1].created_at, page[-1].id)
+
+
+async def ilike(session: AsyncSession, homework_id, q: str) -> list:
+    stmt = select(DBSolution.id).where(DBSolution.homework_id == homework_id)
+    for term in q.split():
+        stmt = stmt.where(DBSolution.answer.ilike(f"%{term}%"))
+    return (await session.execute(stmt.limit(MAX_PAGE_SIZE))).all()
+
+
+async def main(args) -> None:
+    init_db()
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            started = time.perf_counter()
+            homework_ids = await seed(conn, args.homeworks, args.solutions)
+            print(f"seeded {args.homeworks} homeworks, {args.solutions} solutions "
+                  f"in {time.perf_counter() - started:.0f}s")
+            session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+            solutions, homeworks = SolutionRepo(session), HomeworkRepo(session)
+            qs = queries(args.queries)
+            targets = [random.choice(homework_ids) for _ in qs]
+
+            report("grep (client side)", [
+                await timed(lambda: grep(solutions, hw, q)) for hw, q in zip(targets, qs[:args.queries // 5 or 1])
+            ])
+            report("ilike", [await timed(lambda: ilike(session, hw, q)) for hw, q in zip(targets, qs)])
+            report("fts solutions", [
+                await timed(lambda: solutions.search_solutions(hw, q)) for hw, q in zip(targets, qs)
+            ])
+            report("fts homeworks", [await timed(lambda: homeworks.search_homeworks(q)) for q in qs])
+            await session.close()
+        finally:
+            await trans.rollback()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--homeworks", type=int, default=2000)
+    parser.add_argument("--solutions", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,109 @@
+# tests/benchmarks/bench_similarity.py
+"""Похожие решения ДЗ: подписи MinHash и LSH-индекс против попарного сравнения.
+
+Без БД. Для каждого размера ДЗ из --sizes собирает ответы, похожие на код,
+и подсаживает --copies доли списанных (копия с правкой 0-20% строк), затем:
+
+  sign     signatures() по всем ответам ДЗ (то же, что backfill_minhash)
+  lsh      HomeworkIndex: сборка + similar(threshold); сколько подсаженных пар
+           набрали порог (правка на 20% строк может и не набрать)
+  pairs    сравнение подписей всех пар (до --max-pairwise решений) и полнота LSH
+           относительно него
+
+    python -m tests.benchmarks.bench_similarity --sizes 1000 5000 20000 --copies 0.02
+"""
+
+import argparse
+import random
+import time
+from uuid import uuid4
+
+import numpy as np
+
+from app.similarity import HomeworkIndex, signatures, to_bytes
+
+NAMES = [f"{a}_{b}" for a in ("items", "result", "node", "count", "total", "queue", "graph", "left", "right", "stack")
+         for b in ("list", "map", "idx", "tmp", "val", "acc", "sum", "max")]
+LINES = [
+    "def {a}({b}, {c}):",
+    "for {a} in range(len({b})):",
+    "if {a} > {b}: {a} = {b} + {c}",
+    "return {a}",
+    "{a}.append({b}[{c}])",
+    "while {a}: {a}, {b} = {b}, {a} % {c}",
+    "# {a}: считаем {b} для каждого {c}",
+    "print({a}, {b})",
+]
+
+
+def line() -> str:
+    return random.choice(LINES).format(a=random.choice(NAMES), b=random.choice(NAMES), c=random.choice(NAMES))
+
+
+def answer() -> str:
+    return "\n".join(line() for _ in range(random.randint(20, 80)))
+
+
+def edited(text: str) -> str:
+    lines = text.split("\n")
+    for i in random.sample(range(len(lines)), int(len(lines) * random.uniform(0, 0.2))):
+        lines[i] = line()
+    return "\n".join(lines)
+
+
+def homework(size: int, copies: float) -> tuple[list[str], set[tuple[int, int]]]:
+    answers, planted = [], set()
+    for i in range(size):
+        if answers and random.random() < copies:
+            source = random.randrange(len(answers))
+            answers.append(edited(answers[source]))
+            planted.add((source, i))
+        else:
+            answers.append(answer())
+    return answers, planted
+
+
+def pairwise(matrix: np.ndarray, threshold: float) -> set[tuple[int, int]]:
+    found = set()
+    for i in range(len(matrix) - 1):
+        close = np.nonzero((matrix[i + 1:] == matrix[i]).mean(axis=1) >= threshold)[0]
+        found.update((i, i + 1 + j) for j in close.tolist())
+    return found
+
+
+def main(args) -> None:
+    for size in args.sizes:
+        answers, planted = homework(size, args.copies)
+        started = time.perf_counter()
+        matrix = signatures(answers)
+        signed = time.perf_counter() - started
+
+        ids = [uuid4() for _ in answers]
+        started = time.perf_counter()
+        index = HomeworkIndex((id, uuid4(), to_bytes(sig)) for id, sig in zip(ids, matrix))
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        found = index.similar(args.threshold, size)
+        queried = time.perf_counter() - started
+
+        position = {id: i for i, id in enumerate(ids)}
+        pairs = {(position[p.solution_id], position[p.similar_solution_id]) for p in found}
+        print(f"{size:>6} solutions  sign={signed:6.2f}s ({size / signed:5.0f}/s)  "
+              f"lsh build={built * 1000:7.1f}ms query={queried * 1000:7.1f}ms  "
+              f"pairs={len(found)} (planted {len(pairs & planted)}/{len(planted)})")
+        if size <= args.max_pairwise:
+            started = time.perf_counter()
+            exact = pairwise(matrix, args.threshold)
+            # полнота LSH - относительно всех пар с тем же сходством подписей
+            recall = len(pairs & exact) / len(exact) if exact else 1.0
+            print(f"{'':>6} all pairs  {(time.perf_counter() - started) * 1000:9.1f}ms  "
+                  f"pairs={len(exact)} lsh recall={recall:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--copies", type=float, default=0.02)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--max-pairwise", type=int, default=5000)
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+# tests/benchmarks/common.py
+"""Общие утилиты для нагрузочных бенчмарков"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+
+
+@dataclass
+class LoadResult:
+    name: str
+    requests: int
+    errors: int
+    elapsed: float
+    latencies: list[float]
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Перцентиль латентности в миллисекундах (nearest-rank)"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        idx = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+        return ordered[idx] * 1000
+
+    def summary(self) -> str:
+        return (
+            f"{self.name:<28} {self.rps:>9.1f} req/s  "
+            f"p50={self.percentile(50):7.2f}ms  p95={self.percentile(95):7.2f}ms  "
+            f"p99={self.percentile(99):7.2f}ms  errors={self.errors}"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "elapsed": self.elapsed,
+            "rps": self.rps,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+async def run_load(
+    name: str,
+    client: httpx.AsyncClient,
+    make_request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    concurrency: int,
+    total: int,
+) -> LoadResult:
+    """Выполнить total запросов, держа в полёте не больше concurrency одновременно"""
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                resp = await make_request(client, i)
+                if resp.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return LoadResult(name, total, errors, time.perf_counter() - started, latencies)
+
+
+def make_client(base_url: str, concurrency: int) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
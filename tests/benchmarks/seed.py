@@ -0,0 +1,147 @@
+# tests/benchmarks/seed.py
+"""Генератор данных для нагрузочных прогонов.
+
+Заливает в Postgres (settings.postgres_url) курсы, ДЗ, студентов и решения
+через COPY и сохраняет идентификаторы, по которым потом ходит bench_load.
+Кроме основной массы решений (GRADED) откладываются `reserve` решений
+в статусе SUBMITTED и столько же GRADED: их расходуют сценарии оценки
+и возврата, чтобы каждый запрос был валидным переходом.
+"""
+
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from sqlalchemy import update
+
+from app.database import async_engine, init_db
+from app.repos.search import homework_vector, search_vector
+from app.schemas.homework import Homework as DBHomework
+from app.schemas.solution import Solution as DBSolution
+from app.unit_of_work import open_uow
+
+CHUNK = 100_000
+
+
+@dataclass
+class Dataset:
+    course_ids: list[str]
+    homework_ids: list[str]
+    student_ids: list[str]
+    submitted_ids: list[str] = field(default_factory=list)
+    graded_ids: list[str] = field(default_factory=list)
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(asdict(self)))
+
+    @classmethod
+    def load(cls, path: Path) -> "Dataset":
+        return cls(**json.loads(path.read_text()))
+
+
+async def _copy(driver, table: str, columns: list[str], records) -> None:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= CHUNK:
+            await driver.copy_records_to_table(table, records=batch, columns=columns)
+            batch.clear()
+    if batch:
+        await driver.copy_records_to_table(table, records=batch, columns=columns)
+
+
+async def seed(
+    courses: int,
+    homeworks_per_course: int,
+    students: int,
+    solutions: int,
+    reserve: int,
+) -> Dataset:
+    init_db()
+    now = datetime.utcnow()
+    course_ids = [uuid4() for _ in range(courses)]
+    student_ids = [uuid4() for _ in range(students)]
+    homeworks = [
+        (uuid4(), course_id)
+        for course_id in course_ids
+        for _ in range(homeworks_per_course)
+    ]
+    submitted_ids = [uuid4() for _ in range(reserve)]
+    graded_ids = [uuid4() for _ in range(reserve)]
+
+    def solution_rows():
+        special = [(id, "SUBMITTED", None) for id in submitted_ids]
+        special += [(id, "GRADED", 4) for id in graded_ids]
+        for i in range(solutions + len(special)):
+            id, status, grade = special[i] if i < len(special) else (uuid4(), "GRADED", random.randint(1, 5))
+            hw_id, _ = random.choice(homeworks)
+            created = now - timedelta(seconds=i)
+            yield (id, hw_id, random.choice(student_ids), "seeded answer", status, created, created, grade, None)
+
+    async with async_engine.begin() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        await _copy(
+            driver,
+            "homeworks",
+            ["id", "course_id", "title", "description", "created_at", "published_at", "status"],
+            (
+                (id, course_id, f"seeded {i}", "seeded", now - timedelta(seconds=i), now, "ACTIVE")
+                for i, (id, course_id) in enumerate(homeworks)
+            ),
+        )
+        await _copy(
+            driver,
+            "solutions",
+            ["id", "homework_id", "student_id", "answer", "status", "created_at",
+             "submitted_at", "grade", "feedback"],
+            solution_rows(),
+        )
+        # COPY мимо репозитория: векторы поиска - тем же выражением, что пишет он
+        await conn.execute(
+            update(DBHomework)
+            .where(DBHomework.search_vector.is_(None))
+            .values(search_vector=homework_vector(DBHomework.title, DBHomework.description))
+        )
+        await conn.execute(
+            update(DBSolution)
+            .where(DBSolution.search_vector.is_(None))
+            .values(search_vector=search_vector(DBSolution.answer))
+        )
+        # прогресс сразу согласован с решениями, как после reconcile_progress
+        await driver.execute(
+            """
+            INSERT INTO student_progress
+                (id, student_id, course_id, total_homeworks, completed_homeworks, grade_sum, average_grade)
+            SELECT gen_random_uuid(), s.student_id, min(h.course_id::text)::uuid, count(*),
+                   count(*) FILTER (WHERE s.status = 'GRADED'),
+                   coalesce(sum(s.grade) FILTER (WHERE s.status = 'GRADED'), 0),
+                   avg(s.grade) FILTER (WHERE s.status = 'GRADED')
+            FROM solutions s JOIN homeworks h ON h.id = s.homework_id
+            WHERE s.student_id = ANY($1::uuid[])
+            GROUP BY s.student_id
+            ON CONFLICT (student_id) DO NOTHING
+            """,
+            student_ids,
+        )
+
+    # статистика ДЗ - тем же пересчётом, что и rebuild_homework_stats
+    async with open_uow() as uow:
+        async with uow:
+            await uow.stats.rebuild()
+
+    async with async_engine.begin() as conn:
+        for table in ("homeworks", "solutions", "student_progress", "homework_stats"):
+            await conn.exec_driver_sql(f"ANALYZE {table}")
+
+    await async_engine.dispose()
+    return Dataset(
+        course_ids=[str(c) for c in course_ids],
+        homework_ids=[str(h) for h, _ in homeworks],
+        student_ids=[str(s) for s in student_ids],
+        submitted_ids=[str(s) for s in submitted_ids],
+        graded_ids=[str(s) for s in graded_ids],
+    )
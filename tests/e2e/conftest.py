@@ -0,0 +1,29 @@
+# tests/e2e/conftest.py
+import pytest
+import requests
+
+
+def check_query_budget(resp: requests.Response) -> None:
+    """Сервис, запущенный с QUERY_BUDGETS=1, сообщает число SQL-запросов в заголовках"""
+    if "X-Query-Count" not in resp.headers:
+        pytest.fail("service runs without QUERY_BUDGETS=1: query budgets cannot be checked", pytrace=False)
+    endpoint = f"{resp.request.method} {resp.request.path_url}"
+    assert "X-Query-Budget" in resp.headers, f"{endpoint}: endpoint has no @query_budget"
+    count, budget = int(resp.headers["X-Query-Count"]), int(resp.headers["X-Query-Budget"])
+    assert count <= budget, f"{endpoint}: {count} queries, budget is {budget}"
+    assert "X-Query-Repeated" not in resp.headers, (
+        f"{endpoint}: the same query ran {resp.headers['X-Query-Repeated']} times (N+1?)"
+    )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(monkeypatch):
+    """Каждый ответ сервиса в e2e-тестах проверяется на бюджет запросов к БД и N+1"""
+    request = requests.Session.request
+
+    def checked_request(self, method, url, *args, **kwargs):
+        resp = request(self, method, url, *args, **kwargs)
+        check_query_budget(resp)
+        return resp
+
+    monkeypatch.setattr(requests.Session, "request", checked_request)
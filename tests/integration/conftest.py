@@ -0,0 +1,39 @@
+# tests/integration/conftest.py
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import query_counter
+from app.database import engine, async_engine, init_db, replica_engine
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Живая PostgreSQL из settings.postgres_url; без неё тесты пропускаются"""
+    try:
+        with engine.connect():
+            pass
+    except OperationalError:
+        pytest.skip("PostgreSQL is not available")
+    init_db()
+
+
+@pytest.fixture()
+async def client(database):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api") as c:
+        yield c
+    # asyncpg-соединения привязаны к event loop'у теста
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+@pytest.fixture()
+def count_queries():
+    """with count_queries() as log: ... ; log.check(budget) - бюджет запросов и поиск N+1"""
+    query_counter.install(async_engine)
+    if replica_engine is not None:
+        query_counter.install(replica_engine)
+    return query_counter.count_queries
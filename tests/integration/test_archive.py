@@ -0,0 +1,119 @@
+# tests/integration/test_archive.py
+import json
+from uuid import UUID, uuid4
+
+import pytest
+
+from app import archive
+from app.services import homework_service
+from app.services.homework_service import HomeworkService
+from app.settings import settings
+from app.unit_of_work import open_uow
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "archive_dir", str(tmp_path))
+
+
+async def closed_homework(client, students: list[str], per_student: int) -> tuple[str, list[str]]:
+    resp = await client.post("/homeworks/", json={"course_id": str(uuid4()), "title": "archive", "description": "d"})
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+    ids = []
+    for i in range(per_student):
+        for student_id in students:
+            resp = await client.post(
+                "/homeworks/solutions/submit",
+                json={"homework_id": hw_id, "student_id": student_id, "answer": f"ответ {i}"},
+            )
+            ids.append(resp.json()["id"])
+            if i % 2 == 0:
+                await client.post("/homeworks/solutions/grade", json={"solution_id": ids[-1], "grade": 3 + i % 3})
+    resp = await client.post("/homeworks/close", json={"homework_id": hw_id})
+    assert resp.json()["status"] == "closed"
+    return hw_id, ids
+
+
+async def archive_homework(hw_id: str, chunk: int) -> int:
+    async with open_uow() as uow:
+        return await HomeworkService(uow).archive_homework(UUID(hw_id), chunk)
+
+
+async def archived_ids(client, hw_id: str, limit: int) -> list[str]:
+    ids, params = [], {"limit": limit}
+    while True:
+        resp = await client.get(f"/homeworks/{hw_id}/archive/solutions", params=params)
+        assert resp.status_code == 200
+        ids += [s["id"] for s in resp.json()]
+        if "X-Next-Cursor" not in resp.headers:
+            return ids
+        params["after"] = resp.headers["X-Next-Cursor"]
+
+
+async def test_archive_moves_solutions_and_keeps_progress(client):
+    students = [str(uuid4()) for _ in range(3)]
+    hw_id, ids = await closed_homework(client, students, 4)
+    progress = [(await client.get(f"/homeworks/progress/student/{s}")).json() for s in students]
+    stats = (await client.get(f"/homeworks/{hw_id}/stats")).json()
+
+    resp = await client.post(
+        "/homeworks/solutions/submit", json={"homework_id": hw_id, "student_id": students[0], "answer": "поздно"}
+    )
+    assert resp.status_code == 400
+    assert (await client.get(f"/homeworks/{hw_id}/archive/solutions")).status_code == 404
+
+    assert await archive_homework(hw_id, chunk=5) == 12
+    assert await archive_homework(hw_id, chunk=5) == 0
+
+    assert (await client.get(f"/homeworks/solutions/homework/{hw_id}")).json() == []
+    assert await archived_ids(client, hw_id, limit=4) == ids
+    resp = await client.get(f"/homeworks/{hw_id}/archive/solutions", params={"stream": True})
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == ids
+    assert (await client.get(f"/homeworks/{hw_id}/stats")).json() == stats
+
+    # полный пересчёт учитывает архивированные решения
+    for student_id, before in zip(students, progress):
+        assert (await client.post(f"/homeworks/progress/update/{student_id}")).json() == before
+    async with open_uow() as uow:
+        async with uow:
+            drifted = {row["student_id"] for row in await uow.progress.find_drift(limit=100_000)}
+            stats_drift = {row["homework_id"] for row in await uow.stats.find_drift(limit=100_000)}
+            await uow.stats.rebuild()
+    assert not drifted & {UUID(s) for s in students}
+    assert UUID(hw_id) not in stats_drift
+    assert (await client.get(f"/homeworks/{hw_id}/stats")).json() == stats
+
+
+async def test_interrupted_archive_resumes_without_duplicates(client, monkeypatch):
+    hw_id, ids = await closed_homework(client, [str(uuid4()), str(uuid4())], 5)
+    calls = 0
+
+    def flaky_write_part(homework_id, part, solutions):
+        nonlocal calls
+        calls += 1
+        # файл второй части успевает лечь на диск, но транзакция откатывается
+        archive.write_part(homework_id, part, solutions)
+        if calls == 2:
+            raise OSError("disk full")
+
+    monkeypatch.setattr(homework_service, "write_part", flaky_write_part)
+    with pytest.raises(OSError):
+        await archive_homework(hw_id, chunk=3)
+    assert len((await client.get(f"/homeworks/solutions/homework/{hw_id}")).json()) == 7
+    assert await archived_ids(client, hw_id, limit=100) == ids[:3]
+
+    assert await archive_homework(hw_id, chunk=3) == 7
+    assert await archived_ids(client, hw_id, limit=100) == ids
+    assert (await client.get(f"/homeworks/solutions/homework/{hw_id}")).json() == []
+
+
+async def test_only_closed_homework_is_archived(client):
+    resp = await client.post("/homeworks/", json={"course_id": str(uuid4()), "title": "open", "description": "d"})
+    hw_id = resp.json()["id"]
+    with pytest.raises(ValueError):
+        await archive_homework(hw_id, chunk=10)
+    assert (await client.post("/homeworks/close", json={"homework_id": hw_id})).status_code == 400
+    assert (await client.post("/homeworks/close", json={"homework_id": str(uuid4())})).status_code == 404
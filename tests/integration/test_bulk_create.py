@@ -0,0 +1,32 @@
+# tests/integration/test_bulk_create.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+async def test_bulk_create_inserts_whole_batch(client):
+    course_id = str(uuid4())
+    batch = [{"course_id": course_id, "title": f"hw {i}", "description": "d"} for i in range(50)]
+
+    resp = await client.post("/homeworks/bulk", json=batch)
+    assert resp.status_code == 200
+    created = resp.json()
+    assert [h["title"] for h in created] == [b["title"] for b in batch]
+    assert {h["status"] for h in created} == {"created"}
+
+    listed = (await client.get(f"/homeworks/course/{course_id}", params={"limit": 100})).json()
+    assert {h["id"] for h in listed} == {h["id"] for h in created}
+
+
+async def test_bulk_create_rejects_invalid_batch_atomically(client):
+    course_id = str(uuid4())
+    batch = [
+        {"course_id": course_id, "title": "ok", "description": "d"},
+        {"course_id": "not-a-uuid", "title": "bad", "description": "d"},
+    ]
+
+    assert (await client.post("/homeworks/bulk", json=batch)).status_code == 422
+    assert (await client.post("/homeworks/bulk", json=[])).status_code == 422
+    assert (await client.get(f"/homeworks/course/{course_id}")).json() == []
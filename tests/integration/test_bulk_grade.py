@@ -0,0 +1,52 @@
+# tests/integration/test_bulk_grade.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+async def test_bulk_grade_reports_per_item_and_updates_progress(client):
+    resp = await client.post(
+        "/homeworks/", json={"course_id": str(uuid4()), "title": "bulk grade", "description": "d"}
+    )
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    students = [str(uuid4()), str(uuid4())]
+    sol_ids = []
+    for student_id in students + students:
+        resp = await client.post(
+            "/homeworks/solutions/submit",
+            json={"homework_id": hw_id, "student_id": student_id, "answer": "a"},
+        )
+        sol_ids.append(resp.json()["id"])
+
+    # первое решение уже оценено - в пачке оно должно дать ошибку
+    await client.post("/homeworks/solutions/grade", json={"solution_id": sol_ids[0], "grade": 2})
+
+    missing = str(uuid4())
+    batch = [
+        {"solution_id": sol_ids[0], "grade": 5},
+        {"solution_id": sol_ids[1], "grade": 4},
+        {"solution_id": missing, "grade": 5},
+        {"solution_id": sol_ids[2], "grade": 3, "feedback": "ok"},
+        {"solution_id": sol_ids[3], "grade": 5},
+        {"solution_id": sol_ids[3], "grade": 1},
+    ]
+    resp = await client.post("/homeworks/solutions/grade/bulk", json=batch)
+    assert resp.status_code == 200
+    results = resp.json()
+
+    assert [r["ok"] for r in results] == [False, True, False, True, True, False]
+    assert results[0]["error"] == "Solution cannot be graded"
+    assert results[2]["error"] == "Solution not found"
+    assert results[3]["solution"]["grade"] == 3
+    assert results[3]["solution"]["feedback"] == "ok"
+
+    for student_id, expected_avg in zip(students, (2.5, 4.5)):
+        progress = (await client.get(f"/homeworks/progress/student/{student_id}")).json()
+        assert progress["completed_homeworks"] == 2
+        assert progress["average_grade"] == pytest.approx(expected_avg)
+        recomputed = (await client.post(f"/homeworks/progress/update/{student_id}")).json()
+        assert recomputed == progress
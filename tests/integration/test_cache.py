@@ -0,0 +1,36 @@
+# tests/integration/test_cache.py
+from uuid import uuid4
+
+import pytest
+
+from app import cache
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.mark.skipif(cache.cache is None, reason="cache is disabled")
+async def test_writes_invalidate_cached_reads(client):
+    """Закэшированные ДЗ и список курса обновляются после publish и create"""
+    course_id = str(uuid4())
+    resp = await client.post(
+        "/homeworks/", json={"course_id": course_id, "title": "cached", "description": "d"}
+    )
+    hw_id = resp.json()["id"]
+
+    # прогреваем кэш статусом CREATED
+    assert (await client.get(f"/homeworks/course/{course_id}")).json()[0]["status"] == "created"
+    submit = {"homework_id": hw_id, "student_id": str(uuid4()), "answer": "a"}
+    assert (await client.post("/homeworks/solutions/submit", json=submit)).status_code == 400
+
+    hits = cache.stats.hits["homework"]
+    assert (await client.post("/homeworks/solutions/submit", json=submit)).status_code == 400
+    assert cache.stats.hits["homework"] == hits + 1
+
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+    assert (await client.post("/homeworks/solutions/submit", json=submit)).status_code == 200
+
+    await client.post(
+        "/homeworks/", json={"course_id": course_id, "title": "second", "description": "d"}
+    )
+    listed = (await client.get(f"/homeworks/course/{course_id}")).json()
+    assert [h["status"] for h in listed] == ["active", "created"]
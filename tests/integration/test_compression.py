@@ -0,0 +1,58 @@
+# tests/integration/test_compression.py
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+from app.schemas.compressed_text import COMPRESSED
+
+pytestmark = pytest.mark.integration
+
+CODE = "def solve(items):\n    return [x * 2 for x in items if x]  # рекурсия не нужна\n" * 15
+FEEDBACK = "Проверьте граничные случаи: пустой список, отрицательные числа. " * 8
+
+
+async def stored(table: str, column: str, id: str) -> str:
+    """Значение колонки как оно лежит в БД, в обход CompressedText"""
+    async with AsyncSessionLocal() as session:
+        return await session.scalar(text(f"SELECT {column} FROM {table} WHERE id = :id"), {"id": UUID(id)})
+
+
+async def test_long_text_round_trips_compressed(client):
+    course_id = str(uuid4())
+    resp = await client.post(
+        "/homeworks/bulk",
+        json=[{"course_id": course_id, "title": "compressed", "description": CODE} for _ in range(2)],
+    )
+    hw_id = resp.json()[0]["id"]
+    assert (await stored("homeworks", "description", hw_id)).startswith(COMPRESSED)
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    student_id = str(uuid4())
+    resp = await client.post(
+        "/homeworks/solutions/submit", json={"homework_id": hw_id, "student_id": student_id, "answer": CODE}
+    )
+    sol_id = resp.json()["id"]
+    assert resp.json()["answer"] == CODE
+    assert (await stored("solutions", "answer", sol_id)).startswith(COMPRESSED)
+
+    resp = await client.post("/homeworks/solutions/return", json={"solution_id": sol_id, "feedback": FEEDBACK})
+    assert resp.json()["feedback"] == FEEDBACK
+    # bulk-оценка пишет feedback через VALUES - там тоже должен работать CompressedText
+    resp = await client.post(
+        "/homeworks/solutions/grade/bulk", json=[{"solution_id": sol_id, "grade": 5, "feedback": "Исправлено. " + FEEDBACK}]
+    )
+    assert resp.json()[0]["ok"]
+    assert (await stored("solutions", "feedback", sol_id)).startswith(COMPRESSED)
+
+    (listed,) = (await client.get(f"/homeworks/solutions/student/{student_id}")).json()
+    assert (listed["answer"], listed["feedback"]) == (CODE, "Исправлено. " + FEEDBACK)
+    homeworks = (await client.get(f"/homeworks/course/{course_id}")).json()
+    assert [h["description"] for h in homeworks] == [CODE, CODE]
+
+    # вектор поиска считается по исходному тексту, а не по сжатому
+    resp = await client.get("/homeworks/solutions/search", params={"homework_id": hw_id, "q": "граничные"})
+    assert resp.json() == []
+    resp = await client.get("/homeworks/solutions/search", params={"homework_id": hw_id, "q": "items"})
+    assert [s["id"] for s in resp.json()] == [sol_id]
@@ -0,0 +1,30 @@
+# tests/integration/test_fast_json.py
+from uuid import uuid4
+
+import pytest
+
+from app.main import app
+from app.settings import settings
+
+pytestmark = pytest.mark.integration
+
+
+async def test_fast_json_matches_response_model_output(client, monkeypatch):
+    """FAST_JSON меняет только способ сериализации: тело, заголовки и схема те же"""
+    course_id = str(uuid4())
+    batch = [{"course_id": course_id, "title": f"хв {i}", "description": "d"} for i in range(3)]
+    await client.post("/homeworks/bulk", json=batch)
+    url = f"/homeworks/course/{course_id}"
+
+    monkeypatch.setattr(settings, "fast_json", False)
+    schema = app.openapi()
+    slow = await client.get(url, params={"limit": 2})
+
+    monkeypatch.setattr(settings, "fast_json", True)
+    fast = await client.get(url, params={"limit": 2})
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.content == slow.content
+    assert fast.headers["content-type"] == slow.headers["content-type"]
+    assert fast.headers["x-next-cursor"] == slow.headers["x-next-cursor"]
+    assert app.openapi() == schema
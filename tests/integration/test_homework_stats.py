@@ -0,0 +1,82 @@
+# tests/integration/test_homework_stats.py
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import update
+
+from app.schemas.homework_stats import HomeworkStats as DBStats
+from app.unit_of_work import open_uow
+
+pytestmark = pytest.mark.integration
+
+
+async def test_stats_follow_solution_transitions(client):
+    resp = await client.post(
+        "/homeworks/", json={"course_id": str(uuid4()), "title": "stats", "description": "d"}
+    )
+    hw_id = resp.json()["id"]
+    assert (await client.get(f"/homeworks/{hw_id}/stats")).json()["submitted_count"] == 0
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    sol_ids = []
+    for _ in range(3):
+        resp = await client.post(
+            "/homeworks/solutions/submit",
+            json={"homework_id": hw_id, "student_id": str(uuid4()), "answer": "a"},
+        )
+        sol_ids.append(resp.json()["id"])
+
+    await client.post("/homeworks/solutions/grade", json={"solution_id": sol_ids[0], "grade": 5})
+    await client.post("/homeworks/solutions/grade", json={"solution_id": sol_ids[1], "grade": 3})
+    await client.post("/homeworks/solutions/grade/bulk", json=[{"solution_id": sol_ids[2], "grade": 4}])
+    await client.post("/homeworks/solutions/return", json={"solution_id": sol_ids[1], "feedback": "redo"})
+    # переоценка: 5 -> 2
+    await client.post("/homeworks/solutions/return", json={"solution_id": sol_ids[0], "feedback": "redo"})
+    await client.post("/homeworks/solutions/grade", json={"solution_id": sol_ids[0], "grade": 2})
+
+    stats = (await client.get(f"/homeworks/{hw_id}/stats")).json()
+    assert stats == {
+        "homework_id": hw_id,
+        "submitted_count": 3,
+        "graded_count": 2,
+        "returned_count": 1,
+        "average_grade": 3.0,
+        "histogram": {"2": 1, "4": 1},
+    }
+
+    async with open_uow() as uow:
+        async with uow:
+            drift = await uow.stats.find_drift(limit=100_000)
+    assert UUID(hw_id) not in {row["homework_id"] for row in drift}
+
+
+async def test_rebuild_repairs_drift(client):
+    resp = await client.post(
+        "/homeworks/", json={"course_id": str(uuid4()), "title": "drift", "description": "d"}
+    )
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+    resp = await client.post(
+        "/homeworks/solutions/submit",
+        json={"homework_id": hw_id, "student_id": str(uuid4()), "answer": "a"},
+    )
+    await client.post("/homeworks/solutions/grade", json={"solution_id": resp.json()["id"], "grade": 5})
+
+    async with open_uow() as uow:
+        async with uow:
+            await uow.session.execute(
+                update(DBStats).where(DBStats.homework_id == UUID(hw_id)).values(graded_count=7, histogram={})
+            )
+        async with uow:
+            drift = await uow.stats.find_drift(limit=100_000)
+            assert UUID(hw_id) in {row["homework_id"] for row in drift}
+            await uow.stats.rebuild()
+        async with uow:
+            assert UUID(hw_id) not in {row["homework_id"] for row in await uow.stats.find_drift(limit=100_000)}
+
+    stats = (await client.get(f"/homeworks/{hw_id}/stats")).json()
+    assert (stats["graded_count"], stats["histogram"]) == (1, {"5": 1})
+
+
+async def test_stats_of_missing_homework(client):
+    assert (await client.get(f"/homeworks/{uuid4()}/stats")).status_code == 404
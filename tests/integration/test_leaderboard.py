@@ -0,0 +1,40 @@
+# tests/integration/test_leaderboard.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+async def test_leaderboard_follows_grades(client):
+    course_id = str(uuid4())
+    resp = await client.post("/homeworks/", json={"course_id": course_id, "title": "rank", "description": "d"})
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    students = [str(uuid4()) for _ in range(3)]
+    solutions = {}
+    for student_id, grade in zip(students, (3, 5, 4)):
+        resp = await client.post(
+            "/homeworks/solutions/submit",
+            json={"homework_id": hw_id, "student_id": student_id, "answer": "a"},
+        )
+        solutions[student_id] = resp.json()["id"]
+        await client.post("/homeworks/solutions/grade", json={"solution_id": solutions[student_id], "grade": grade})
+
+    top = (await client.get(f"/homeworks/leaderboard/course/{course_id}", params={"limit": 2})).json()
+    assert [(e["student_id"], e["rank"]) for e in top] == [(students[1], 1), (students[2], 2)]
+
+    # рейтинг уже в памяти: переоценка видна сразу, без перечитывания курса
+    await client.post("/homeworks/solutions/return", json={"solution_id": solutions[students[0]], "feedback": "x"})
+    await client.post("/homeworks/solutions/grade", json={"solution_id": solutions[students[0]], "grade": 5})
+
+    first = (await client.get(f"/homeworks/leaderboard/course/{course_id}/student/{students[0]}")).json()
+    assert (first["average_grade"], first["rank"]) == (5.0, 1)
+    third = (await client.get(f"/homeworks/leaderboard/course/{course_id}/student/{students[2]}")).json()
+    assert third["rank"] == 3
+
+    # возврат без новой оценки убирает студента из рейтинга
+    await client.post("/homeworks/solutions/return", json={"solution_id": solutions[students[2]], "feedback": "x"})
+    resp = await client.get(f"/homeworks/leaderboard/course/{course_id}/student/{students[2]}")
+    assert resp.status_code == 404
@@ -0,0 +1,40 @@
+# tests/integration/test_metrics.py
+from uuid import uuid4
+
+import pytest
+
+from app.settings import settings
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(not settings.metrics_enabled, reason="metrics are disabled"),
+]
+
+
+def sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+async def test_metrics_expose_route_latency_and_query_counts(client):
+    course_id = str(uuid4())
+    route = 'route="/api/homeworks/course/{course_id}"'
+    before = (await client.get("http://test/metrics")).text
+
+    await client.get(f"/homeworks/course/{course_id}")
+
+    resp = await client.get("http://test/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+
+    prefix = f'http_request_duration_seconds_count{{method="GET",{route},status="200"}}'
+    count_before = sample(before, prefix) if prefix in before else 0
+    assert sample(text, prefix) == count_before + 1
+    # ровно один SELECT на страницу ДЗ курса
+    assert sample(text, f"db_queries_per_request_sum{{{route}}}") >= 1
+    assert sample(text, "db_pool_size ") >= 1
+    assert sample(text, "db_pool_wait_seconds_count ") >= 1
+    assert 'payment_messages_total{outcome="acked"}' in text
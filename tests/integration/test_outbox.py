@@ -0,0 +1,84 @@
+# tests/integration/test_outbox.py
+import json
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import select
+
+from app import outbox
+from app.database import AsyncSessionLocal
+from app.schemas.outbox import OutboxEvent
+
+pytestmark = pytest.mark.integration
+
+
+class RecordingExchange:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.published = []
+
+    async def publish(self, message, routing_key, mandatory=True):
+        if self.fail:
+            raise ConnectionError("broker is down")
+        self.published.append((routing_key, json.loads(message.body)))
+
+
+async def events_for(aggregate_id: str) -> list[str]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(OutboxEvent.event_type)
+            .where(OutboxEvent.aggregate_id == UUID(aggregate_id))
+            .order_by(OutboxEvent.id)
+        )
+        return list(result.scalars())
+
+
+async def published_homework(client) -> str:
+    resp = await client.post(
+        "/homeworks/", json={"course_id": str(uuid4()), "title": "outbox", "description": "d"}
+    )
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+    return hw_id
+
+
+async def test_events_are_written_with_the_change(client):
+    hw_id = await published_homework(client)
+    # повторная публикация не проходит - и события о ней нет
+    assert (await client.post("/homeworks/publish", json={"homework_id": hw_id})).status_code == 400
+    assert await events_for(hw_id) == ["homework.published"]
+
+    resp = await client.post(
+        "/homeworks/solutions/submit",
+        json={"homework_id": hw_id, "student_id": str(uuid4()), "answer": "a"},
+    )
+    sol_id = resp.json()["id"]
+    await client.post("/homeworks/solutions/grade", json={"solution_id": sol_id, "grade": 5})
+    await client.post("/homeworks/solutions/return", json={"solution_id": sol_id, "feedback": "redo"})
+    await client.post("/homeworks/solutions/grade/bulk", json=[{"solution_id": sol_id, "grade": 4}])
+
+    assert await events_for(sol_id) == ["solution.graded", "solution.returned", "solution.graded"]
+
+
+async def test_relay_publishes_and_deletes(client):
+    hw_id = await published_homework(client)
+
+    exchange = RecordingExchange()
+    while await outbox.relay_batch(exchange, limit=100):
+        pass
+
+    routing_key, body = next(
+        (key, body) for key, body in exchange.published if body["aggregate_id"] == hw_id
+    )
+    assert routing_key == "homework.published"
+    assert body["payload"]["status"] == "active"
+    assert await events_for(hw_id) == []
+
+
+async def test_unconfirmed_batch_stays_in_outbox(client):
+    hw_id = await published_homework(client)
+
+    with pytest.raises(ConnectionError):
+        await outbox.relay_batch(RecordingExchange(fail=True), limit=100_000)
+
+    assert await events_for(hw_id) == ["homework.published"]
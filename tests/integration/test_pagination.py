@@ -0,0 +1,51 @@
+# tests/integration/test_pagination.py
+import json
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture()
+async def course(client):
+    course_id = str(uuid4())
+    ids = []
+    for i in range(5):
+        resp = await client.post(
+            "/homeworks/",
+            json={"course_id": course_id, "title": f"hw {i}", "description": "d"},
+        )
+        ids.append(resp.json()["id"])
+    return course_id, ids
+
+
+async def test_keyset_pages_cover_course_once(client, course):
+    """Проход по X-Next-Cursor отдаёт каждую ДЗ ровно один раз и по порядку"""
+    course_id, ids = course
+    seen, after = [], None
+    while True:
+        params = {"limit": 2} | ({"after": after} if after else {})
+        resp = await client.get(f"/homeworks/course/{course_id}", params=params)
+        assert resp.status_code == 200
+        seen += [hw["id"] for hw in resp.json()]
+        after = resp.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+    assert seen == ids
+
+
+async def test_ndjson_stream(client, course):
+    course_id, ids = course
+    resp = await client.get(f"/homeworks/course/{course_id}", params={"stream": True})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["id"] for row in rows] == ids
+
+
+async def test_invalid_cursor(client):
+    resp = await client.get("/homeworks/", params={"after": "not-a-cursor"})
+    assert resp.status_code == 400
+    resp = await client.get("/homeworks/", params={"after": f"2024-01-01T00:00:00+03:00,{uuid4()}"})
+    assert resp.status_code == 400
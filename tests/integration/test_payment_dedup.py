@@ -0,0 +1,45 @@
+# tests/integration/test_payment_dedup.py
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.services.homework_service import HomeworkService
+from app.unit_of_work import open_uow
+
+pytestmark = pytest.mark.integration
+
+
+async def apply(payments):
+    async with open_uow() as uow:
+        return await HomeworkService(uow).apply_payments(payments)
+
+
+async def test_duplicate_payment_does_not_activate_again(client):
+    course_id = uuid4()
+    resp = await client.post(
+        "/homeworks/", json={"course_id": str(course_id), "title": "paid", "description": "d"}
+    )
+    key = uuid4()
+
+    activated, duplicate = await apply([(course_id, [key])])
+    assert [str(hw.id) for hw in activated] == [resp.json()["id"]]
+    assert duplicate == [False]
+
+    activated, duplicate = await apply([(course_id, [key]), (course_id, [])])
+    assert duplicate == [True, False]
+    # платёж без ключей обрабатывается, но активировать уже нечего
+    assert activated == []
+
+
+async def test_purge_removes_expired_keys(client):
+    old, fresh = uuid4(), uuid4()
+    await apply([(uuid4(), [old, fresh])])
+
+    async with open_uow() as uow:
+        svc = HomeworkService(uow)
+        assert await svc.purge_processed_payments(datetime.utcnow() - timedelta(hours=1)) >= 0
+        assert await svc.purge_processed_payments(datetime.utcnow() + timedelta(seconds=1)) >= 2
+
+    _, duplicate = await apply([(uuid4(), [old])])
+    assert duplicate == [False]
@@ -0,0 +1,47 @@
+# tests/integration/test_progress.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+async def test_incremental_progress_matches_recompute(client):
+    """Счётчики после оценки, возврата и переоценки совпадают с полным пересчётом"""
+    student_id = str(uuid4())
+    resp = await client.post(
+        "/homeworks/",
+        json={"course_id": str(uuid4()), "title": "progress", "description": "d"},
+    )
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    sol_ids = []
+    for i in range(3):
+        resp = await client.post(
+            "/homeworks/solutions/submit",
+            json={"homework_id": hw_id, "student_id": student_id, "answer": f"a{i}"},
+        )
+        sol_ids.append(resp.json()["id"])
+
+    async def grade(sol_id, grade):
+        resp = await client.post(
+            "/homeworks/solutions/grade", json={"solution_id": sol_id, "grade": grade}
+        )
+        assert resp.status_code == 200
+
+    await grade(sol_ids[0], 5)
+    await grade(sol_ids[1], 3)
+    resp = await client.post(
+        "/homeworks/solutions/return", json={"solution_id": sol_ids[0], "feedback": "redo"}
+    )
+    assert resp.status_code == 200
+    await grade(sol_ids[0], 4)
+
+    progress = (await client.get(f"/homeworks/progress/student/{student_id}")).json()
+    assert progress["total_homeworks"] == 3
+    assert progress["completed_homeworks"] == 2
+    assert progress["average_grade"] == pytest.approx(3.5)
+
+    recomputed = (await client.post(f"/homeworks/progress/update/{student_id}")).json()
+    assert recomputed == progress
@@ -0,0 +1,34 @@
+# tests/integration/test_query_budget.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+async def test_write_path_stays_within_budget(client, count_queries):
+    resp = await client.post(
+        "/homeworks/", json={"course_id": str(uuid4()), "title": "budget", "description": "d"}
+    )
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    sol_ids = []
+    for _ in range(10):
+        with count_queries() as log:
+            resp = await client.post(
+                "/homeworks/solutions/submit",
+                json={"homework_id": hw_id, "student_id": str(uuid4()), "answer": "a"},
+            )
+        log.check(3)
+        sol_ids.append(resp.json()["id"])
+
+    # пачка из 10 оценок по разным студентам - те же 5 запросов (с outbox и статистикой ДЗ), без N+1
+    with count_queries() as log:
+        resp = await client.post(
+            "/homeworks/solutions/grade/bulk",
+            json=[{"solution_id": sol_id, "grade": 4} for sol_id in sol_ids],
+        )
+    assert all(r["ok"] for r in resp.json())
+    log.check(5)
+
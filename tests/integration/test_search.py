@@ -0,0 +1,74 @@
+# tests/integration/test_search.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+def token() -> str:
+    """Слово, которого нет в других тестах: база между прогонами не чистится"""
+    return f"x{uuid4().hex[:12]}"
+
+
+async def test_homework_search_ranks_title_first_and_pages(client):
+    word = token()
+    course_id = str(uuid4())
+    resp = await client.post(
+        "/homeworks/", json={"course_id": course_id, "title": "intro", "description": f"read {word}"}
+    )
+    in_description = resp.json()["id"]
+    resp = await client.post(
+        "/homeworks/bulk",
+        json=[{"course_id": course_id, "title": f"{word} basics", "description": "d"} for _ in range(3)],
+    )
+    in_title = {h["id"] for h in resp.json()}
+
+    seen, after = [], None
+    while True:
+        params = {"q": word, "limit": 2} | ({"after": after} if after else {})
+        resp = await client.get("/homeworks/search", params=params)
+        seen += [h["id"] for h in resp.json()]
+        after = resp.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+
+    assert len(seen) == 4
+    assert set(seen[:3]) == in_title
+    assert seen[3] == in_description
+
+
+async def test_solution_search_is_scoped_to_homework(client):
+    word = token()
+    hw_ids = []
+    for _ in range(2):
+        resp = await client.post(
+            "/homeworks/", json={"course_id": str(uuid4()), "title": "search", "description": "d"}
+        )
+        hw_ids.append(resp.json()["id"])
+        await client.post("/homeworks/publish", json={"homework_id": hw_ids[-1]})
+
+    answers = [f"{word} через рекурсивные функции", f"{word} циклом", "без ключевого слова"]
+    for hw_id in hw_ids:
+        for answer in answers:
+            await client.post(
+                "/homeworks/solutions/submit",
+                json={"homework_id": hw_id, "student_id": str(uuid4()), "answer": answer},
+            )
+
+    resp = await client.get("/homeworks/solutions/search", params={"homework_id": hw_ids[0], "q": word})
+    found = resp.json()
+    assert {s["answer"] for s in found} == set(answers[:2])
+    assert {s["homework_id"] for s in found} == {hw_ids[0]}
+
+    # словоформы и исключение: "функция" находит "функции", "-циклом" отбрасывает второе решение
+    resp = await client.get(
+        "/homeworks/solutions/search", params={"homework_id": hw_ids[0], "q": f"{word} функция -циклом"}
+    )
+    assert [s["answer"] for s in resp.json()] == [answers[0]]
+
+
+async def test_search_validates_input(client):
+    assert (await client.get("/homeworks/search", params={"q": ""})).status_code == 422
+    resp = await client.get("/homeworks/search", params={"q": "x", "after": "not-a-cursor"})
+    assert resp.status_code == 400
@@ -0,0 +1,71 @@
+# tests/integration/test_session_pool.py
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+from app.database import async_engine
+
+pytestmark = pytest.mark.integration
+
+REQUESTS = 10_000
+CONCURRENCY = 10
+
+
+@pytest.fixture()
+def pool_stats():
+    stats = {"checked_out": 0, "peak": 0, "checkouts": 0}
+
+    def on_checkout(*_):
+        stats["checked_out"] += 1
+        stats["checkouts"] += 1
+        stats["peak"] = max(stats["peak"], stats["checked_out"])
+
+    def on_checkin(*_):
+        stats["checked_out"] -= 1
+
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "checkout", on_checkout)
+    event.listen(sync_engine, "checkin", on_checkin)
+    yield stats
+    event.remove(sync_engine, "checkout", on_checkout)
+    event.remove(sync_engine, "checkin", on_checkin)
+
+
+async def test_pool_checkouts_stay_flat(client, pool_stats):
+    """Каждый запрос берёт не больше одного соединения и гарантированно его возвращает"""
+    course_id = str(uuid4())
+    resp = await client.post(
+        "/homeworks/",
+        json={"course_id": course_id, "title": "pool", "description": "pool"},
+    )
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    async def one_request(i: int) -> None:
+        kind = i % 3
+        if kind == 0:
+            resp = await client.get(f"/homeworks/course/{course_id}")
+            assert resp.status_code == 200
+        elif kind == 1:
+            resp = await client.post(
+                "/homeworks/solutions/submit",
+                json={"homework_id": hw_id, "student_id": str(uuid4()), "answer": "a"},
+            )
+            assert resp.status_code == 200
+        else:
+            # ошибка внутри транзакции тоже должна освобождать соединение
+            resp = await client.post("/homeworks/publish", json={"homework_id": str(uuid4())})
+            assert resp.status_code == 404
+
+    start_checkouts = pool_stats["checkouts"]
+    for batch_start in range(0, REQUESTS, CONCURRENCY):
+        await asyncio.gather(
+            *(one_request(i) for i in range(batch_start, batch_start + CONCURRENCY))
+        )
+        assert pool_stats["checked_out"] == 0
+
+    assert async_engine.sync_engine.pool.checkedout() == 0
+    assert pool_stats["peak"] <= CONCURRENCY
+    assert pool_stats["checkouts"] - start_checkouts <= REQUESTS
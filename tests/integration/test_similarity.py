@@ -0,0 +1,35 @@
+# tests/integration/test_similarity.py
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+ANSWER = "\n".join(f"def step_{i}(xs):\n    return [x * {i} for x in xs if x % {i + 1}]" for i in range(20))
+
+
+async def test_similar_solutions_pairs_copied_answers(client):
+    resp = await client.post("/homeworks/", json={"course_id": str(uuid4()), "title": "copy", "description": "d"})
+    hw_id = resp.json()["id"]
+    await client.post("/homeworks/publish", json={"homework_id": hw_id})
+
+    async def submit(student_id: str, answer: str) -> str:
+        resp = await client.post(
+            "/homeworks/solutions/submit", json={"homework_id": hw_id, "student_id": student_id, "answer": answer}
+        )
+        return resp.json()["id"]
+
+    author, copier = str(uuid4()), str(uuid4())
+    original = await submit(author, ANSWER)
+    await submit(str(uuid4()), "while True:\n    print('совсем другое решение')")
+    assert (await client.get(f"/homeworks/{hw_id}/similar-solutions")).json() == []
+
+    # индекс ДЗ уже в памяти: новое решение видно без перечитывания
+    copy = await submit(copier, ANSWER.replace("    ", "  ").upper())
+    (pair,) = (await client.get(f"/homeworks/{hw_id}/similar-solutions")).json()
+    assert (pair["solution_id"], pair["similar_solution_id"]) == (original, copy)
+    assert (pair["student_id"], pair["similar_student_id"]) == (author, copier)
+    assert pair["similarity"] == 1.0
+
+    resp = await client.get(f"/homeworks/{hw_id}/similar-solutions", params={"threshold": 0.5})
+    assert resp.status_code == 422
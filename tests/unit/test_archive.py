@@ -0,0 +1,68 @@
+# tests/unit/test_archive.py
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app import archive
+from app.models.pagination import Cursor
+from app.models.solution import Solution, SolutionStatus
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "archive_dir", str(tmp_path))
+    return tmp_path
+
+
+def solutions(n: int) -> list[Solution]:
+    start = datetime(2026, 1, 1)
+    return [
+        Solution(
+            id=uuid4(),
+            homework_id=uuid4(),
+            student_id=uuid4(),
+            answer=f"ответ {i}",
+            status=SolutionStatus.GRADED,
+            created_at=start + timedelta(seconds=i // 2),  # пары с одинаковым created_at
+            grade=i % 5,
+        )
+        for i in range(n)
+    ]
+
+
+def write(homework_id, items: list[Solution], chunk: int) -> int:
+    parts = 0
+    for i in range(0, len(items), chunk):
+        archive.write_part(homework_id, parts, items[i:i + chunk])
+        parts += 1
+    return parts
+
+
+def test_part_round_trip():
+    homework_id, items = uuid4(), solutions(5)
+    archive.write_part(homework_id, 0, items)
+    assert archive.load_part(homework_id, 0) == items
+    assert not list(archive.homework_dir(homework_id).glob("*.tmp"))
+
+
+def test_pages_cross_parts_with_cursor():
+    homework_id = uuid4()
+    items = sorted(solutions(23), key=lambda s: (s.created_at, s.id))
+    parts = write(homework_id, items, 4)
+
+    seen, after = [], None
+    while page := archive.read_page(homework_id, parts, after, 5):
+        seen += page
+        after = Cursor(page[-1].created_at, page[-1].id)
+    assert seen == items
+
+
+def test_uncommitted_part_is_not_served():
+    """Часть, записанная без commit чекпоинта, не видна: читаются только первые parts"""
+    homework_id = uuid4()
+    items = sorted(solutions(6), key=lambda s: (s.created_at, s.id))
+    write(homework_id, items, 3)
+    assert archive.read_page(homework_id, 1, None, 100) == items[:3]
+    assert archive.read_page(homework_id, 0, None, 100) == []
@@ -0,0 +1,89 @@
+"""Unit tests for the in-memory LRU + TTL cache backend"""
+
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from app.cache import MemoryCache
+from app.models.homework import Homework, HomeworkStatus
+from app.repos.cached_homework_repo import CachedHomeworkRepo
+from app.repos.homework_repo import HomeworkRepo
+
+
+async def test_lru_evicts_least_recently_used():
+    cache = MemoryCache(max_size=2, ttl=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")
+    await cache.set("c", 3)
+
+    assert await cache.get("a") == 1
+    assert await cache.get("b") is None
+    assert await cache.get("c") == 3
+
+
+async def test_expired_entry_is_a_miss(monkeypatch):
+    cache = MemoryCache(max_size=10, ttl=5)
+    await cache.set("a", 1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+
+    assert await cache.get("a") is None
+
+
+async def test_generation_survives_eviction():
+    cache = MemoryCache(max_size=1, ttl=60)
+    await cache.bump("course_gen:1")
+    await cache.set("x", 1)
+    await cache.set("y", 2)
+
+    assert await cache.generation("course_gen:1") == 1
+    assert await cache.generation("course_gen:2") == 0
+
+
+async def test_old_generations_are_forgotten_after_ttl(monkeypatch):
+    cache = MemoryCache(max_size=10, ttl=5)
+    now = time.monotonic()
+    await cache.set("course:1:0", "before bump")
+    await cache.bump("course_gen:1")
+    generation = await cache.generation("course_gen:1")
+    await cache.set(f"course:1:{generation}", "after bump")
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    await cache.bump("course_gen:2")
+
+    # счётчик курса 1 забыт, но записи под его поколениями уже истекли
+    assert list(cache._generations) == ["course_gen:2"]
+    assert await cache.generation("course_gen:1") == 0
+    assert await cache.get("course:1:0") is None
+    await cache.bump("course_gen:1")
+    assert await cache.generation("course_gen:1") not in (0, generation)
+
+
+async def test_read_racing_invalidation_is_not_cached(monkeypatch):
+    cache = MemoryCache(max_size=10, ttl=60)
+    old = Homework(
+        id=uuid4(), course_id=uuid4(), title="t", description="d",
+        created_at=datetime(2026, 1, 1), status=HomeworkStatus.CREATED,
+    )
+    callbacks = []
+    writer = CachedHomeworkRepo(None, cache, callbacks.append)
+
+    async def slow_read(self, id):
+        # пока строка читалась, другой запрос опубликовал ДЗ и закоммитил
+        writer._invalidate([old])
+        await callbacks.pop()()
+        return old
+
+    monkeypatch.setattr(HomeworkRepo, "get_homework_by_id", slow_read)
+    reader = CachedHomeworkRepo(None, cache, callbacks.append)
+    assert await reader.get_homework_by_id(old.id) == old
+    assert await cache.get(f"hw:{old.id}") is None
+
+    # без гонки строка кэшируется как обычно
+    async def read(self, id):
+        return old
+
+    monkeypatch.setattr(HomeworkRepo, "get_homework_by_id", read)
+    await reader.get_homework_by_id(old.id)
+    assert await cache.get(f"hw:{old.id}") == old
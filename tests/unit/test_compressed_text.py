@@ -0,0 +1,40 @@
+"""Unit tests for compressed text columns"""
+
+import base64
+import os
+
+import pytest
+
+from app.schemas.compressed_text import COMPRESSED, ESCAPED, MARKER, TOAST_THRESHOLD, pack, unpack
+
+CODE = "def solve(xs):\n    return sorted(set(xs))  # решение\n" * 30
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "short answer", CODE, CODE * 10, MARKER + "looks packed", MARKER + "z" + CODE, "ünïcødé " * 100],
+)
+def test_round_trip(text):
+    assert unpack(pack(text, threshold=1024)) == text
+
+
+def test_long_text_is_compressed_short_is_not():
+    assert pack(CODE, threshold=1024).startswith(COMPRESSED)
+    assert len(pack(CODE, threshold=1024)) < len(CODE.encode()) / 3
+    assert pack("short answer", threshold=1024) == "short answer"
+    assert pack(CODE, threshold=len(CODE.encode()) + 1) == CODE
+
+
+def test_toast_sized_text_is_left_to_postgres():
+    long = CODE * (TOAST_THRESHOLD // len(CODE.encode()) + 1)
+    assert pack(long, threshold=1024) == long
+
+
+def test_incompressible_text_is_stored_as_is():
+    # base64 случайных байт zlib почти не сжимает, а второй base64 раздул бы его
+    noise = base64.b64encode(os.urandom(3000)).decode()
+    assert pack(noise, threshold=1024) == noise
+
+
+def test_marker_prefixed_text_is_escaped():
+    assert pack(MARKER + "x", threshold=1024) == ESCAPED + MARKER + "x"
@@ -116,42 +116,51 @@ class LocalHomeworkRepo:
     def __init__(self):
         self.homeworks = {} 
 
-    def create_homework(self, hw: Homework) -> Homework:
+    async def create_homework(self, hw: Homework) -> Homework:
         self.homeworks[hw.id] = hw
         return hw
 
-    def get_homework_by_id(self, hw_id: str) -> Homework:
+    async def get_homework_by_id(self, hw_id: str) -> Homework:
         return self.homeworks.get(hw_id)
 
-    def get_homeworks(self) -> list:
+    async def get_homeworks(self) -> list:
         return list(self.homeworks.values())
 
-    def get_homeworks_by_course(self, course_id: str) -> list:
+    async def get_homeworks_by_course(self, course_id: str) -> list:
         return [hw for hw in self.homeworks.values() if hw.course_id == course_id]
 
-    def publish_homework(self, homework_id: str) -> Homework:
+    async def publish_homework(self, homework_id: str) -> Homework:
         hw = self.homeworks.get(homework_id)
-        if hw:
-            hw.status = HomeworkStatus.ACTIVE
-            from datetime import datetime
-            hw.published_at = datetime.utcnow()
-            self.homeworks[homework_id] = hw
+        if hw is None:
+            raise KeyError
+        if hw.status != HomeworkStatus.CREATED:
+            return None
+        hw.status = HomeworkStatus.ACTIVE
+        hw.published_at = datetime.utcnow()
         return hw
 
 class LocalSolutionRepo:
-    def __init__(self):
+    def __init__(self, homeworks: LocalHomeworkRepo):
         self.solutions = {}
+        self.homeworks = homeworks
 
-    def submit_solution(self, solution_id: str) -> Solution:
+    async def create_submitted(self, sol: Solution, minhash: bytes | None = None) -> Solution:
+        hw = self.homeworks.homeworks.get(sol.homework_id)
+        if hw is None or hw.status != HomeworkStatus.ACTIVE:
+            return None
+        self.solutions[sol.id] = sol
+        return sol
+
+    async def submit_solution(self, solution_id: str) -> Solution:
         sol = self.solutions.get(solution_id)
         if sol:
             sol.status = SolutionStatus.SUBMITTED
         return sol
 
-    def get_solutions_by_homework(self, hw_id: str) -> list:
+    async def get_solutions_by_homework(self, hw_id: str) -> list:
         return [sol for sol in self.solutions.values() if sol.homework_id == hw_id]
     
-    def create_solution(self, sol: Solution) -> Solution: 
+    async def create_solution(self, sol: Solution) -> Solution: 
         self.solutions[sol.id] = sol
         return sol
 
@@ -160,14 +169,51 @@ class LocalProgressRepo:
     def __init__(self):
         self.progress = {}
 
+    async def add_submission(self, student_id, homework_id) -> None:
+        self.progress[student_id] = self.progress.get(student_id, 0) + 1
+
+
+class LocalStatsRepo:
+    def __init__(self):
+        self.submitted = {}
+
+    async def add_submission(self, homework_id) -> None:
+        self.submitted[homework_id] = self.submitted.get(homework_id, 0) + 1
+
+    async def apply_transitions(self, transitions) -> None:
+        pass
+
+
+class LocalOutboxRepo:
+    def __init__(self):
+        self.events = []
+
+    async def add(self, event_type, events) -> None:
+        self.events += [(event_type, aggregate_id, payload) for aggregate_id, payload in events]
+
+
+class LocalUnitOfWork:
+    def __init__(self):
+        self.homeworks = LocalHomeworkRepo()
+        self.solutions = LocalSolutionRepo(self.homeworks)
+        self.progress = LocalProgressRepo()
+        self.stats = LocalStatsRepo()
+        self.outbox = LocalOutboxRepo()
+        self.after_commit_hooks = []
+
+    def after_commit(self, hook) -> None:
+        self.after_commit_hooks.append(hook)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
 
 @pytest.fixture(scope='session')
 def homework_service():
-    service = HomeworkService()
-    service.hw_repo = LocalHomeworkRepo()
-    service.sol_repo = LocalSolutionRepo()
-    service.prog_repo = LocalProgressRepo()
-    return service
+    return HomeworkService(LocalUnitOfWork())
 
 
 @pytest.fixture(scope='session')
@@ -179,65 +225,68 @@ def course_id():
 def student_id():
     return uuid4()
 
-def test_create_homework(homework_service: HomeworkService, course_id):
+async def test_create_homework(homework_service: HomeworkService, course_id):
     request = CreateHomeworkRequest(
         course_id=course_id,
         title='Test Homework',
         description='Test Description'
     )
-    homework = homework_service.create_homework(request)
+    homework = await homework_service.create_homework(request)
     assert homework.title == 'Test Homework'
     assert homework.course_id == course_id
     assert homework.status == HomeworkStatus.CREATED
 
 
-def test_publish_homework(homework_service: HomeworkService, course_id):
+async def test_publish_homework(homework_service: HomeworkService, course_id):
     create_req = CreateHomeworkRequest(
         course_id=course_id,
         title='Homework to Publish',
         description='Description'
     )
-    homework = homework_service.create_homework(create_req)
+    homework = await homework_service.create_homework(create_req)
 
     publish_req = PublishHomeworkRequest(homework_id=homework.id)
-    published_hw = homework_service.publish_homework(publish_req)
+    published_hw = await homework_service.publish_homework(publish_req)
 
     assert published_hw.status == HomeworkStatus.ACTIVE
     assert published_hw.published_at is not None
+    event_type, aggregate_id, payload = homework_service.outbox.events[-1]
+    assert (event_type, aggregate_id) == ("homework.published", homework.id)
+    assert payload["status"] == HomeworkStatus.ACTIVE.value
 
 
-def test_publish_homework_wrong_status(homework_service: HomeworkService, course_id):
+async def test_publish_homework_wrong_status(homework_service: HomeworkService, course_id):
     create_req = CreateHomeworkRequest(
         course_id=course_id,
         title='Already Published',
         description='Desc'
     )
-    homework = homework_service.create_homework(create_req)
+    homework = await homework_service.create_homework(create_req)
 
     publish_req = PublishHomeworkRequest(homework_id=homework.id)
-    homework_service.publish_homework(publish_req)
+    await homework_service.publish_homework(publish_req)
 
     with pytest.raises(ValueError):
-        homework_service.publish_homework(publish_req)
+        await homework_service.publish_homework(publish_req)
 
 
-def test_submit_solution(homework_service: HomeworkService, course_id, student_id):
+async def test_submit_solution(homework_service: HomeworkService, course_id, student_id):
     create_req = CreateHomeworkRequest(
         course_id=course_id,
         title='Homework for Solution',
         description='Description'
     )
-    homework = homework_service.create_homework(create_req)
+    homework = await homework_service.create_homework(create_req)
 
     publish_req = PublishHomeworkRequest(homework_id=homework.id)
-    homework_service.publish_homework(publish_req)
+    await homework_service.publish_homework(publish_req)
 
     solution_req = SubmitSolutionRequest(
         homework_id=homework.id,
         student_id=student_id,
         answer='My solution'
     )
-    solution = homework_service.submit_solution(solution_req)
+    solution = await homework_service.submit_solution(solution_req)
 
     assert solution.homework_id == homework.id
     assert solution.student_id == student_id
@@ -0,0 +1,100 @@
+"""Unit tests for the in-process course leaderboard"""
+
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+
+from app.leaderboard import CourseBoard, Leaderboard
+
+
+def test_top_and_rank_with_ties():
+    a, b, c, d = uuid4(), uuid4(), uuid4(), uuid4()
+    board = CourseBoard([(a, 4.0), (b, 5.0), (c, 4.0), (d, 3.5)])
+
+    top = board.top(3)
+    assert [(e.student_id, e.rank) for e in top][0] == (b, 1)
+    assert {e.student_id for e in top[1:]} == {a, c}
+    assert [e.rank for e in top] == [1, 2, 2]
+    assert board.rank(d).rank == 4
+    assert board.rank(uuid4()) is None
+
+
+def test_set_moves_and_removes_student():
+    a, b = uuid4(), uuid4()
+    board = CourseBoard([(a, 4.0), (b, 3.0)])
+
+    board.set(b, 5.0)
+    assert board.rank(b).rank == 1
+    assert board.rank(a).rank == 2
+
+    board.set(b, None)
+    assert board.rank(b) is None
+    assert len(board) == 1
+
+
+async def test_updates_apply_only_to_loaded_courses():
+    course, other = uuid4(), uuid4()
+    student = uuid4()
+    loads = []
+
+    async def load():
+        loads.append(course)
+        return [(student, 3.0)]
+
+    lb = Leaderboard(ttl=60, max_courses=10)
+    board = await lb.board(course, load)
+    lb.update([(student, course, 4.5), (uuid4(), other, 5.0)])
+
+    assert board.rank(student).average_grade == 4.5
+    assert (await lb.board(course, load)) is board
+    assert loads == [course]
+
+
+async def test_update_during_load_is_not_lost():
+    course, student = uuid4(), uuid4()
+    lb = Leaderboard(ttl=60, max_courses=10)
+
+    async def load():
+        # загрузка прочитала старое значение, а запись закоммитилась, пока она шла
+        lb.update([(student, course, 5.0)])
+        return [(student, 2.0)]
+
+    board = await lb.board(course, load)
+    assert board.rank(student).average_grade == 5.0
+
+
+@pytest.mark.parametrize("ttl, reloads", [(60, 1), (10, 2)])
+async def test_expired_board_is_served_while_reloading(ttl, reloads, monkeypatch):
+    course, student = uuid4(), uuid4()
+    averages = [3.0]
+
+    async def load():
+        return [(student, averages[-1])]
+
+    lb = Leaderboard(ttl=ttl, max_courses=10)
+    first = await lb.board(course, load)
+    averages.append(5.0)
+    later = time.monotonic() + 30
+    monkeypatch.setattr("app.reloading.time.monotonic", lambda: later)
+
+    assert await lb.board(course, load) is first
+    await asyncio.sleep(0)
+    current = await lb.board(course, load)
+    assert current.rank(student).average_grade == averages[reloads - 1]
+
+
+async def test_concurrent_first_requests_share_one_load():
+    course = uuid4()
+    loads = []
+
+    async def load():
+        loads.append(course)
+        await asyncio.sleep(0.01)
+        return []
+
+    lb = Leaderboard(ttl=60, max_courses=10)
+    boards = await asyncio.gather(*(lb.board(course, load) for _ in range(5)))
+    assert len(loads) == 1
+    assert all(b is boards[0] for b in boards)
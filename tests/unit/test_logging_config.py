@@ -0,0 +1,84 @@
+"""Unit tests for slow query logging and queued log handlers"""
+
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+from sqlalchemy import create_engine, text
+from uvicorn.logging import AccessFormatter
+
+from app import logging_config
+from app.settings import settings
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite://")
+    logging_config.log_slow_queries(engine)
+    yield engine
+    engine.dispose()
+
+
+def run_query(engine) -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :x"), {"x": 1})
+
+
+def test_query_over_threshold_is_logged(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        run_query(engine)
+    assert "slow query" in caplog.text
+    assert "SELECT ?" in caplog.text
+
+
+def test_fast_query_is_not_logged(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_ms", 60_000)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        run_query(engine)
+    assert "slow query" not in caplog.text
+
+
+def test_sampling_drops_records(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    monkeypatch.setattr(settings, "slow_query_sample_rate", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        run_query(engine)
+    assert "slow query" not in caplog.text
+
+
+def test_handlers_are_moved_behind_queue_and_restored():
+    logger = logging.getLogger("test.queued")
+    logger.propagate = False
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+
+    logging_config._to_queue(logger)
+    assert [isinstance(h, QueueHandler) for h in logger.handlers] == [True]
+    logger.warning("through the queue")
+
+    logging_config.stop_logging()
+    assert logger.handlers == [handler]
+    assert [r.getMessage() for r in records] == ["through the queue"]
+    logger.removeHandler(handler)
+
+
+def test_uvicorn_access_record_keeps_args_through_queue():
+    logger = logging.getLogger("test.queued.access")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    lines = []
+    handler = logging.Handler()
+    handler.setFormatter(AccessFormatter('%(client_addr)s - "%(request_line)s" %(status_code)s', use_colors=False))
+    handler.emit = lambda record: lines.append(handler.format(record))
+    logger.addHandler(handler)
+
+    logging_config._to_queue(logger)
+    # так пишет uvicorn.protocols.http: пять аргументов строки доступа
+    logger.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "GET", "/homeworks/", "1.1", 200)
+
+    logging_config.stop_logging()
+    assert lines == ['127.0.0.1:5000 - "GET /homeworks/ HTTP/1.1" 200 OK']
+    logger.removeHandler(handler)
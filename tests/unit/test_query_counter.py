@@ -0,0 +1,26 @@
+"""Unit tests for query budget checks"""
+
+import pytest
+
+from app.query_counter import QueryLog
+
+
+def make_log(*statements: str) -> QueryLog:
+    log = QueryLog()
+    log.statements = list(statements)
+    return log
+
+
+def test_within_budget_passes():
+    make_log("SELECT 1", "UPDATE t SET x = $1").check(2)
+
+
+def test_over_budget_fails():
+    with pytest.raises(AssertionError, match="3 queries, budget is 2"):
+        make_log("SELECT 1", "SELECT 2", "SELECT 3").check(2)
+
+
+def test_repeated_statement_is_reported():
+    log = make_log("SELECT 1", "SELECT 2 WHERE id = $1", "SELECT 2 WHERE id = $1")
+    with pytest.raises(AssertionError, match="N\\+1 candidate, executed 2 times"):
+        log.check(5)
@@ -0,0 +1,223 @@
+"""Unit tests for payment message handling: ack, requeue and dead-letter"""
+
+import json
+from contextlib import asynccontextmanager
+from uuid import UUID, uuid4
+
+import pytest
+
+from sqlalchemy.exc import DBAPIError
+
+from app import rabbitmq
+from app.cache import MemoryCache
+from app.settings import settings
+
+
+class FakeMessage:
+    def __init__(self, body: bytes, redelivered: bool = False, message_id: str | None = None, headers=None):
+        self.body = body
+        self.redelivered = redelivered
+        self.message_id = message_id
+        self.headers = headers
+        self.content_type = None
+        self.timestamp = None
+        self.outcome = None
+
+    async def ack(self):
+        self.outcome = "ack"
+
+    async def nack(self, requeue: bool = True):
+        self.outcome = "requeue" if requeue else "dead"
+
+    async def reject(self, requeue: bool = False):
+        self.outcome = "requeue" if requeue else "dead"
+
+
+class LocalHomeworkRepo:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        # курсы, на которых активация падает: «ядовитый» платёж
+        self.poison = set()
+        self.calls = []
+        self.payments = LocalPaymentRepo()
+
+    async def activate_by_courses(self, course_ids):
+        if isinstance(self.fail, Exception):
+            raise self.fail
+        if self.fail:
+            raise RuntimeError("db is down")
+        if self.poison & set(course_ids):
+            raise ValueError("bad payment")
+        self.calls.append(sorted(course_ids))
+        return []
+
+
+class LocalPaymentRepo:
+    def __init__(self):
+        self.keys = set()
+
+    async def record(self, keys):
+        new = set(keys) - self.keys
+        self.keys |= new
+        return new
+
+
+class FakeExchange:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, message))
+
+
+class LocalOutboxRepo:
+    async def add(self, event_type, events) -> None:
+        pass
+
+
+class LocalUnitOfWork:
+    def __init__(self, repo):
+        self.homeworks = repo
+        self.solutions = None
+        self.progress = None
+        self.stats = None
+        self.outbox = LocalOutboxRepo()
+        self.payments = repo.payments
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def repo(monkeypatch, request):
+    repo = LocalHomeworkRepo(fail=getattr(request, "param", False))
+
+    @asynccontextmanager
+    async def open_uow():
+        yield LocalUnitOfWork(repo)
+
+    monkeypatch.setattr(rabbitmq, "open_uow", open_uow)
+    monkeypatch.setattr(rabbitmq, "seen_payments", MemoryCache(100, 60))
+    monkeypatch.setattr(rabbitmq, "stats", rabbitmq.ConsumerStats())
+    return repo
+
+
+def payment(course_id, redelivered=False, message_id=None, student_id=None, headers=None) -> FakeMessage:
+    data = {"course_id": str(course_id)}
+    if student_id is not None:
+        data["student_id"] = str(student_id)
+    return FakeMessage(json.dumps(data).encode(), redelivered, message_id, headers)
+
+
+async def test_batch_activates_distinct_courses_once(repo):
+    first, second = uuid4(), uuid4()
+    msgs = [payment(first), payment(second), payment(first)]
+
+    await rabbitmq.process_payment_batch(msgs)
+
+    assert repo.calls == [sorted([first, second])]
+    assert [m.outcome for m in msgs] == ["ack"] * 3
+
+
+async def test_invalid_message_is_dead_lettered(repo):
+    bad, good = FakeMessage(b"not json"), payment(uuid4())
+
+    await rabbitmq.process_payment_batch([bad, good])
+
+    assert bad.outcome == "dead"
+    assert good.outcome == "ack"
+
+
+@pytest.mark.parametrize("repo", [True], indirect=True)
+async def test_failure_requeues_then_dead_letters(repo):
+    fresh, redelivered = payment(uuid4()), payment(uuid4(), redelivered=True)
+
+    await rabbitmq.process_payment_batch([fresh, redelivered])
+
+    assert fresh.outcome == "requeue"
+    assert redelivered.outcome == "dead"
+
+
+async def test_redelivered_message_is_skipped_in_memory(repo):
+    course_id = uuid4()
+    await rabbitmq.process_payment_batch([payment(course_id, message_id="m-1")])
+
+    again = payment(course_id, redelivered=True, message_id="m-1")
+    await rabbitmq.process_payment_batch([again])
+
+    assert repo.calls == [[course_id]]
+    assert again.outcome == "ack"
+    assert rabbitmq.stats.duplicates == 1
+    assert rabbitmq.stats.dedup_memory_hits == 1
+
+
+async def test_duplicate_payment_is_skipped_by_store(repo, monkeypatch):
+    course_id, student_id = uuid4(), uuid4()
+    await rabbitmq.process_payment_batch([payment(course_id, message_id="a", student_id=student_id)])
+    # другой процесс или перезапуск: в памяти ключей нет, остаётся таблица
+    monkeypatch.setattr(rabbitmq, "seen_payments", MemoryCache(100, 60))
+
+    duplicate = payment(course_id, message_id="b", student_id=student_id)
+    other = payment(uuid4(), message_id="c", student_id=student_id)
+    await rabbitmq.process_payment_batch([duplicate, other])
+
+    assert repo.calls == [[course_id], [UUID(json.loads(other.body)["course_id"])]]
+    assert duplicate.outcome == other.outcome == "ack"
+    assert rabbitmq.stats.duplicates == 1
+    assert rabbitmq.stats.dedup_memory_hits == 0
+
+
+async def test_same_payment_twice_in_one_batch(repo):
+    course_id, student_id = uuid4(), uuid4()
+    msgs = [payment(course_id, student_id=student_id), payment(course_id, student_id=student_id)]
+
+    await rabbitmq.process_payment_batch(msgs)
+
+    assert repo.calls == [[course_id]]
+    assert rabbitmq.stats.duplicates == 1
+    assert rabbitmq.stats.dedup_batch_hits == 1
+    assert rabbitmq.stats.dedup_memory_hits == 0
+
+
+async def test_redelivered_batch_is_retried_one_by_one(repo):
+    poison, good, fresh = uuid4(), uuid4(), uuid4()
+    repo.poison.add(poison)
+    msgs = [payment(poison, redelivered=True), payment(good, redelivered=True), payment(fresh)]
+
+    await rabbitmq.process_payment_batch(msgs)
+
+    # в dead-letter уходит только сломанный платёж, соседи по пачке активируются
+    assert [m.outcome for m in msgs] == ["dead", "ack", "ack"]
+    assert repo.calls == [[good], [fresh]]
+    assert rabbitmq.stats.dead_lettered == 1
+
+
+@pytest.mark.parametrize(
+    "repo",
+    [
+        ConnectionRefusedError("connection refused"),
+        DBAPIError("SELECT 1", {}, Exception("connection is closed"), connection_invalidated=True),
+    ],
+    indirect=True,
+)
+async def test_db_outage_delays_retry_instead_of_dead_letter(repo, monkeypatch):
+    exchange = FakeExchange()
+    monkeypatch.setattr(rabbitmq, "retry_exchange", exchange)
+    msgs = [payment(uuid4(), redelivered=True), payment(uuid4(), headers={rabbitmq.RETRY_HEADER: 20})]
+
+    await rabbitmq.process_payment_batch(msgs)
+
+    # оригиналы подтверждены, копии ждут в очереди повторов с растущей задержкой
+    assert [m.outcome for m in msgs] == ["ack", "ack"]
+    assert rabbitmq.stats.dead_lettered == 0
+    assert rabbitmq.stats.retried == 2
+    assert [key for key, _ in exchange.published] == [settings.payment_retry_queue] * 2
+    (_, first), (_, second) = exchange.published
+    assert first.headers[rabbitmq.RETRY_HEADER] == 1
+    assert first.body == msgs[0].body
+    assert second.headers[rabbitmq.RETRY_HEADER] == 21
+    assert float(first.expiration) == settings.payment_retry_delay
+    assert float(second.expiration) == settings.payment_retry_max_delay
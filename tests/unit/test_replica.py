@@ -0,0 +1,112 @@
+# tests/unit/test_replica.py
+import time
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app import replica
+from app.replica import ReadContext, ReadRoutingMiddleware, RoutingSession, use_primary
+from app.schemas.homework import Homework as DBHomework
+
+primary, standby = create_engine("sqlite://"), create_engine("sqlite://")
+
+
+class Session(RoutingSession):
+    primary = primary
+    replica = standby
+
+
+@pytest.fixture(autouse=True)
+def fresh_replica(monkeypatch):
+    """Реплика только что замерена: отстаёт на 0.1 с"""
+    monkeypatch.setattr(replica.monitor, "lag", 0.1)
+    monkeypatch.setattr(replica.monitor, "checked_at", time.monotonic())
+    monkeypatch.setattr(replica.monitor, "replayed_until", time.time() - 0.1)
+    monkeypatch.setattr(replica, "stats", replica.RoutingStats())
+
+
+@pytest.fixture()
+def get_request():
+    """get_request(after) - дальше тест идёт как GET-запрос с токеном after"""
+    tokens = []
+    yield lambda after=None: tokens.append(replica._request.set(ReadContext(after)))
+    for token in reversed(tokens):
+        replica._request.reset(token)
+
+
+def bind(session, stmt):
+    return session.get_bind(clause=stmt)
+
+
+def test_reads_outside_get_request_go_to_primary():
+    assert bind(Session(), select(DBHomework)) is primary
+    assert replica.stats.reads == {("primary", "primary"): 1}
+
+
+def test_get_request_reads_from_replica_until_session_writes(get_request):
+    get_request()
+    session = Session()
+    assert bind(session, select(DBHomework)) is standby
+    assert bind(session, select(DBHomework).with_for_update()) is primary
+    assert bind(session, select(DBHomework)) is primary
+    assert bind(Session(), insert(DBHomework)) is primary
+    assert replica.stats.reads == {("replica", "replica"): 1, ("primary", "session"): 1}
+
+
+def test_lagging_or_unmeasured_replica_falls_back(get_request, monkeypatch):
+    get_request()
+    monkeypatch.setattr(replica.monitor, "lag", replica.monitor.max_lag + 1)
+    assert bind(Session(), select(DBHomework)) is primary
+    monkeypatch.setattr(replica.monitor, "lag", 0.0)
+    monkeypatch.setattr(replica.monitor, "checked_at", time.monotonic() - 10 * replica.monitor.interval)
+    assert bind(Session(), select(DBHomework)) is primary
+    assert replica.stats.reads == {("primary", "lag"): 2}
+
+
+def test_token_newer_than_replica_reads_primary(get_request):
+    get_request(after=time.time())
+    assert bind(Session(), select(DBHomework)) is primary
+    get_request(after=time.time() - 60)
+    assert bind(Session(), select(DBHomework)) is standby
+    assert replica.stats.reads == {("primary", "token"): 1, ("replica", "replica"): 1}
+
+
+def test_use_primary_overrides_get_request(get_request):
+    get_request()
+    with use_primary():
+        assert bind(Session(), select(DBHomework)) is primary
+    assert bind(Session(), select(DBHomework)) is standby
+
+
+async def run(middleware, method: str, headers: list[tuple[bytes, bytes]] = ()) -> list[dict]:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "method": method, "headers": list(headers)}, None, send)
+    return sent
+
+
+async def test_middleware_issues_token_after_write_and_reads_it_back():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(replica._request.get())
+        if scope["method"] == "POST":
+            Session().get_bind(clause=insert(DBHomework))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    middleware = ReadRoutingMiddleware(app)
+    before = time.time()
+    (start,) = await run(middleware, "POST")
+    headers = dict(start["headers"])
+    token = float(headers[b"x-read-after"])
+    assert token >= before
+    assert headers[b"set-cookie"].startswith(f"read_after={headers[b'x-read-after'].decode()};".encode())
+
+    await run(middleware, "GET", [(b"cookie", b"other=1; read_after=" + headers[b"x-read-after"])])
+    await run(middleware, "GET", [(b"x-read-after", b"12.5")])
+    await run(middleware, "GET", [(b"x-read-after", b"garbage")])
+    assert [ctx.after for ctx in seen[1:]] == [token, 12.5, None]
+    assert replica._request.get() is None
@@ -0,0 +1,163 @@
+"""Unit tests for MinHash signatures and the per-homework LSH index"""
+
+import random
+import time
+import tracemalloc
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.similarity import (
+    BANDS,
+    BUCKET_LEADERS,
+    HomeworkIndex,
+    PERMUTATIONS,
+    SimilarityIndex,
+    _shingles,
+    minhash,
+    signatures,
+    to_bytes,
+)
+
+random.seed(7)
+WORDS = ["def", "return", "for", "in", "range", "if", "else", "while", "items", "total", "node", "print"]
+
+
+def code(lines: int) -> str:
+    return "\n".join(" ".join(random.choices(WORDS, k=6)) for _ in range(lines))
+
+
+def edited(text: str, share: float) -> str:
+    """Копия с заменой доли строк"""
+    lines = text.split("\n")
+    for i in random.sample(range(len(lines)), int(len(lines) * share)):
+        lines[i] = " ".join(random.choices(WORDS, k=6))
+    return "\n".join(lines)
+
+
+def jaccard(a: str, b: str) -> float:
+    x, y = set(_shingles(a).tolist()), set(_shingles(b).tolist())
+    return len(x & y) / len(x | y)
+
+
+@pytest.mark.parametrize("share", [0.0, 0.1, 0.3, 0.6])
+def test_signature_estimates_jaccard(share):
+    a = code(80)
+    b = edited(a, share)
+    sig = signatures([a, b])
+    assert sig.shape == (2, PERMUTATIONS)
+    # стандартная ошибка оценки при 128 перестановках - не больше 0.045
+    assert abs((sig[0] == sig[1]).mean() - jaccard(a, b)) < 0.15
+
+
+def test_signature_ignores_case_and_whitespace():
+    text = code(20)
+    assert minhash(text) == minhash("  " + text.upper().replace(" ", "\n\t "))
+    assert minhash("") == minhash("")
+    assert len(minhash("x")) == PERMUTATIONS * 4
+
+
+def test_batch_matches_single():
+    texts = [code(n) for n in (1, 5, 50, 2000)]
+    assert [row.astype("<u4").tobytes() for row in signatures(texts)] == [minhash(t) for t in texts]
+    assert signatures([]).shape == (0, PERMUTATIONS)
+
+
+def test_index_finds_copies_of_other_students():
+    original = code(60)
+    copier, author, same, other = uuid4(), uuid4(), uuid4(), uuid4()
+    rows = [
+        (uuid4(), author, minhash(original)),
+        (uuid4(), copier, minhash(edited(original, 0.05))),
+        (uuid4(), other, minhash(code(60))),
+    ]
+    index = HomeworkIndex(rows)
+    (pair,) = index.similar(0.8, 10)
+    assert (pair.solution_id, pair.similar_solution_id) == (rows[0][0], rows[1][0])
+    assert (pair.student_id, pair.similar_student_id) == (author, copier)
+    assert pair.similarity >= 0.8
+
+    # пересдача того же студента - не списывание, повторное добавление не учитывается;
+    # пересдача совпадает с оригиналом, и пара с копией сообщается один раз - по оригиналу
+    resubmitted = uuid4()
+    index.add(resubmitted, author, minhash(original))
+    index.add(rows[2][0], same, rows[2][2])
+    assert len(index) == 4
+    assert [(p.solution_id, p.similar_solution_id) for p in index.similar(0.8, 10)] == [
+        (rows[0][0], rows[1][0]),
+    ]
+    assert HomeworkIndex([]).similar(0.8, 10) == []
+
+
+def test_similar_is_sorted_and_limited():
+    base = code(60)
+    rows = [(uuid4(), uuid4(), minhash(edited(base, share))) for share in (0.0, 0.0, 0.1, 0.2)]
+    found = HomeworkIndex(rows).similar(0.7, 100)
+    assert [p.similarity for p in found] == sorted((p.similarity for p in found), reverse=True)
+    assert found[0].similarity == 1.0
+    assert HomeworkIndex(rows).similar(0.7, 2) == found[:2]
+
+
+def test_identical_answers_are_paired_linearly():
+    """Тысячи одинаковых ответов - одна группа: пар столько же, сколько решений"""
+    template = code(30)
+    signature, author = minhash(template), uuid4()
+    rows = [(uuid4(), author, signature), (uuid4(), author, signature)]
+    rows += [(uuid4(), uuid4(), signature) for _ in range(20_000)]
+    rows.append((uuid4(), uuid4(), minhash(edited(template, 0.1))))
+    index = HomeworkIndex(rows)
+
+    assert sum(len(first) for first, _ in index.candidates()) < 3 * len(rows)
+    found = index.similar(0.7, 100_000)
+    # каждая копия - в паре с первым решением, пересдача автора - с первым чужим
+    assert {(p.solution_id, p.similar_solution_id) for p in found if p.similarity == 1.0} == {
+        (rows[0][0], row[0]) for row in rows[2:-1]
+    } | {(rows[1][0], rows[2][0])}
+    # похожий ответ сравнивается с группой по первому решению и первому чужому
+    assert {(p.solution_id, p.similar_solution_id) for p in found if p.similarity < 1.0} == {
+        (rows[0][0], rows[-1][0]),
+        (rows[2][0], rows[-1][0]),
+    }
+
+
+def test_near_duplicates_are_bounded():
+    """Ответы по одному шаблону делят почти все полосы: пары корзины не перебираются все"""
+    template = code(40).split("\n")
+    texts = []
+    for i in range(3000):
+        lines = list(template)
+        lines[i % len(lines)] = " ".join(random.choices(WORDS, k=6))
+        texts.append("\n".join(lines))
+    rows = [(uuid4(), uuid4(), to_bytes(signature)) for signature in signatures(texts)]
+    index = HomeworkIndex(rows)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    found = index.similar(0.8, 100)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(found) == 100
+    assert all(p.similarity >= 0.8 for p in found)
+    assert sum(len(first) for first, _ in index.candidates()) <= 3 * BANDS * BUCKET_LEADERS * len(rows)
+    assert peak < 64 * 2**20
+    assert elapsed < 5
+
+
+async def test_added_while_loading_is_not_lost():
+    homework_id = uuid4()
+    signature = minhash(code(10))
+    existing = (uuid4(), uuid4(), signature)
+    added = (uuid4(), uuid4(), signature)
+    index = SimilarityIndex(ttl=60, max_homeworks=10)
+
+    async def load():
+        # решение отправлено и закоммичено, пока шёл запрос загрузки
+        index.add(homework_id, added)
+        return [existing]
+
+    loaded = await index.index(homework_id, load)
+    assert set(loaded.ids) == {existing[0], added[0]}
+    assert np.isclose(loaded.similar(0.9, 10)[0].similarity, 1.0)